@@ -0,0 +1,260 @@
+"""A local stand-in for the Databricks REST APIs the app calls (Genie, SQL, secrets)."""
+import asyncio
+import base64
+import itertools
+import random
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from benchmarks.fake_slack import APP_TOKEN, BOT_TOKEN
+
+# Status sequence a Genie message walks through: (status, seconds in it).
+# The message completes once the last step's time is up.
+DEFAULT_STATUSES = [("SUBMITTED", 0.3), ("ASKING_AI", 1.0), ("EXECUTING_QUERY", 1.0)]
+# The traffic driver tags its questions with the Slack thread they were asked in
+THREAD_TAG = re.compile(r"\[thread ([^\]]+)\]")
+
+
+def parse_statuses(spec: str) -> List[Tuple[str, float]]:
+    """Parse "SUBMITTED:0.3,ASKING_AI:1,EXECUTING_QUERY:1" into (status, seconds) steps."""
+    steps = []
+    for part in spec.split(","):
+        status, _, seconds = part.strip().partition(":")
+        steps.append((status.strip().upper(), float(seconds or 0)))
+    return steps
+
+
+class FakeGenie:
+    """
+    Serves Genie conversations whose messages move through a configurable
+    status sequence, their query results (split into chunks), message
+    feedback, the space list and the Slack tokens in the secret scope.
+
+    Counts overlaps: a message created in a conversation while another
+    message from the same Slack thread is still in progress there. The app
+    handles a thread's questions one at a time, on one replica, so any
+    overlap means two replicas (or tasks) worked on a thread at once.
+
+    Attributes:
+        latency: Seconds added to every call
+        jitter: Up to this many extra seconds, at random, per call
+        statuses: Status sequence of every message
+        fail_ratio: Fraction of messages that end FAILED instead of COMPLETED
+        rows: Rows in each query result (0 answers with text only)
+        chunk_rows: Rows per result chunk
+        spaces: Number of Genie spaces listed
+        calls: Calls by endpoint
+        overlaps: Messages created while their thread had one in progress
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.02,
+        statuses: Optional[List[Tuple[str, float]]] = None,
+        fail_ratio: float = 0.0,
+        rows: int = 20,
+        chunk_rows: int = 1000,
+        spaces: int = 5,
+        seed: Optional[int] = None
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.statuses = statuses or DEFAULT_STATUSES
+        self.fail_ratio = fail_ratio
+        self.rows = rows
+        self.chunk_rows = max(1, chunk_rows)
+        self.spaces = spaces
+        self.calls: Counter = Counter()
+        self.overlaps = 0
+        self._in_progress: Dict[Tuple[str, str], List[Dict]] = {}
+        self._random = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._messages: Dict[str, Dict] = {}
+        self.url = None
+        self._runner = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        app = web.Application()
+        genie = "/api/2.0/genie/spaces"
+        messages = genie + "/{space}/conversations/{conv}/messages"
+        app.router.add_get("/api/2.0/secrets/get", self._get_secret)
+        app.router.add_get(genie, self._list_spaces)
+        app.router.add_post(genie + "/{space}/start-conversation", self._start_conversation)
+        app.router.add_post(messages, self._create_message)
+        app.router.add_get(messages + "/{msg}", self._get_message)
+        app.router.add_get(messages + "/{msg}/attachments/{att}/query-result", self._query_result)
+        app.router.add_post(messages + "/{msg}/feedback", self._feedback)
+        app.router.add_get("/api/2.0/sql/statements/{statement}/result/chunks/{chunk}", self._result_chunk)
+        app.router.add_route("*", "/{path:.*}", self._not_found)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+    async def _delay(self, endpoint: str):
+        self.calls[endpoint] += 1
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    # ==================== Messages ====================
+
+    def _new_message(self, space_id: str, conversation_id: str, content: str) -> Dict:
+        message_id = f"msg-{next(self._ids)}"
+        message = {
+            "space_id": space_id,
+            "conversation_id": conversation_id,
+            "message_id": message_id,
+            "content": content,
+            "created": time.monotonic(),
+            "fails": self._random.random() < self.fail_ratio
+        }
+        self._messages[message_id] = message
+        tag = THREAD_TAG.search(content)
+        if tag:
+            key = (conversation_id, tag.group(1))
+            running = [m for m in self._in_progress.get(key, []) if not self._finished(m)]
+            if running:
+                self.overlaps += 1
+            self._in_progress[key] = running + [message]
+        return message
+
+    def _finished(self, message: Dict) -> bool:
+        return self._status(message) in ("COMPLETED", "FAILED")
+
+    def _status(self, message: Dict) -> str:
+        elapsed = time.monotonic() - message["created"]
+        for status, seconds in self.statuses:
+            if elapsed < seconds:
+                return status
+            elapsed -= seconds
+        return "FAILED" if message["fails"] else "COMPLETED"
+
+    def _message_json(self, message: Dict) -> Dict:
+        status = self._status(message)
+        body = {
+            "id": message["message_id"],
+            "message_id": message["message_id"],
+            "space_id": message["space_id"],
+            "conversation_id": message["conversation_id"],
+            "content": message["content"],
+            "status": status,
+            "created_timestamp": int(time.time() * 1000)
+        }
+        if status == "COMPLETED":
+            attachment = {
+                "attachment_id": f"att-{message['message_id']}",
+                "text": {"content": f"FAKE_ANSWER to: {message['content']}"}
+            }
+            if self.rows > 0:
+                attachment["query"] = {
+                    "query": "SELECT id, name, amount FROM bench.fake_table",
+                    "description": "Fake query over a generated table"
+                }
+            body["attachments"] = [attachment]
+        return body
+
+    async def _start_conversation(self, request: web.Request) -> web.Response:
+        await self._delay("start_conversation")
+        space_id = request.match_info["space"]
+        content = (await request.json()).get("content", "")
+        message = self._new_message(space_id, f"conv-{next(self._ids)}", content)
+        return web.json_response({
+            "conversation_id": message["conversation_id"],
+            "message_id": message["message_id"],
+            "message": self._message_json(message),
+            "conversation": {"id": message["conversation_id"], "space_id": space_id}
+        })
+
+    async def _create_message(self, request: web.Request) -> web.Response:
+        await self._delay("create_message")
+        content = (await request.json()).get("content", "")
+        message = self._new_message(request.match_info["space"], request.match_info["conv"], content)
+        return web.json_response(self._message_json(message))
+
+    async def _get_message(self, request: web.Request) -> web.Response:
+        await self._delay("get_message")
+        message = self._messages.get(request.match_info["msg"])
+        if message is None:
+            return self._error(404, "RESOURCE_DOES_NOT_EXIST", "No such message")
+        return web.json_response(self._message_json(message))
+
+    async def _feedback(self, request: web.Request) -> web.Response:
+        await self._delay("send_message_feedback")
+        rating = (await request.json()).get("rating")
+        self.calls[f"feedback:{rating}"] += 1
+        return web.json_response({})
+
+    # ==================== Query results ====================
+
+    def _rows(self, start: int, end: int) -> List[List[str]]:
+        return [[str(i), f"name {i}", f"{i * 1.5:.2f}"] for i in range(start, min(end, self.rows))]
+
+    def _chunk(self, index: int) -> Dict:
+        chunk_count = max(1, -(-self.rows // self.chunk_rows))
+        start = index * self.chunk_rows
+        rows = self._rows(start, start + self.chunk_rows)
+        chunk = {"chunk_index": index, "row_offset": start, "row_count": len(rows), "data_array": rows}
+        if index + 1 < chunk_count:
+            chunk["next_chunk_index"] = index + 1
+        return chunk
+
+    async def _query_result(self, request: web.Request) -> web.Response:
+        await self._delay("get_message_attachment_query_result")
+        chunk_count = max(1, -(-self.rows // self.chunk_rows))
+        columns = [("id", "INT"), ("name", "STRING"), ("amount", "DECIMAL")]
+        return web.json_response({"statement_response": {
+            "statement_id": f"stmt-{request.match_info['msg']}",
+            "status": {"state": "SUCCEEDED"},
+            "manifest": {
+                "format": "JSON_ARRAY",
+                "schema": {
+                    "column_count": len(columns),
+                    "columns": [
+                        {"name": name, "position": i, "type_name": type_name, "type_text": type_name}
+                        for i, (name, type_name) in enumerate(columns)
+                    ]
+                },
+                "total_row_count": self.rows,
+                "total_chunk_count": chunk_count
+            },
+            "result": self._chunk(0)
+        }})
+
+    async def _result_chunk(self, request: web.Request) -> web.Response:
+        await self._delay("get_statement_result_chunk_n")
+        return web.json_response(self._chunk(int(request.match_info["chunk"])))
+
+    # ==================== Everything else ====================
+
+    async def _list_spaces(self, request: web.Request) -> web.Response:
+        await self._delay("list_spaces")
+        return web.json_response({"spaces": [
+            {"space_id": f"space-{i}", "title": f"Bench room {i}", "description": "Fake Genie space"}
+            for i in range(self.spaces)
+        ]})
+
+    async def _get_secret(self, request: web.Request) -> web.Response:
+        await self._delay("secrets_get")
+        tokens = {"token_app": APP_TOKEN, "token_bot": BOT_TOKEN}
+        key = request.query.get("key")
+        if key not in tokens:
+            return self._error(404, "RESOURCE_DOES_NOT_EXIST", f"Secret {key} not found")
+        return web.json_response({"key": key, "value": base64.b64encode(tokens[key].encode()).decode()})
+
+    async def _not_found(self, request: web.Request) -> web.Response:
+        self.calls[f"other:{request.method} {request.path}"] += 1
+        return self._error(404, "ENDPOINT_NOT_FOUND", f"{request.path} is not faked")
+
+    def _error(self, status: int, code: str, message: str) -> web.Response:
+        return web.json_response({"error_code": code, "message": message}, status=status)
@@ -0,0 +1,207 @@
+"""A local stand-in for the Slack Web API and Socket Mode."""
+import asyncio
+import itertools
+import json
+import time
+import uuid
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from aiohttp import WSMsgType, web
+
+APP_TOKEN = "xapp-fake"
+BOT_TOKEN = "xoxb-fake"
+TEAM_ID = "T0BENCH"
+BOT_USER_ID = "U0BOT"
+API_APP_ID = "A0BENCH"
+
+
+class FakeSlack:
+    """
+    Serves the Web API methods the app calls and the Socket Mode WebSocket.
+
+    ``apps.connections.open`` hands out a WebSocket URL on this server;
+    every app process (or replica) that connects gets envelopes round-robin.
+    Posts and edits are recorded per thread and reported to ``on_message``
+    so the traffic driver can tell when a question was answered.
+
+    Attributes:
+        latency: Seconds added to every Web API call
+        calls: Web API calls by method
+        on_message: Called with (thread_ts, ts, text) for every post or edit
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self.on_message: Optional[Callable[[Optional[str], str, str], None]] = None
+        self.acks = 0
+        self.ack_latencies: List[float] = []
+        self.connections_opened = 0
+        self.first_connected: Optional[float] = None
+        self._sockets: List[web.WebSocketResponse] = []
+        self._next_socket = itertools.count()
+        self._sent: Dict[str, float] = {}  # envelope_id -> send time
+        self._threads: Dict[str, Optional[str]] = {}  # message ts -> thread ts
+        self._ts = itertools.count(1)
+        self._epoch = int(time.time())
+        self._connected = asyncio.Event()
+        self.url = None
+        self._runner = None
+
+    # ==================== Server ====================
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/api/{method}", self._handle_api)
+        app.router.add_get("/socket", self._handle_socket)
+        app.router.add_post("/upload/{file_id}", self._handle_upload)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+
+    async def stop(self):
+        for ws in list(self._sockets):
+            await ws.close()
+        await self._runner.cleanup()
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.url}/api/"
+
+    def next_ts(self) -> str:
+        """A unique Slack timestamp ("seconds.micros")."""
+        return f"{self._epoch}.{next(self._ts):06d}"
+
+    async def wait_for_connections(self, count: int, timeout: float):
+        """Wait until ``count`` Socket Mode connections are open."""
+        deadline = time.monotonic() + timeout
+        while len(self._sockets) < count:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"only {len(self._sockets)} of {count} Socket Mode connections opened")
+            await asyncio.sleep(0.05)
+
+    # ==================== Web API ====================
+
+    async def _handle_api(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        if request.content_type == "application/json":
+            params = await request.json()
+        else:
+            params = dict(await request.post())
+            params.update(request.query)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        handler = getattr(self, "_api_" + method.replace(".", "_"), None)
+        body = handler(params) if handler else {}
+        return web.json_response({"ok": True, **body})
+
+    def _api_apps_connections_open(self, params):
+        return {"url": self.url.replace("http", "ws", 1) + "/socket"}
+
+    def _api_auth_test(self, params):
+        return {"url": "https://bench.slack.com/", "team": "bench", "user": "genie", "team_id": TEAM_ID,
+                "user_id": BOT_USER_ID, "bot_id": "B0BOT", "is_enterprise_install": False}
+
+    def _record(self, thread_ts: Optional[str], ts: str, text: str):
+        if self.on_message is not None:
+            self.on_message(thread_ts, ts, text or "")
+
+    def _api_chat_postMessage(self, params):
+        ts = self.next_ts()
+        thread_ts = params.get("thread_ts")
+        self._threads[ts] = thread_ts
+        self._record(thread_ts, ts, params.get("text"))
+        return {"channel": params.get("channel"), "ts": ts, "message": {"text": params.get("text"), "ts": ts}}
+
+    def _api_chat_update(self, params):
+        ts = params.get("ts")
+        self._record(self._threads.get(ts), ts, params.get("text"))
+        return {"channel": params.get("channel"), "ts": ts, "text": params.get("text")}
+
+    def _api_chat_delete(self, params):
+        self._threads.pop(params.get("ts"), None)
+        return {"channel": params.get("channel"), "ts": params.get("ts")}
+
+    def _api_chat_postEphemeral(self, params):
+        return {"message_ts": self.next_ts()}
+
+    def _api_files_getUploadURLExternal(self, params):
+        file_id = f"F{uuid.uuid4().hex[:10].upper()}"
+        return {"upload_url": f"{self.url}/upload/{file_id}", "file_id": file_id}
+
+    def _api_files_completeUploadExternal(self, params):
+        files = params.get("files")
+        if isinstance(files, str):
+            files = json.loads(files)
+        return {"files": [{"id": f.get("id"), "title": f.get("title")} for f in files or []]}
+
+    async def _handle_upload(self, request: web.Request) -> web.Response:
+        self.calls["files.upload(content)"] += 1
+        await request.read()
+        return web.Response(text="OK")
+
+    # ==================== Socket Mode ====================
+
+    async def _handle_socket(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        self.connections_opened += 1
+        if self.first_connected is None:
+            self.first_connected = time.monotonic()
+        self._sockets.append(ws)
+        await ws.send_json({"type": "hello", "num_connections": len(self._sockets),
+                            "connection_info": {"app_id": API_APP_ID}})
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                ack = json.loads(msg.data)
+                sent = self._sent.pop(ack.get("envelope_id"), None)
+                if sent is not None:
+                    self.acks += 1
+                    self.ack_latencies.append(time.monotonic() - sent)
+        finally:
+            self._sockets.remove(ws)
+        return ws
+
+    async def send(self, envelope_type: str, payload: Dict, retry_attempt: int = 0) -> str:
+        """
+        Deliver an envelope over the next open connection (round-robin).
+
+        Returns:
+            The envelope ID
+        """
+        if not self._sockets:
+            raise ConnectionError("no Socket Mode connection is open")
+        ws = self._sockets[next(self._next_socket) % len(self._sockets)]
+        envelope_id = str(uuid.uuid4())
+        envelope = {
+            "envelope_id": envelope_id,
+            "type": envelope_type,
+            "accepts_response_payload": envelope_type != "events_api",
+            "payload": payload
+        }
+        if envelope_type == "events_api":
+            envelope["retry_attempt"] = retry_attempt
+            envelope["retry_reason"] = "timeout" if retry_attempt else ""
+        self._sent[envelope_id] = time.monotonic()
+        await ws.send_json(envelope)
+        return envelope_id
+
+    def event_payload(self, event: Dict, event_id: Optional[str] = None) -> Dict:
+        """Wrap an event in an Events API callback body."""
+        return {
+            "token": "fake",
+            "team_id": TEAM_ID,
+            "api_app_id": API_APP_ID,
+            "event": event,
+            "type": "event_callback",
+            "event_id": event_id or f"Ev{uuid.uuid4().hex[:12].upper()}",
+            "event_time": int(time.time()),
+            "authorizations": [{"team_id": TEAM_ID, "user_id": BOT_USER_ID, "is_bot": True}]
+        }
@@ -0,0 +1,98 @@
+"""
+Time and peak memory of rendering query results of growing size.
+
+Feeds generated rows, chunk by chunk, through ``TableRenderer`` the way
+``format_genie_response`` does: the inline table first (until it is full),
+then the rest of the result into the CSV export. Run from the repository
+root, e.g.::
+
+    python -m benchmarks.rendering --rows 1000,100000,1000000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Dict, Iterator, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from genie_integration.rendering import GENIE_RESULT_FILE_MAX_BYTES, TableRenderer  # noqa: E402
+
+COLUMNS = ["id", "name", "amount"]
+
+
+def _chunks(rows: int, chunk_rows: int) -> Iterator[List[List[str]]]:
+    # Same rows as the fake Genie's query results, one chunk in memory at a time
+    for start in range(0, rows, chunk_rows):
+        yield [[str(i), f"name {i}", f"{i * 1.5:.2f}"] for i in range(start, min(start + chunk_rows, rows))]
+
+
+def _render(rows: int, chunk_rows: int, file_max_bytes: int) -> Dict:
+    renderer = TableRenderer(COLUMNS, total_rows=rows, file_max_bytes=file_max_bytes)
+    chunks = _chunks(rows, chunk_rows)
+    started = time.perf_counter()
+    for chunk in chunks:
+        if not renderer.feed(chunk) or renderer.table_full:
+            break
+    text = renderer.render()
+    inline = time.perf_counter() - started
+    if renderer.file_content_available:
+        for chunk in chunks:
+            if not renderer.feed(chunk):
+                break
+    content = renderer.file_content()
+    return {
+        "inline_seconds": inline,
+        "total_seconds": time.perf_counter() - started,
+        "text_chars": len(text),
+        "file_bytes": len(content) if content else 0,
+        "file_rows": renderer.file_rows if content else 0
+    }
+
+
+def measure(rows: int, chunk_rows: int, file_max_bytes: int) -> Dict:
+    """
+    Render ``rows`` rows twice: once timed, once under tracemalloc.
+
+    Returns:
+        Dict: Seconds for the inline table and for the whole result, the
+        peak traced memory and the output sizes
+    """
+    result = _render(rows, chunk_rows, file_max_bytes)
+    tracemalloc.start()
+    try:
+        _render(rows, chunk_rows, file_max_bytes)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    result["peak_bytes"] = peak
+    return {"rows": rows, **result}
+
+
+def print_results(results: List[Dict]):
+    print(f"{'rows':>10} {'inline':>10} {'total':>10} {'peak memory':>12} {'csv file':>12} {'csv rows':>10}")
+    for r in results:
+        print(f"{r['rows']:>10} {r['inline_seconds'] * 1000:>8.1f}ms {r['total_seconds'] * 1000:>8.1f}ms "
+              f"{r['peak_bytes'] / 1024 / 1024:>10.1f}MB {r['file_bytes'] / 1024 / 1024:>10.1f}MB {r['file_rows']:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="100,10000,100000,1000000", help="Comma-separated result sizes")
+    parser.add_argument("--chunk-rows", type=int, default=1000, help="Rows per result chunk")
+    parser.add_argument("--file-max-bytes", type=int, default=GENIE_RESULT_FILE_MAX_BYTES,
+                        help="CSV export cap (GENIE_RESULT_FILE_MAX_BYTES)")
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = [measure(int(rows), args.chunk_rows, args.file_max_bytes) for rows in args.rows.split(",")]
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
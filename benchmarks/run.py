@@ -0,0 +1,276 @@
+"""
+Offline load test: the real app against a fake Slack, fake Genie and a
+local database.
+
+Run from the repository root, e.g.::
+
+    python -m benchmarks.run --users 20 --questions 200
+    python -m benchmarks.run --database postgres --replicas 2 --workers 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from benchmarks.fake_genie import FakeGenie, parse_statuses
+from benchmarks.fake_slack import APP_TOKEN, BOT_TOKEN, FakeSlack
+from benchmarks.traffic import TrafficDriver, parse_mix, percentile
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def app_environment(args, slack: FakeSlack, genie: FakeGenie, metrics_port: int) -> Dict[str, str]:
+    """Environment that points the app at the fakes."""
+    env = dict(os.environ)
+    for key in list(env):
+        # Ignore any real workspace the shell is configured for
+        if key.startswith("DATABRICKS_"):
+            del env[key]
+    env.update({
+        "DATABRICKS_HOST": genie.url,
+        "DATABRICKS_TOKEN": "fake-token",
+        "DATABRICKS_AUTH_TYPE": "pat",
+        "SLACK_API_URL": slack.api_url,
+        "METRICS_PORT": str(metrics_port),
+        "APP_REPLICAS": str(args.replicas),
+        "WORKER_PROCESSES": str(args.workers),
+        "PYTHONUNBUFFERED": "1",
+    })
+    if args.database == "memory":
+        # In-memory conversation tracking, tokens from the environment
+        env.update({"IS_LOCAL": "true", "TOKEN_APP": APP_TOKEN, "TOKEN_BOT": BOT_TOKEN})
+    else:
+        # Tokens come from the (fake) secret scope; PG* must name a local PostgreSQL
+        env.pop("IS_LOCAL", None)
+        missing = [var for var in ("PGHOST", "PGUSER", "PGDATABASE", "PGPASSWORD") if not env.get(var)]
+        if missing:
+            raise SystemExit(f"--database postgres needs {', '.join(missing)} for a local PostgreSQL")
+        env.setdefault("PGSSLMODE", "disable")
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return env
+
+
+async def scrape_metrics(port: int, replicas: int) -> List[str]:
+    texts = []
+    async with aiohttp.ClientSession() as session:
+        for i in range(replicas):
+            try:
+                async with session.get(f"http://127.0.0.1:{port + i}/metrics") as response:
+                    texts.append(await response.text())
+            except aiohttp.ClientError:
+                pass
+    return texts
+
+
+def _parse_metric_total(texts: List[str], name: str, labels: str = "") -> float:
+    total = 0.0
+    for text in texts:
+        for line in text.splitlines():
+            if line.startswith(name + ("{" if labels else " ")) and labels in line:
+                total += float(line.rsplit(" ", 1)[1])
+    return total
+
+
+def stage_summary(texts: List[str]) -> Dict[str, Dict]:
+    """Mean seconds and count per stage from genie_slack_stage_seconds."""
+    sums: Dict[str, float] = {}
+    counts: Dict[str, float] = {}
+    for text in texts:
+        for line in text.splitlines():
+            for suffix, target in (("_sum", sums), ("_count", counts)):
+                prefix = f"genie_slack_stage_seconds{suffix}{{"
+                if line.startswith(prefix):
+                    labels, value = line[len(prefix):].rsplit("} ", 1)
+                    stage = dict(part.split("=", 1) for part in labels.split(","))["stage"].strip('"')
+                    target[stage] = target.get(stage, 0.0) + float(value)
+    return {
+        stage: {"count": int(counts[stage]), "mean_seconds": round(sums.get(stage, 0.0) / counts[stage], 4)}
+        for stage in sorted(counts) if counts[stage]
+    }
+
+
+async def run(args) -> Dict:
+    slack = FakeSlack(latency=args.slack_latency)
+    genie = FakeGenie(
+        latency=args.genie_latency,
+        jitter=args.genie_jitter,
+        statuses=parse_statuses(args.statuses),
+        fail_ratio=args.fail_ratio,
+        rows=args.rows,
+        chunk_rows=args.chunk_rows,
+        spaces=args.spaces,
+        seed=args.seed
+    )
+    await slack.start()
+    await genie.start()
+    metrics_port = _free_port()
+    env = app_environment(args, slack, genie, metrics_port)
+
+    log = open(args.app_log, "w")
+    launched = time.monotonic()
+    process = subprocess.Popen([sys.executable, "main.py"], cwd=SRC_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    report: Dict = {"config": {k: v for k, v in vars(args).items() if k != "env"}, "env_overrides": args.env}
+    try:
+        await slack.wait_for_connections(args.replicas, args.startup_timeout)
+        report["startup"] = {
+            "first_connection_seconds": round(slack.first_connected - launched, 3),
+            "all_connections_seconds": round(time.monotonic() - launched, 3)
+        }
+        print(f"App connected after {report['startup']['all_connections_seconds']:.2f}s; starting traffic")
+
+        driver = TrafficDriver(
+            slack,
+            spaces=[f"space-{i}" for i in range(args.spaces)],
+            users=args.users,
+            mix=parse_mix(args.mix),
+            questions=args.questions,
+            duration=args.duration,
+            think_time=args.think_time,
+            answer_timeout=args.answer_timeout,
+            repeat_ratio=args.repeat_ratio,
+            redeliver_ratio=args.redeliver_ratio,
+            burst_ratio=args.burst_ratio,
+            seed=args.seed
+        )
+        await driver.run()
+        report.update(driver.summary())
+        # Let debounced feedback go out before counting Genie calls
+        await asyncio.sleep(args.settle)
+        metrics = await scrape_metrics(metrics_port, args.replicas)
+        if args.save_metrics and metrics:
+            with open(args.save_metrics, "w") as f:
+                f.write("\n".join(metrics))
+        report["stages"] = stage_summary(metrics)
+        report["app_event_loop_lag_seconds_sum"] = _parse_metric_total(metrics, "genie_slack_event_loop_lag_seconds_sum")
+    finally:
+        if process.poll() is None:
+            process.send_signal(signal.SIGTERM)
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        log.close()
+        await slack.stop()
+        await genie.stop()
+
+    answered = max(1, report.get("answered", 0))
+    report["ack_latency_seconds"] = {
+        "p50": percentile(slack.ack_latencies, 50),
+        "p99": percentile(slack.ack_latencies, 99),
+        "acked": slack.acks
+    }
+    report["slack_api_calls"] = dict(slack.calls.most_common())
+    report["genie_api_calls"] = dict(genie.calls.most_common())
+    report["calls_per_answer"] = {
+        "slack": round(sum(slack.calls.values()) / answered, 2),
+        "genie_get_message": round(genie.calls["get_message"] / answered, 2)
+    }
+    report["conversation_overlaps"] = genie.overlaps
+    report["socket_connections_opened"] = slack.connections_opened
+    report["app_exit_code"] = process.returncode
+    return report
+
+
+def print_report(report: Dict):
+    latency = report.get("latency_seconds", {})
+
+    def ms(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value * 1000:.0f}ms"
+
+    print()
+    print(f"Questions: {report.get('questions', 0)} asked, {report.get('answered', 0)} answered "
+          f"in {report.get('elapsed_seconds', 0):.1f}s ({report.get('throughput_per_second', 0):.2f}/s)")
+    print(f"Latency:   p50 {ms(latency.get('p50'))}  p95 {ms(latency.get('p95'))}  "
+          f"p99 {ms(latency.get('p99'))}  max {ms(latency.get('max'))}")
+    ack = report.get("ack_latency_seconds", {})
+    print(f"Acks:      {ack.get('acked', 0)} envelopes, p50 {ms(ack.get('p50'))}  p99 {ms(ack.get('p99'))}")
+    if "startup" in report:
+        print(f"Startup:   connected after {report['startup']['all_connections_seconds']:.2f}s")
+    print(f"Outcomes:  {report.get('outcomes', {})}")
+    print(f"Events:    {report.get('events', {})}")
+    print(f"Slack API: {report['slack_api_calls']}")
+    print(f"Genie API: {report['genie_api_calls']}")
+    print(f"Per answer: {report['calls_per_answer']}")
+    print(f"Overlaps:  {report['conversation_overlaps']} Genie messages sent while their thread had one in progress")
+    stages = report.get("stages") or {}
+    if stages:
+        print("Stages (mean):")
+        for stage, values in stages.items():
+            print(f"  {stage:<22} {values['mean_seconds'] * 1000:8.1f}ms  x{values['count']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    traffic = parser.add_argument_group("traffic")
+    traffic.add_argument("--users", type=int, default=10, help="Concurrent simulated users")
+    traffic.add_argument("--questions", type=int, default=100, help="Questions to ask in total")
+    traffic.add_argument("--duration", type=float, help="Run for this many seconds instead of --questions")
+    traffic.add_argument("--mix", default="new:1,followup:2,reaction:1",
+                         help="Weights of a user's next action after an answer")
+    traffic.add_argument("--think-time", type=float, default=0.5, help="Mean seconds a user pauses between actions")
+    traffic.add_argument("--repeat-ratio", type=float, default=0.0,
+                         help="Fraction of first questions drawn from a small shared pool")
+    traffic.add_argument("--redeliver-ratio", type=float, default=0.0,
+                         help="Fraction of question events Slack delivers twice")
+    traffic.add_argument("--burst-ratio", type=float, default=0.0,
+                         help="Fraction of follow-ups sent as two messages at once (tests thread ownership)")
+    traffic.add_argument("--answer-timeout", type=float, default=180.0)
+    traffic.add_argument("--seed", type=int)
+
+    fakes = parser.add_argument_group("fake services")
+    fakes.add_argument("--genie-latency", type=float, default=0.05, help="Seconds per Genie API call")
+    fakes.add_argument("--genie-jitter", type=float, default=0.02)
+    fakes.add_argument("--statuses", default="SUBMITTED:0.3,ASKING_AI:1,EXECUTING_QUERY:1",
+                       help="Status sequence of every Genie message, STATUS:seconds,...")
+    fakes.add_argument("--fail-ratio", type=float, default=0.0, help="Fraction of Genie messages that fail")
+    fakes.add_argument("--rows", type=int, default=20, help="Rows per query result (0 for text-only answers)")
+    fakes.add_argument("--chunk-rows", type=int, default=1000, help="Rows per result chunk")
+    fakes.add_argument("--spaces", type=int, default=3, help="Genie rooms")
+    fakes.add_argument("--slack-latency", type=float, default=0.0, help="Seconds per Slack Web API call")
+
+    app = parser.add_argument_group("app")
+    app.add_argument("--database", choices=["memory", "postgres"], default="memory",
+                     help="memory: IS_LOCAL in-process tracking; postgres: a local PostgreSQL from PG* variables")
+    app.add_argument("--replicas", type=int, default=1, help="APP_REPLICAS (postgres only)")
+    app.add_argument("--workers", type=int, default=0, help="WORKER_PROCESSES (postgres only)")
+    app.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra app environment")
+    app.add_argument("--startup-timeout", type=float, default=120.0)
+    app.add_argument("--settle", type=float, default=3.0, help="Seconds to wait for feedback before stopping")
+    app.add_argument("--app-log", default="benchmark-app.log", help="Where the app's output goes")
+
+    output = parser.add_argument_group("output")
+    output.add_argument("--output", help="Write the report as JSON")
+    output.add_argument("--save-metrics", help="Write the app's /metrics at the end of the run")
+    args = parser.parse_args(argv)
+
+    if args.database == "memory" and (args.replicas > 1 or args.workers > 0):
+        parser.error("--replicas and --workers need --database postgres")
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if report["conversation_overlaps"]:
+        # More than one replica handled a thread at the same time
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""Simulated Slack users driving the app through the fake Socket Mode server."""
+import asyncio
+import random
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+from benchmarks.fake_slack import FakeSlack
+
+# First questions drawn from this pool repeat across threads, so the answer
+# cache and in-flight coalescing get hits (see --repeat-ratio)
+COMMON_QUESTIONS = [
+    "What were total sales last month?",
+    "How many active customers do we have?",
+    "Which region grew fastest this quarter?",
+    "What is the average order value this week?",
+]
+
+ANSWER_MARKER = "FAKE_ANSWER"
+CACHED_MARKER = "_Cached answer as of"
+FEEDBACK_REACTIONS = ["+1", "-1", "thumbsup", "thumbsdown"]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse "new:1,followup:2,reaction:1" into action weights."""
+    mix = {"new": 0.0, "followup": 0.0, "reaction": 0.0}
+    for part in spec.split(","):
+        action, _, weight = part.strip().partition(":")
+        if action not in mix:
+            raise ValueError(f"Unknown traffic action {action!r}; use new, followup or reaction")
+        mix[action] = float(weight or 1)
+    return mix
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _is_progress(text: str) -> bool:
+    # "Genie is thinking...", "Genie is running the query...\n```sql```", queue position
+    first_line = text.split("\n", 1)[0]
+    return first_line.startswith("Genie is") and first_line.endswith("...")
+
+
+class _Thread:
+    def __init__(self, channel: str, thread_ts: str, user_id: str, space_id: str):
+        self.channel = channel
+        self.thread_ts = thread_ts
+        self.user_id = user_id
+        self.space_id = space_id
+        self.questions = 0
+        self.answer_ts: Optional[str] = None
+        self.reacted = False
+
+
+class TrafficDriver:
+    """
+    Runs ``users`` simulated users, each in a closed loop: after an answer
+    (or a reaction) a user thinks for about ``think_time`` seconds and then
+    starts a new thread, asks a follow-up in the current one or reacts to the
+    last answer, weighted by ``mix``. A new thread is opened like a real one:
+    the assistant thread starts, the user waits for the room picker, picks a
+    Genie room, then asks.
+
+    A question's latency runs from sending its message envelope to the
+    thread's final reply (a post or edit that is not a "Genie is ..."
+    progress text). With ``burst_ratio`` some follow-ups are sent as two
+    messages back to back, so with several replicas both are usually
+    delivered to different ones while the first is still being answered;
+    replies in a thread are matched to its questions in order.
+
+    Attributes:
+        slack: The fake Slack the app is connected to
+        spaces: Genie space IDs to pick rooms from
+        stats: Counts of sent events and answer outcomes
+        latencies: End-to-end seconds of answered questions
+    """
+
+    def __init__(
+        self,
+        slack: FakeSlack,
+        spaces: List[str],
+        users: int = 10,
+        mix: Optional[Dict[str, float]] = None,
+        questions: int = 100,
+        duration: Optional[float] = None,
+        think_time: float = 0.5,
+        answer_timeout: float = 180.0,
+        repeat_ratio: float = 0.0,
+        redeliver_ratio: float = 0.0,
+        burst_ratio: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.slack = slack
+        self.spaces = spaces
+        self.users = users
+        self.mix = mix or {"new": 1.0, "followup": 2.0, "reaction": 1.0}
+        self.questions = questions
+        self.duration = duration
+        self.think_time = think_time
+        self.answer_timeout = answer_timeout
+        self.repeat_ratio = repeat_ratio
+        self.redeliver_ratio = redeliver_ratio
+        self.burst_ratio = burst_ratio
+        self.stats: Counter = Counter()
+        self.outcomes: Counter = Counter()
+        self.latencies: List[float] = []
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._random = random.Random(seed)
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._asked = 0
+        slack.on_message = self._on_message
+
+    # ==================== Replies ====================
+
+    def _on_message(self, thread_ts: Optional[str], ts: str, text: str):
+        if thread_ts is None:
+            return  # top-level "thinking" message when progressive updates are off
+        if _is_progress(text):
+            self.stats["progress_updates"] += 1
+            return
+        future = next((f for f in self._pending.get(thread_ts, []) if not f.done()), None)
+        if future is None:
+            if ANSWER_MARKER in text:
+                # A second answer to the same question, e.g. a redelivered event handled twice
+                self.stats["unexpected_replies"] += 1
+            return
+        future.set_result((ts, text))
+
+    def _expect_reply(self, thread_ts: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(thread_ts, []).append(future)
+        return future
+
+    def _forget_reply(self, thread_ts: str, future: asyncio.Future):
+        pending = self._pending.get(thread_ts, [])
+        if future in pending:
+            pending.remove(future)
+        if not pending:
+            self._pending.pop(thread_ts, None)
+
+    # ==================== Users ====================
+
+    def _more(self) -> bool:
+        if self.duration is not None:
+            return time.monotonic() - self.started < self.duration
+        return self._asked < self.questions
+
+    def _think(self) -> float:
+        return self._random.uniform(0, 2 * self.think_time)
+
+    async def run(self):
+        self.started = time.monotonic()
+        await asyncio.gather(*(self._user(i) for i in range(self.users)))
+        self.finished = time.monotonic()
+
+    async def _user(self, index: int):
+        user_id = f"U{index:05d}"
+        channel = f"D{index:05d}"
+        thread: Optional[_Thread] = None
+        while self._more():
+            action = "new"
+            if thread is not None:
+                weights = dict(self.mix)
+                if thread.answer_ts is None or thread.reacted:
+                    weights["reaction"] = 0
+                if sum(weights.values()) > 0:
+                    action = self._random.choices(list(weights), weights=list(weights.values()))[0]
+            if action == "new":
+                thread = await self._new_thread(channel, user_id)
+                await self._ask(thread)
+            elif action == "followup":
+                if self._random.random() < self.burst_ratio:
+                    self.stats["bursts"] += 1
+                    await asyncio.gather(self._ask(thread), self._ask(thread))
+                else:
+                    await self._ask(thread)
+            else:
+                await self._react(thread)
+            await asyncio.sleep(self._think())
+
+    async def _new_thread(self, channel: str, user_id: str) -> _Thread:
+        thread = _Thread(channel, self.slack.next_ts(), user_id, self._random.choice(self.spaces))
+        self.stats["threads"] += 1
+        picker = self._expect_reply(thread.thread_ts)
+        await self.slack.send("events_api", self.slack.event_payload({
+            "type": "assistant_thread_started",
+            "assistant_thread": {"user_id": user_id, "channel_id": channel, "thread_ts": thread.thread_ts, "context": {}},
+            "event_ts": self.slack.next_ts()
+        }))
+        # A user can only pick a room once the picker is shown
+        try:
+            await asyncio.wait_for(picker, self.answer_timeout)
+        except asyncio.TimeoutError:
+            self.stats["no_room_picker"] += 1
+        finally:
+            self._forget_reply(thread.thread_ts, picker)
+        await asyncio.sleep(self._think())
+        # The user picks a room in the picker the app posted
+        await self.slack.send("interactive", {
+            "type": "block_actions",
+            "team": {"id": "T0BENCH"},
+            "user": {"id": user_id},
+            "api_app_id": "A0BENCH",
+            "trigger_id": uuid.uuid4().hex,
+            "container": {"type": "message", "channel_id": channel, "is_ephemeral": False},
+            "channel": {"id": channel},
+            "message": {"ts": self.slack.next_ts(), "thread_ts": thread.thread_ts, "text": "Select a Genie room"},
+            "actions": [{
+                "action_id": "genie_room_select",
+                "block_id": "genie_room",
+                "type": "external_select",
+                "selected_option": {"text": {"type": "plain_text", "text": thread.space_id}, "value": thread.space_id},
+                "action_ts": self.slack.next_ts()
+            }]
+        })
+        await asyncio.sleep(self._think())
+        return thread
+
+    def _question(self, thread: _Thread) -> str:
+        if thread.questions == 0 and self._random.random() < self.repeat_ratio:
+            return self._random.choice(COMMON_QUESTIONS)
+        # The thread tag lets the fake Genie tell which thread a message came from
+        return f"Bench question {self._asked} from {thread.user_id} [thread {thread.thread_ts}]: how are the numbers looking?"
+
+    async def _ask(self, thread: _Thread):
+        text = self._question(thread)
+        self._asked += 1
+        thread.questions += 1
+        self.stats["first_questions" if thread.questions == 1 else "followups"] += 1
+        event = {
+            "type": "message",
+            "channel": thread.channel,
+            "channel_type": "im",
+            "user": thread.user_id,
+            "text": text,
+            "ts": self.slack.next_ts(),
+            "thread_ts": thread.thread_ts,
+            "client_msg_id": str(uuid.uuid4()),
+            "event_ts": self.slack.next_ts(),
+            "blocks": [{"type": "rich_text", "block_id": "q", "elements": [
+                {"type": "rich_text_section", "elements": [{"type": "text", "text": text}]}
+            ]}]
+        }
+        payload = self.slack.event_payload(event)
+        future = self._expect_reply(thread.thread_ts)
+        started = time.monotonic()
+        await self.slack.send("events_api", payload)
+        if self._random.random() < self.redeliver_ratio:
+            # Slack retrying an event it thinks was not acked in time
+            self.stats["redeliveries"] += 1
+            await self.slack.send("events_api", payload, retry_attempt=1)
+        try:
+            ts, reply = await asyncio.wait_for(future, self.answer_timeout)
+        except asyncio.TimeoutError:
+            self.outcomes["no reply"] += 1
+            return
+        finally:
+            self._forget_reply(thread.thread_ts, future)
+        if ANSWER_MARKER in reply:
+            self.latencies.append(time.monotonic() - started)
+            self.outcomes["answered from cache" if CACHED_MARKER in reply else "answered"] += 1
+            thread.answer_ts = ts
+            thread.reacted = False
+        else:
+            self.outcomes[reply.split("\n", 1)[0][:60]] += 1
+
+    async def _react(self, thread: _Thread):
+        thread.reacted = True
+        reaction = self._random.choice(FEEDBACK_REACTIONS)
+        item = {"type": "message", "channel": thread.channel, "ts": thread.answer_ts}
+        await self._reaction_event("reaction_added", thread, reaction, item)
+        if self._random.random() < 0.3:
+            # Change of mind right away; the app should send only the final rating
+            await asyncio.sleep(0.1)
+            await self._reaction_event("reaction_removed", thread, reaction, item)
+
+    async def _reaction_event(self, event_type: str, thread: _Thread, reaction: str, item: Dict):
+        self.stats[event_type] += 1
+        await self.slack.send("events_api", self.slack.event_payload({
+            "type": event_type,
+            "user": thread.user_id,
+            "reaction": reaction,
+            "item": item,
+            "item_user": "U0BOT",
+            "event_ts": self.slack.next_ts()
+        }))
+
+    # ==================== Report ====================
+
+    def summary(self) -> Dict:
+        elapsed = (self.finished or time.monotonic()) - self.started
+        answered = len(self.latencies)
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "questions": self._asked,
+            "answered": answered,
+            "throughput_per_second": round(answered / elapsed, 3) if elapsed > 0 else 0.0,
+            "latency_seconds": {
+                "p50": percentile(self.latencies, 50),
+                "p95": percentile(self.latencies, 95),
+                "p99": percentile(self.latencies, 99),
+                "max": max(self.latencies) if self.latencies else None
+            },
+            "outcomes": dict(self.outcomes),
+            "events": dict(self.stats)
+        }
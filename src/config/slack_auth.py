@@ -1,13 +1,29 @@
+import asyncio
 import os
-from databricks.sdk import WorkspaceClient
+from config.workspace import get_workspace_client
 
-w = WorkspaceClient()
+SECRET_SCOPE = 'genie-slack-secret-scope'
 
 def get_slack_auth():
     if os.environ.get("IS_LOCAL") == 'true': # For local dev
         token_app = os.environ["TOKEN_APP"]
         token_bot = os.environ["TOKEN_BOT"]
     else:
-        token_app = w.dbutils.secrets.get(scope='genie-slack-secret-scope', key='token_app')
-        token_bot = w.dbutils.secrets.get(scope='genie-slack-secret-scope', key='token_bot')
-    return token_app, token_bot
\ No newline at end of file
+        w = get_workspace_client()
+        token_app = w.dbutils.secrets.get(scope=SECRET_SCOPE, key='token_app')
+        token_bot = w.dbutils.secrets.get(scope=SECRET_SCOPE, key='token_bot')
+    return token_app, token_bot
+
+async def async_get_slack_auth():
+    """Like get_slack_auth, but fetches both secrets concurrently off the event loop."""
+    if os.environ.get("IS_LOCAL") == 'true':
+        return get_slack_auth()
+
+    def get_secret(key):
+        return get_workspace_client().dbutils.secrets.get(scope=SECRET_SCOPE, key=key)
+
+    token_app, token_bot = await asyncio.gather(
+        asyncio.to_thread(get_secret, 'token_app'),
+        asyncio.to_thread(get_secret, 'token_bot')
+    )
+    return token_app, token_bot
@@ -0,0 +1,52 @@
+"""The Databricks WorkspaceClient shared by the whole app, created on first use."""
+import threading
+from typing import Optional
+
+from databricks.sdk import WorkspaceClient
+
+_client: Optional[WorkspaceClient] = None
+_lock = threading.Lock()
+
+
+def get_workspace_client() -> WorkspaceClient:
+    """
+    Get the app's WorkspaceClient, creating it on the first call.
+
+    Creating the client resolves authentication, which can take network
+    round trips, so it happens when something first needs the workspace
+    rather than at import. Thread-safe: concurrent first calls (e.g. the
+    secret fetches and the Lakebase token at startup) share one client.
+
+    Returns:
+        WorkspaceClient: The shared client
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = WorkspaceClient()
+    return _client
+
+
+class LazyService:
+    """
+    Stand-in for a WorkspaceClient service such as ``w.genie``.
+
+    ``service.method`` returns a function that looks the real method up when
+    it is called, so bound methods can be handed to an executor (e.g.
+    ``run_genie(genie.get_message, ...)``) without creating the client on
+    the event loop.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr: str):
+        name = self._name
+
+        def call(*args, **kwargs):
+            return getattr(getattr(get_workspace_client(), name), attr)(*args, **kwargs)
+
+        call.__name__ = attr
+        call.__qualname__ = f"{name}.{attr}"
+        return call
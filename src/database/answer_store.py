@@ -0,0 +1,87 @@
+"""Lakebase storage for the Genie answer cache."""
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from database.connection import get_async_session
+from database.models import AnswerCacheEntry
+
+
+async def async_get_answer(space_id: str, question_key: str, max_age: float) -> Optional[Dict]:
+    """
+    Get a cached answer no older than ``max_age`` seconds.
+
+    The age is computed by the database, so app and database clocks do not
+    need to agree.
+
+    Args:
+        space_id: Genie space/room ID
+        question_key: Normalized question text
+        max_age: Maximum age in seconds
+
+    Returns:
+        Dict with text, sql, conversation_id, message_id and cached_at
+        (epoch seconds), or None if there is no fresh entry
+    """
+    age = func.extract("epoch", func.current_timestamp() - AnswerCacheEntry.created_at)
+    session = get_async_session()
+    try:
+        result = await session.execute(
+            select(AnswerCacheEntry, age)
+            .filter_by(space_id=space_id, question_key=question_key)
+            .where(age <= max_age)
+        )
+        row = result.first()
+        if not row:
+            return None
+        entry, entry_age = row
+        record = entry.to_dict()
+        record["cached_at"] = time.time() - float(entry_age)
+        return record
+    except SQLAlchemyError as e:
+        print(f"Error getting cached answer: {e}")
+        return None
+    finally:
+        await session.close()
+
+
+async def async_set_answer(space_id: str, question_key: str, record: Dict):
+    """
+    Store (or replace) a cached answer.
+
+    Args:
+        space_id: Genie space/room ID
+        question_key: Normalized question text
+        record: Dict with text, sql, conversation_id and message_id
+    """
+    stmt = pg_insert(AnswerCacheEntry).values(
+        space_id=space_id,
+        question_key=question_key,
+        text=record["text"],
+        sql=record.get("sql"),
+        conversation_id=record["conversation_id"],
+        message_id=record["message_id"]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AnswerCacheEntry.space_id, AnswerCacheEntry.question_key],
+        set_={
+            "text": stmt.excluded.text,
+            "sql": stmt.excluded.sql,
+            "conversation_id": stmt.excluded.conversation_id,
+            "message_id": stmt.excluded.message_id,
+            "created_at": func.current_timestamp()
+        }
+    )
+    session = get_async_session()
+    try:
+        await session.execute(stmt)
+        await session.commit()
+    except SQLAlchemyError as e:
+        # The cache is best effort; a failed write only costs a future miss
+        print(f"Error caching answer: {e}")
+        await session.rollback()
+    finally:
+        await session.close()
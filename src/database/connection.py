@@ -1,17 +1,31 @@
 """Database connection management for Databricks Lakebase."""
 import os
+from typing import Dict
 from urllib.parse import quote_plus
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker, Session
-from databricks.sdk import WorkspaceClient
+from config.workspace import get_workspace_client
+from database.token_provider import OAuthTokenCache
 
-# Global workspace client and session maker
-w = WorkspaceClient()
+# Token cache and session makers
+_token_cache = OAuthTokenCache(lambda: get_workspace_client().config.oauth_token())
 _engine = None
 _SessionLocal = None
+_async_engine = None
+_AsyncSessionLocal = None
 
+# Connection pool sizing, shared by the sync and async engines
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
 
-def get_lakebase_connection_string():
+# A fixed password replaces the OAuth token, e.g. for a local PostgreSQL
+# used in development or by the load-test harness
+PGPASSWORD = os.getenv("PGPASSWORD")
+
+
+def get_lakebase_connection_string(driver: str = "postgresql"):
     """
     Get the Databricks Lakebase PostgreSQL connection string.
     
@@ -22,7 +36,13 @@ def get_lakebase_connection_string():
     - PGPORT: Database port (default: 5432)
     - PGSSLMODE: SSL mode (default: require)
     
-    The OAuth token is retrieved from the Databricks SDK and used as the password.
+    The connection string carries no password. The OAuth token from the
+    Databricks SDK is supplied as the password for each new physical
+    connection by the engine's ``do_connect`` hook, so pooled connections keep
+    working after a token rotates without rebuilding the engine.
+    
+    Args:
+        driver: SQLAlchemy dialect+driver prefix, e.g. "postgresql+psycopg" for async use
     
     Returns:
         str: SQLAlchemy connection string for Lakebase (PostgreSQL)
@@ -49,19 +69,30 @@ def get_lakebase_connection_string():
             "or manually set for local development."
         )
     
-    # Get OAuth token from Databricks SDK
-    token = w.config.oauth_token().access_token
-    
-    # URL encode the username and token in case they contain special characters
+    # URL encode the username in case it contains special characters
     username_encoded = quote_plus(username)
-    token_encoded = quote_plus(token)
     
-    # Construct the PostgreSQL connection string with OAuth token as password
-    connection_string = f"postgresql://{username_encoded}:{token_encoded}@{host}:{port}/{database}?sslmode={sslmode}"
+    # Construct the PostgreSQL connection string; the password is set per connection
+    connection_string = f"{driver}://{username_encoded}@{host}:{port}/{database}?sslmode={sslmode}"
 
     return connection_string
 
 
+def _use_oauth_token(engine):
+    """
+    Supply a fresh OAuth token as the password for every new connection.
+    
+    Args:
+        engine: Sync engine (or ``AsyncEngine.sync_engine``) to attach to
+    """
+    @event.listens_for(engine, "do_connect")
+    def provide_token(dialect, conn_rec, cargs, cparams):
+        cparams["password"] = PGPASSWORD or _token_cache.get_token()
+    
+    if not PGPASSWORD:
+        _token_cache.start_background_refresh()
+
+
 def init_engine():
     """Initialize the SQLAlchemy engine for Lakebase."""
     global _engine, _SessionLocal
@@ -74,7 +105,11 @@ def init_engine():
             future=True,
             pool_pre_ping=True,  # Verify connections before using them
             pool_recycle=3600,  # Recycle connections after 1 hour
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
         )
+        _use_oauth_token(_engine)
         _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
     
     return _engine
@@ -104,3 +139,80 @@ def get_engine():
         init_engine()
     
     return _engine
+
+
+def init_async_engine():
+    """Initialize the async SQLAlchemy engine (psycopg 3) for Lakebase."""
+    global _async_engine, _AsyncSessionLocal
+    
+    if _async_engine is None:
+        connection_string = get_lakebase_connection_string(driver="postgresql+psycopg")
+        _async_engine = create_async_engine(
+            connection_string,
+            echo=False,  # Set to True for SQL debugging
+            pool_pre_ping=True,  # Verify connections before using them
+            pool_recycle=3600,  # Recycle connections after 1 hour
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+        _use_oauth_token(_async_engine.sync_engine)
+        _AsyncSessionLocal = async_sessionmaker(
+            bind=_async_engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    
+    return _async_engine
+
+
+def get_async_session() -> AsyncSession:
+    """
+    Get an async database session.
+    
+    Returns:
+        AsyncSession: SQLAlchemy async session
+    """
+    if _AsyncSessionLocal is None:
+        init_async_engine()
+    
+    return _AsyncSessionLocal()
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Get the async SQLAlchemy engine.
+    
+    Returns:
+        AsyncEngine: SQLAlchemy async engine
+    """
+    if _async_engine is None:
+        init_async_engine()
+    
+    return _async_engine
+
+
+def _pool_stats(pool) -> Dict[str, int]:
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(0, pool.overflow()),
+        "max_overflow": DB_MAX_OVERFLOW
+    }
+
+
+def get_pool_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Get connection pool usage of the engines created so far.
+    
+    Returns:
+        Dict of "sync"/"async" -> size, checked_in, checked_out, overflow
+        and max_overflow
+    """
+    stats = {}
+    if _engine is not None:
+        stats["sync"] = _pool_stats(_engine.pool)
+    if _async_engine is not None:
+        stats["async"] = _pool_stats(_async_engine.sync_engine.pool)
+    return stats
@@ -1,10 +1,23 @@
 """Conversation tracker operations - handles both in-memory and database storage."""
+import hashlib
 import os
-from typing import Optional, Dict
-from sqlalchemy import text
-from sqlalchemy.exc import SQLAlchemyError
-from database.connection import get_session, get_engine
-from database.models import Base, ConversationTracker, MessageTracker, SCHEMA_NAME
+import threading
+from datetime import timedelta
+from typing import Optional, Dict, List
+from cachetools import TTLCache
+from sqlalchemy import delete, func, inspect, select, text, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import ProgrammingError, SQLAlchemyError
+from sqlalchemy.schema import CreateIndex, CreateTable
+from database.connection import get_session, get_engine, get_async_session
+from database.models import Base, ConversationTracker, MessageTracker, SchemaVersion, SCHEMA_NAME
+from database.write_behind import WriteBehindBuffer
+from database.retention import (
+    MESSAGE_TRACKER_PARTITIONED,
+    create_partitioned_message_table,
+    ensure_message_partitions
+)
 
 
 # In-memory trackers for local development
@@ -17,6 +30,97 @@ def is_local_mode():
     return os.environ.get("IS_LOCAL") == 'true'
 
 
+class TrackerCache:
+    """
+    Bounded, thread-safe LRU cache with a TTL in front of a tracker table.
+    
+    Writes go through to the database first and then update the cache, and
+    deletes invalidate it, so a hot thread is served without a DB round trip.
+    Values are copied in and out so callers cannot mutate cached entries.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl) if maxsize > 0 else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key) -> Optional[Dict]:
+        if self._cache is None:
+            return None
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(value)
+    
+    def set(self, key, value: Dict):
+        if self._cache is None:
+            return
+        with self._lock:
+            self._cache[key] = dict(value)
+    
+    def invalidate(self, key):
+        if self._cache is None:
+            return
+        with self._lock:
+            self._cache.pop(key, None)
+    
+    def clear(self):
+        if self._cache is None:
+            return
+        with self._lock:
+            self._cache.clear()
+    
+    def stats(self) -> Dict:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dict with size, hits, misses and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._cache) if self._cache is not None else 0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+# Caches in front of the Lakebase tables (unused in local mode)
+TRACKER_CACHE_SIZE = int(os.environ.get("TRACKER_CACHE_SIZE", "10000"))
+TRACKER_CACHE_TTL = float(os.environ.get("TRACKER_CACHE_TTL", "3600"))
+_conversation_cache = TrackerCache(TRACKER_CACHE_SIZE, TRACKER_CACHE_TTL)
+_message_cache = TrackerCache(TRACKER_CACHE_SIZE, TRACKER_CACHE_TTL)
+
+
+def get_cache_stats() -> Dict:
+    """
+    Get hit-rate statistics for the tracker caches.
+    
+    Returns:
+        Dict with "conversation" and "message" cache stats
+    """
+    return {
+        "conversation": _conversation_cache.stats(),
+        "message": _message_cache.stats()
+    }
+
+
+def invalidate_cached_conversation(thread_ts: str):
+    """
+    Drop a thread's cached conversation so the next read goes to Lakebase.
+
+    Used in multi-replica mode, where another replica may have updated the
+    thread since it was cached here.
+    """
+    _conversation_cache.invalidate(thread_ts)
+
+
 def init_database():
     """Initialize the database schema and tables. Only called in non-local mode."""
     if not is_local_mode():
@@ -29,14 +133,266 @@ def init_database():
                 conn.commit()
                 print(f"Schema '{SCHEMA_NAME}' ensured to exist")
             
+            # Optionally create message_tracker partitioned before create_all
+            if MESSAGE_TRACKER_PARTITIONED:
+                with engine.begin() as conn:
+                    if create_partitioned_message_table(conn):
+                        ensure_message_partitions(conn)
+            
             # Create all tables in the schema
             Base.metadata.create_all(bind=engine)
+            
+            # create_all skips existing tables, so add nullable columns and
+            # indexes introduced later
+            _add_missing_columns(engine)
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(bind=engine, checkfirst=True)
             print(f"Database tables initialized successfully in schema '{SCHEMA_NAME}'")
         except Exception as e:
             print(f"Error initializing database: {e}")
             raise
 
 
+def _add_missing_columns(engine):
+    """Add nullable model columns that existing tables do not have yet."""
+    dialect = postgresql.dialect()
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name, schema=table.schema):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name, schema=table.schema)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    conn.execute(text(
+                        f"ALTER TABLE {table.fullname} ADD COLUMN {column.name} {column.type.compile(dialect=dialect)}"
+                    ))
+                    print(f"Added column {column.name} to {table.fullname}")
+
+
+# pg_advisory_lock key held while initializing the schema
+SCHEMA_LOCK_KEY = 0x67656E6965
+
+
+def schema_version() -> str:
+    """
+    Fingerprint of the schema the models describe.
+    
+    Hashes the PostgreSQL DDL of every table and index (and whether
+    message_tracker is partitioned), so any model change yields a new version.
+    
+    Returns:
+        str: Short hex digest
+    """
+    dialect = postgresql.dialect()
+    ddl = [f"message_tracker_partitioned={MESSAGE_TRACKER_PARTITIONED}"]
+    for table in Base.metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=dialect)))
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            ddl.append(str(CreateIndex(index).compile(dialect=dialect)))
+    return hashlib.sha256("\n".join(ddl).encode()).hexdigest()[:16]
+
+
+def _has_schema_version(engine, version: str) -> bool:
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                select(SchemaVersion.version).where(SchemaVersion.version == version)
+            ).first() is not None
+    except ProgrammingError:
+        return False  # no schema_version table yet
+
+
+def ensure_schema() -> str:
+    """
+    Initialize the database schema unless it is already at the current version.
+    
+    Checking is a single query; a restart with unchanged models skips the DDL
+    of ``init_database`` (schema, tables, indexes) entirely. Blocking: run it
+    in a thread from async code.
+    
+    Returns:
+        str: "local" in local mode, "current" if the schema was up to date,
+        or "initialized" if the DDL ran
+    """
+    if is_local_mode():
+        return "local"
+    version = schema_version()
+    engine = get_engine()
+    if _has_schema_version(engine, version):
+        return "current"
+    # Replicas starting together take turns; the DDL is idempotent, but
+    # concurrent CREATEs of the same object fail
+    with engine.connect() as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        try:
+            if _has_schema_version(engine, version):
+                return "current"  # another replica just initialized it
+            init_database()
+            with engine.begin() as conn:
+                conn.execute(pg_insert(SchemaVersion).values(version=version).on_conflict_do_nothing())
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEMA_LOCK_KEY})
+            lock_conn.commit()
+    return "initialized"
+
+
+# ==================== Statement Builders ====================
+# Writes are single PostgreSQL statements (INSERT ... ON CONFLICT, UPDATE/DELETE
+# ... WHERE) so each is one round trip and concurrent writes for the same key
+# cannot race. They are shared by the sync and async APIs.
+
+_CONVERSATION_COLUMNS = (
+    ConversationTracker.conversation_id,
+    ConversationTracker.genie_room_id,
+    ConversationTracker.genie_room_name,
+    ConversationTracker.seed_question,
+)
+
+
+def _upsert_conversation_stmt(thread_ts: str, room_details: Dict):
+    """Build an upsert for a thread that returns the stored conversation row."""
+    stmt = pg_insert(ConversationTracker).values(
+        thread_ts=thread_ts,
+        genie_room_id=room_details["genie_room_id"],
+        genie_room_name=room_details["genie_room_name"],
+        conversation_id=room_details.get("conversation_id")
+    )
+    update_values = {
+        "genie_room_id": stmt.excluded.genie_room_id,
+        "genie_room_name": stmt.excluded.genie_room_name,
+        "updated_at": func.current_timestamp()
+    }
+    # Keep an existing conversation_id unless the caller sets one explicitly
+    if "conversation_id" in room_details:
+        update_values["conversation_id"] = stmt.excluded.conversation_id
+    return stmt.on_conflict_do_update(
+        index_elements=[ConversationTracker.thread_ts],
+        set_=update_values
+    ).returning(*_CONVERSATION_COLUMNS)
+
+
+def _update_conversation_id_stmt(thread_ts: str, conversation_id: str):
+    """Build an UPDATE of a thread's conversation_id that returns the updated row."""
+    # The thread has its own conversation now; a seed question is used up
+    return (
+        update(ConversationTracker)
+        .where(ConversationTracker.thread_ts == thread_ts)
+        .values(conversation_id=conversation_id, seed_question=None)
+        .returning(*_CONVERSATION_COLUMNS)
+    )
+
+
+def _set_seed_question_stmt(thread_ts: str, question: str):
+    """Build an UPDATE of a thread's seed question that returns the updated row."""
+    return (
+        update(ConversationTracker)
+        .where(ConversationTracker.thread_ts == thread_ts)
+        .values(seed_question=question)
+        .returning(*_CONVERSATION_COLUMNS)
+    )
+
+
+# A follow-up moves a thread's updated_at (which retention goes by) forward
+# at most this often, so most follow-ups do not write the row
+CONVERSATION_TOUCH_INTERVAL = timedelta(hours=1)
+
+
+def _touch_conversation_stmt(thread_ts: str):
+    """Build an UPDATE marking a thread as active, unless it was marked recently."""
+    now = func.current_timestamp()
+    return (
+        update(ConversationTracker)
+        .where(
+            ConversationTracker.thread_ts == thread_ts,
+            ConversationTracker.updated_at < now - CONVERSATION_TOUCH_INTERVAL
+        )
+        .values(updated_at=now)
+    )
+
+
+def _message_row(channel_id: str, message_ts: str, record: Dict) -> Dict:
+    return {"slack_channel_id": channel_id, "slack_message_ts": message_ts, **record}
+
+
+def _upsert_messages_stmt(rows: List[Dict]):
+    """Build a (multi-row) upsert for Slack message to Genie message mappings."""
+    # Lock rows in key order, so batches of several processes that share
+    # messages wait for each other instead of deadlocking
+    rows = sorted(rows, key=lambda row: (row["slack_message_ts"], row["slack_channel_id"]))
+    stmt = pg_insert(MessageTracker).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[MessageTracker.slack_message_ts, MessageTracker.slack_channel_id],
+        set_={
+            "space_id": stmt.excluded.space_id,
+            "conversation_id": stmt.excluded.conversation_id,
+            "message_id": stmt.excluded.message_id
+        }
+    )
+
+
+# ==================== Write-Behind Buffer ====================
+# async_set_message queues message mappings here instead of committing one
+# transaction per Slack reply. Buffered rows are flushed as multi-row upserts
+# and remain visible to get_message until committed.
+
+
+async def _flush_message_rows(rows: List[Dict]):
+    """Write a batch of buffered message mappings in one upsert."""
+    session = get_async_session()
+    try:
+        await session.execute(_upsert_messages_stmt(rows))
+        await session.commit()
+    except SQLAlchemyError:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+    for row in rows:
+        _message_cache.set((row["slack_channel_id"], row["slack_message_ts"]), {
+            "space_id": row["space_id"],
+            "conversation_id": row["conversation_id"],
+            "message_id": row["message_id"]
+        })
+
+
+# Write-behind buffer for message mappings (async API, production only)
+MESSAGE_WRITE_BEHIND = os.environ.get("MESSAGE_WRITE_BEHIND", "true") == "true"
+_message_buffer = WriteBehindBuffer(
+    _flush_message_rows,
+    batch_size=int(os.environ.get("MESSAGE_FLUSH_BATCH_SIZE", "200")),
+    flush_interval=float(os.environ.get("MESSAGE_FLUSH_INTERVAL", "1.0")),
+    max_attempts=int(os.environ.get("MESSAGE_FLUSH_MAX_ATTEMPTS", "5"))
+) if MESSAGE_WRITE_BEHIND else None
+
+
+def _get_pending_message(channel_id: str, message_ts: str) -> Optional[Dict]:
+    if _message_buffer is None:
+        return None
+    row = _message_buffer.get((channel_id, message_ts))
+    if row is None:
+        return None
+    return {
+        "space_id": row["space_id"],
+        "conversation_id": row["conversation_id"],
+        "message_id": row["message_id"]
+    }
+
+
+def message_write_delay() -> float:
+    """Seconds a message mapping may take to reach the database (see WriteBehindBuffer.max_delay)."""
+    if _message_buffer is None or is_local_mode():
+        return 0.0
+    return _message_buffer.max_delay()
+
+
+async def flush_pending_messages():
+    """Flush buffered message mappings to the database, e.g. on shutdown."""
+    if _message_buffer is not None and not is_local_mode():
+        await _message_buffer.flush()
+
+
 def get_conversation(thread_ts: str) -> Optional[Dict]:
     """
     Get conversation details for a thread.
@@ -50,10 +406,17 @@ def get_conversation(thread_ts: str) -> Optional[Dict]:
     if is_local_mode():
         return _local_conv_tracker.get(thread_ts)
     else:
+        cached = _conversation_cache.get(thread_ts)
+        if cached is not None:
+            return cached
         session = get_session()
         try:
             tracker = session.query(ConversationTracker).filter_by(thread_ts=thread_ts).first()
-            return tracker.to_dict() if tracker else None
+            if not tracker:
+                return None
+            record = tracker.to_dict()
+            _conversation_cache.set(thread_ts, record)
+            return record
         except SQLAlchemyError as e:
             print(f"Error getting conversation: {e}")
             return None
@@ -74,26 +437,9 @@ def set_conversation(thread_ts: str, room_details: Dict):
     else:
         session = get_session()
         try:
-            # Check if exists
-            tracker = session.query(ConversationTracker).filter_by(thread_ts=thread_ts).first()
-            
-            if tracker:
-                # Update existing
-                tracker.genie_room_id = room_details.get("genie_room_id", tracker.genie_room_id)
-                tracker.genie_room_name = room_details.get("genie_room_name", tracker.genie_room_name)
-                if "conversation_id" in room_details:
-                    tracker.conversation_id = room_details["conversation_id"]
-            else:
-                # Create new
-                tracker = ConversationTracker(
-                    thread_ts=thread_ts,
-                    genie_room_id=room_details["genie_room_id"],
-                    genie_room_name=room_details["genie_room_name"],
-                    conversation_id=room_details.get("conversation_id")
-                )
-                session.add(tracker)
-            
+            row = session.execute(_upsert_conversation_stmt(thread_ts, room_details)).one()
             session.commit()
+            _conversation_cache.set(thread_ts, dict(row._mapping))
         except SQLAlchemyError as e:
             print(f"Error setting conversation: {e}")
             session.rollback()
@@ -113,13 +459,14 @@ def update_conversation_id(thread_ts: str, conversation_id: str):
     if is_local_mode():
         if thread_ts in _local_conv_tracker:
             _local_conv_tracker[thread_ts]["conversation_id"] = conversation_id
+            _local_conv_tracker[thread_ts].pop("seed_question", None)
     else:
         session = get_session()
         try:
-            tracker = session.query(ConversationTracker).filter_by(thread_ts=thread_ts).first()
-            if tracker:
-                tracker.conversation_id = conversation_id
-                session.commit()
+            row = session.execute(_update_conversation_id_stmt(thread_ts, conversation_id)).first()
+            session.commit()
+            if row:
+                _conversation_cache.set(thread_ts, dict(row._mapping))
         except SQLAlchemyError as e:
             print(f"Error updating conversation_id: {e}")
             session.rollback()
@@ -141,10 +488,11 @@ def delete_conversation(thread_ts: str):
     else:
         session = get_session()
         try:
-            tracker = session.query(ConversationTracker).filter_by(thread_ts=thread_ts).first()
-            if tracker:
-                session.delete(tracker)
-                session.commit()
+            session.execute(
+                delete(ConversationTracker).where(ConversationTracker.thread_ts == thread_ts)
+            )
+            session.commit()
+            _conversation_cache.invalidate(thread_ts)
         except SQLAlchemyError as e:
             print(f"Error deleting conversation: {e}")
             session.rollback()
@@ -160,8 +508,9 @@ def clear_all_conversations():
     else:
         session = get_session()
         try:
-            session.query(ConversationTracker).delete()
+            session.execute(delete(ConversationTracker))
             session.commit()
+            _conversation_cache.clear()
         except SQLAlchemyError as e:
             print(f"Error clearing conversations: {e}")
             session.rollback()
@@ -186,24 +535,19 @@ def set_message(channel_id: str, message_ts: str, space_id: str, conversation_id
         conversation_id: Genie conversation ID
         message_id: Genie message ID
     """
+    record = {
+        "space_id": space_id,
+        "conversation_id": conversation_id,
+        "message_id": message_id
+    }
     if is_local_mode():
-        _local_message_tracker[(channel_id, message_ts)] = {
-            "space_id": space_id,
-            "conversation_id": conversation_id,
-            "message_id": message_id
-        }
+        _local_message_tracker[(channel_id, message_ts)] = record
     else:
         session = get_session()
         try:
-            tracker = MessageTracker(
-                slack_channel_id=channel_id,
-                slack_message_ts=message_ts,
-                space_id=space_id,
-                conversation_id=conversation_id,
-                message_id=message_id
-            )
-            session.merge(tracker)  # Use merge to handle upsert
+            session.execute(_upsert_messages_stmt([_message_row(channel_id, message_ts, record)]))
             session.commit()
+            _message_cache.set((channel_id, message_ts), record)
         except SQLAlchemyError as e:
             print(f"Error setting message: {e}")
             session.rollback()
@@ -226,13 +570,23 @@ def get_message(channel_id: str, message_ts: str) -> Optional[Dict]:
     if is_local_mode():
         return _local_message_tracker.get((channel_id, message_ts))
     else:
+        pending = _get_pending_message(channel_id, message_ts)
+        if pending is not None:
+            return pending
+        cached = _message_cache.get((channel_id, message_ts))
+        if cached is not None:
+            return cached
         session = get_session()
         try:
             tracker = session.query(MessageTracker).filter_by(
                 slack_channel_id=channel_id,
                 slack_message_ts=message_ts
             ).first()
-            return tracker.to_dict() if tracker else None
+            if not tracker:
+                return None
+            record = tracker.to_dict()
+            _message_cache.set((channel_id, message_ts), record)
+            return record
         except SQLAlchemyError as e:
             print(f"Error getting message: {e}")
             return None
@@ -253,18 +607,239 @@ def delete_message_tracking(channel_id: str, message_ts: str):
         if key in _local_message_tracker:
             del _local_message_tracker[key]
     else:
+        if _message_buffer is not None:
+            _message_buffer.discard((channel_id, message_ts))
         session = get_session()
         try:
-            tracker = session.query(MessageTracker).filter_by(
-                slack_channel_id=channel_id,
-                slack_message_ts=message_ts
-            ).first()
-            if tracker:
-                session.delete(tracker)
-                session.commit()
+            session.execute(
+                delete(MessageTracker).where(
+                    MessageTracker.slack_channel_id == channel_id,
+                    MessageTracker.slack_message_ts == message_ts
+                )
+            )
+            session.commit()
+            _message_cache.invalidate((channel_id, message_ts))
         except SQLAlchemyError as e:
             print(f"Error deleting message tracking: {e}")
             session.rollback()
             raise
         finally:
             session.close()
+
+
+# ==================== Async Functions ====================
+# Async counterparts of the tracker API for use from Slack handlers. They run
+# on the async (psycopg 3) engine so a DB round trip does not block the event
+# loop.
+
+
+async def async_get_conversation(thread_ts: str) -> Optional[Dict]:
+    """
+    Get conversation details for a thread.
+    
+    Args:
+        thread_ts: Slack thread timestamp
+        
+    Returns:
+        Dict with conversation details or None if not found
+    """
+    if is_local_mode():
+        return _local_conv_tracker.get(thread_ts)
+    else:
+        cached = _conversation_cache.get(thread_ts)
+        if cached is not None:
+            return cached
+        session = get_async_session()
+        try:
+            result = await session.execute(
+                select(ConversationTracker).filter_by(thread_ts=thread_ts)
+            )
+            tracker = result.scalars().first()
+            if not tracker:
+                return None
+            record = tracker.to_dict()
+            _conversation_cache.set(thread_ts, record)
+            return record
+        except SQLAlchemyError as e:
+            print(f"Error getting conversation: {e}")
+            return None
+        finally:
+            await session.close()
+
+
+async def async_set_conversation(thread_ts: str, room_details: Dict):
+    """
+    Set/create conversation details for a thread.
+    
+    Args:
+        thread_ts: Slack thread timestamp
+        room_details: Dict with genie_room_id, genie_room_name, and optionally conversation_id
+    """
+    if is_local_mode():
+        set_conversation(thread_ts, room_details)
+    else:
+        session = get_async_session()
+        try:
+            result = await session.execute(_upsert_conversation_stmt(thread_ts, room_details))
+            row = result.one()
+            await session.commit()
+            _conversation_cache.set(thread_ts, dict(row._mapping))
+        except SQLAlchemyError as e:
+            print(f"Error setting conversation: {e}")
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+
+async def async_update_conversation_id(thread_ts: str, conversation_id: str):
+    """
+    Update the conversation_id for an existing thread.
+    
+    Args:
+        thread_ts: Slack thread timestamp
+        conversation_id: Genie conversation ID
+    """
+    if is_local_mode():
+        update_conversation_id(thread_ts, conversation_id)
+    else:
+        session = get_async_session()
+        try:
+            result = await session.execute(_update_conversation_id_stmt(thread_ts, conversation_id))
+            row = result.first()
+            await session.commit()
+            if row:
+                _conversation_cache.set(thread_ts, dict(row._mapping))
+        except SQLAlchemyError as e:
+            print(f"Error updating conversation_id: {e}")
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+
+async def async_set_seed_question(thread_ts: str, question: str):
+    """
+    Remember the first question of a thread that has no conversation of its
+    own, because its answer came from another thread's conversation.
+
+    Args:
+        thread_ts: Slack thread timestamp
+        question: The question the thread was answered for
+    """
+    if is_local_mode():
+        if thread_ts in _local_conv_tracker:
+            _local_conv_tracker[thread_ts]["seed_question"] = question
+    else:
+        session = get_async_session()
+        try:
+            result = await session.execute(_set_seed_question_stmt(thread_ts, question))
+            row = result.first()
+            await session.commit()
+            if row:
+                _conversation_cache.set(thread_ts, dict(row._mapping))
+        except SQLAlchemyError as e:
+            print(f"Error setting seed question: {e}")
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+
+async def async_touch_conversation(thread_ts: str):
+    """
+    Record activity in a thread, so retention keeps conversations in use.
+
+    Best effort: errors are logged, not raised.
+
+    Args:
+        thread_ts: Slack thread timestamp
+    """
+    if is_local_mode():
+        return
+    session = get_async_session()
+    try:
+        await session.execute(_touch_conversation_stmt(thread_ts))
+        await session.commit()
+    except SQLAlchemyError as e:
+        print(f"Error touching conversation: {e}")
+        await session.rollback()
+    finally:
+        await session.close()
+
+
+async def async_set_message(channel_id: str, message_ts: str, space_id: str, conversation_id: str, message_id: str):
+    """
+    Store a mapping between a Slack message and a Genie message.
+    
+    Args:
+        channel_id: Slack channel ID
+        message_ts: Slack message timestamp
+        space_id: Genie space/room ID
+        conversation_id: Genie conversation ID
+        message_id: Genie message ID
+    """
+    if is_local_mode():
+        set_message(channel_id, message_ts, space_id, conversation_id, message_id)
+    else:
+        record = {
+            "space_id": space_id,
+            "conversation_id": conversation_id,
+            "message_id": message_id
+        }
+        if _message_buffer is not None:
+            # Flushed in a batch later; readers see it via the buffer meanwhile
+            _message_buffer.add((channel_id, message_ts), _message_row(channel_id, message_ts, record))
+            return
+        session = get_async_session()
+        try:
+            await session.execute(_upsert_messages_stmt([_message_row(channel_id, message_ts, record)]))
+            await session.commit()
+            _message_cache.set((channel_id, message_ts), record)
+        except SQLAlchemyError as e:
+            print(f"Error setting message: {e}")
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+
+async def async_get_message(channel_id: str, message_ts: str) -> Optional[Dict]:
+    """
+    Get Genie message details for a Slack message.
+    
+    Args:
+        channel_id: Slack channel ID
+        message_ts: Slack message timestamp
+        
+    Returns:
+        Dict with space_id, conversation_id, message_id or None if not found
+    """
+    if is_local_mode():
+        return _local_message_tracker.get((channel_id, message_ts))
+    else:
+        pending = _get_pending_message(channel_id, message_ts)
+        if pending is not None:
+            return pending
+        cached = _message_cache.get((channel_id, message_ts))
+        if cached is not None:
+            return cached
+        session = get_async_session()
+        try:
+            result = await session.execute(
+                select(MessageTracker).filter_by(
+                    slack_channel_id=channel_id,
+                    slack_message_ts=message_ts
+                )
+            )
+            tracker = result.scalars().first()
+            if not tracker:
+                return None
+            record = tracker.to_dict()
+            _message_cache.set((channel_id, message_ts), record)
+            return record
+        except SQLAlchemyError as e:
+            print(f"Error getting message: {e}")
+            return None
+        finally:
+            await session.close()
@@ -0,0 +1,40 @@
+"""Lakebase claims for Slack event deduplication across replicas."""
+from typing import List
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from database.connection import get_async_session
+from database.models import ProcessedEvent
+
+
+async def async_claim_event(event_keys: List[str]) -> bool:
+    """
+    Record a Slack event as processed, unless another replica already did.
+
+    Args:
+        event_keys: Every key identifying the event (event ID, client message ID)
+
+    Returns:
+        bool: True if this call claimed the event, False if any key was
+        already claimed. Database errors fail open (True) so events are
+        never dropped because Lakebase is unavailable.
+    """
+    stmt = (
+        pg_insert(ProcessedEvent)
+        .values([{"event_key": key} for key in event_keys])
+        .on_conflict_do_nothing(index_elements=[ProcessedEvent.event_key])
+        .returning(ProcessedEvent.event_key)
+    )
+    session = get_async_session()
+    try:
+        result = await session.execute(stmt)
+        claimed = len(result.all())
+        await session.commit()
+        return claimed == len(event_keys)
+    except SQLAlchemyError as e:
+        print(f"Error claiming event: {e}")
+        await session.rollback()
+        return True
+    finally:
+        await session.close()
@@ -0,0 +1,81 @@
+"""Lakebase outbox for Genie feedback ratings awaiting delivery."""
+from typing import List, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from database.connection import get_async_session
+from database.models import FeedbackOutbox
+
+
+async def async_save_feedback(channel_id: str, message_ts: str, rating: str):
+    """
+    Record the latest rating of a message, replacing any undelivered one.
+
+    Args:
+        channel_id: Slack channel ID
+        message_ts: Slack message timestamp
+        rating: POSITIVE, NEGATIVE or NONE
+    """
+    stmt = pg_insert(FeedbackOutbox).values(slack_channel_id=channel_id, slack_message_ts=message_ts, rating=rating)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[FeedbackOutbox.slack_channel_id, FeedbackOutbox.slack_message_ts],
+        set_={"rating": stmt.excluded.rating, "updated_at": func.current_timestamp()}
+    )
+    session = get_async_session()
+    try:
+        await session.execute(stmt)
+        await session.commit()
+    except SQLAlchemyError as e:
+        # The rating is still delivered from memory; it is only lost on a restart
+        print(f"Error saving feedback to outbox: {e}")
+        await session.rollback()
+    finally:
+        await session.close()
+
+
+async def async_delete_feedback(channel_id: str, message_ts: str, rating: str):
+    """
+    Remove a delivered rating from the outbox.
+
+    Only deletes the row if it still holds ``rating``, so a newer rating
+    recorded while this one was being sent stays queued.
+
+    Args:
+        channel_id: Slack channel ID
+        message_ts: Slack message timestamp
+        rating: The rating that was delivered
+    """
+    stmt = delete(FeedbackOutbox).filter_by(slack_channel_id=channel_id, slack_message_ts=message_ts, rating=rating)
+    session = get_async_session()
+    try:
+        await session.execute(stmt)
+        await session.commit()
+    except SQLAlchemyError as e:
+        # Left over rows are re-sent on the next start; Genie keeps the same rating
+        print(f"Error deleting feedback from outbox: {e}")
+        await session.rollback()
+    finally:
+        await session.close()
+
+
+async def async_load_feedback() -> List[Tuple[str, str, str]]:
+    """
+    Get every undelivered rating, oldest first.
+
+    Returns:
+        List of (channel_id, message_ts, rating)
+    """
+    session = get_async_session()
+    try:
+        result = await session.execute(
+            select(FeedbackOutbox.slack_channel_id, FeedbackOutbox.slack_message_ts, FeedbackOutbox.rating)
+            .order_by(FeedbackOutbox.updated_at)
+        )
+        return [tuple(row) for row in result.all()]
+    except SQLAlchemyError as e:
+        print(f"Error loading feedback outbox: {e}")
+        return []
+    finally:
+        await session.close()
@@ -1,5 +1,5 @@
 """Database models for conversation tracking."""
-from sqlalchemy import Column, String, DateTime, func
+from sqlalchemy import Column, String, Text, DateTime, func
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -17,8 +17,12 @@ class ConversationTracker(Base):
         conversation_id: Genie conversation ID
         genie_room_id: Genie room/space ID
         genie_room_name: Genie room/space name
+        seed_question: First question of a thread answered from another
+            thread's conversation (cached or shared answer); the thread's
+            own conversation starts with it on the first follow-up
         created_at: Timestamp when the record was created
-        updated_at: Timestamp when the record was last updated
+        updated_at: Timestamp of the last activity in the thread (updated
+            at most hourly by follow-ups)
     """
     __tablename__ = "conversation_tracker"
     __table_args__ = {'schema': SCHEMA_NAME}
@@ -27,15 +31,17 @@ class ConversationTracker(Base):
     conversation_id = Column(String, nullable=True)
     genie_room_id = Column(String, nullable=False)
     genie_room_name = Column(String, nullable=False)
+    seed_question = Column(Text, nullable=True)
     created_at = Column(DateTime, server_default=func.current_timestamp())
-    updated_at = Column(DateTime, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+    updated_at = Column(DateTime, server_default=func.current_timestamp(), onupdate=func.current_timestamp(), index=True)
     
     def to_dict(self):
         """Convert model to dictionary format matching the old conv_tracker structure."""
         return {
             "conversation_id": self.conversation_id,
             "genie_room_id": self.genie_room_id,
-            "genie_room_name": self.genie_room_name
+            "genie_room_name": self.genie_room_name,
+            "seed_question": self.seed_question
         }
 
 
@@ -60,7 +66,7 @@ class MessageTracker(Base):
     space_id = Column(String, nullable=False)
     conversation_id = Column(String, nullable=False)
     message_id = Column(String, nullable=False)
-    created_at = Column(DateTime, server_default=func.current_timestamp())
+    created_at = Column(DateTime, server_default=func.current_timestamp(), index=True)
     
     def to_dict(self):
         """Convert model to dictionary format."""
@@ -69,3 +75,106 @@ class MessageTracker(Base):
             "conversation_id": self.conversation_id,
             "message_id": self.message_id
         }
+
+
+class AnswerCacheEntry(Base):
+    """
+    Model for cached Genie answers, shared across app instances.
+    
+    Attributes:
+        space_id: Genie space/room ID (primary key)
+        question_key: Normalized question text (primary key)
+        text: Formatted answer text as posted to Slack
+        sql: Generated SQL, if any
+        conversation_id: Genie conversation ID the answer came from
+        message_id: Genie message ID the answer came from
+        created_at: Timestamp when the answer was cached
+    """
+    __tablename__ = "answer_cache"
+    __table_args__ = {'schema': SCHEMA_NAME}
+    
+    space_id = Column(String, primary_key=True)
+    question_key = Column(String, primary_key=True)
+    text = Column(Text, nullable=False)
+    sql = Column(Text, nullable=True)
+    conversation_id = Column(String, nullable=False)
+    message_id = Column(String, nullable=False)
+    created_at = Column(DateTime, server_default=func.current_timestamp(), index=True)
+    
+    def to_dict(self):
+        """Convert model to dictionary format."""
+        return {
+            "text": self.text,
+            "sql": self.sql,
+            "conversation_id": self.conversation_id,
+            "message_id": self.message_id
+        }
+
+
+class ProcessedEvent(Base):
+    """
+    Model for Slack events already handled, shared across app replicas so a
+    redelivered event is processed only once.
+    
+    Attributes:
+        event_key: Slack event ID or client message ID (primary key)
+        created_at: Timestamp when the event was first claimed
+    """
+    __tablename__ = "processed_event"
+    __table_args__ = {'schema': SCHEMA_NAME}
+    
+    event_key = Column(String, primary_key=True)
+    created_at = Column(DateTime, server_default=func.current_timestamp(), index=True)
+
+
+class ThreadLease(Base):
+    """
+    Model for per-thread ownership leases in multi-replica mode.
+    
+    Attributes:
+        thread_ts: Slack thread timestamp (primary key)
+        owner_id: ID of the replica currently handling the thread
+        expires_at: When the lease lapses unless renewed
+    """
+    __tablename__ = "thread_lease"
+    __table_args__ = {'schema': SCHEMA_NAME}
+    
+    thread_ts = Column(String, primary_key=True)
+    owner_id = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class FeedbackOutbox(Base):
+    """
+    Model for feedback ratings not yet delivered to Genie, so a restart does
+    not lose them.
+    
+    Attributes:
+        slack_channel_id: Slack channel ID (primary key)
+        slack_message_ts: Slack message timestamp of the rated answer (primary key)
+        rating: Latest rating (POSITIVE, NEGATIVE or NONE)
+        updated_at: Timestamp when the rating was last changed
+    """
+    __tablename__ = "feedback_outbox"
+    __table_args__ = {'schema': SCHEMA_NAME}
+    
+    slack_channel_id = Column(String, primary_key=True)
+    slack_message_ts = Column(String, primary_key=True)
+    rating = Column(String, nullable=False)
+    updated_at = Column(DateTime, server_default=func.current_timestamp(), index=True)
+
+
+class SchemaVersion(Base):
+    """
+    Model for the schema versions this database has been initialized to, so
+    a restart with unchanged models can skip the DDL.
+    
+    Attributes:
+        version: Fingerprint of the models' DDL (primary key)
+        applied_at: Timestamp when the schema was initialized to this version
+    """
+    __tablename__ = "schema_version"
+    __table_args__ = {'schema': SCHEMA_NAME}
+    
+    version = Column(String, primary_key=True)
+    applied_at = Column(DateTime, server_default=func.current_timestamp())
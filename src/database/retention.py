@@ -0,0 +1,284 @@
+"""Retention for the tracker tables: TTL purges, partitions and size reports."""
+import asyncio
+import os
+import re
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func, select, text, tuple_
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateTable
+
+from database.connection import get_async_engine
+from database.models import (
+    AnswerCacheEntry,
+    ConversationTracker,
+    FeedbackOutbox,
+    MessageTracker,
+    ProcessedEvent,
+    SCHEMA_NAME,
+    ThreadLease
+)
+
+# TTLs in days; 0 keeps rows forever
+CONVERSATION_RETENTION_DAYS = float(os.environ.get("CONVERSATION_RETENTION_DAYS", "90"))
+MESSAGE_RETENTION_DAYS = float(os.environ.get("MESSAGE_RETENTION_DAYS", "30"))
+# Cached answers are only served within their space TTL; this just bounds the table
+ANSWER_CACHE_RETENTION_DAYS = float(os.environ.get("ANSWER_CACHE_RETENTION_DAYS", "1"))
+# Slack stops redelivering an event within minutes; a day is plenty
+EVENT_DEDUP_RETENTION_DAYS = float(os.environ.get("EVENT_DEDUP_RETENTION_DAYS", "1"))
+# Thread leases are purged this long after they expire
+THREAD_LEASE_RETENTION_DAYS = float(os.environ.get("THREAD_LEASE_RETENTION_DAYS", "1"))
+# Ratings that could not be delivered for this long are given up on
+FEEDBACK_OUTBOX_RETENTION_DAYS = float(os.environ.get("FEEDBACK_OUTBOX_RETENTION_DAYS", "7"))
+RETENTION_PURGE_CHUNK_SIZE = int(os.environ.get("RETENTION_PURGE_CHUNK_SIZE", "5000"))
+RETENTION_PURGE_INTERVAL = float(os.environ.get("RETENTION_PURGE_INTERVAL", "3600"))
+
+# Optional range partitioning of message_tracker. The partition key is
+# slack_message_ts, which is part of the primary key (so ON CONFLICT upserts
+# keep working) and is a fixed-width epoch-seconds string, so its string order
+# matches time order.
+MESSAGE_TRACKER_PARTITIONED = os.environ.get("MESSAGE_TRACKER_PARTITIONED") == "true"
+MESSAGE_PARTITION_DAYS = int(os.environ.get("MESSAGE_PARTITION_DAYS", "7"))
+MESSAGE_PARTITIONS_AHEAD = 2
+
+# (model, timestamp column, TTL in days) per table. A conversation's
+# updated_at is its last activity: follow-ups move it forward too (see
+# async_touch_conversation)
+RETENTION_POLICIES = [
+    (ConversationTracker, ConversationTracker.updated_at, CONVERSATION_RETENTION_DAYS),
+    (MessageTracker, MessageTracker.created_at, MESSAGE_RETENTION_DAYS),
+    (AnswerCacheEntry, AnswerCacheEntry.created_at, ANSWER_CACHE_RETENTION_DAYS),
+    (ProcessedEvent, ProcessedEvent.created_at, EVENT_DEDUP_RETENTION_DAYS),
+    (ThreadLease, ThreadLease.expires_at, THREAD_LEASE_RETENTION_DAYS),
+    (FeedbackOutbox, FeedbackOutbox.updated_at, FEEDBACK_OUTBOX_RETENTION_DAYS),
+]
+
+_PARTITION_BOUND = re.compile(r"FROM \('(\d+)'\) TO \('(\d+)'\)")
+
+# Stats from the most recent purge run, keyed by table name
+purge_stats: Dict[str, Dict] = {}
+
+
+# ==================== Partitioning ====================
+
+
+def _message_table_name() -> str:
+    return f"{SCHEMA_NAME}.{MessageTracker.__tablename__}"
+
+
+def _partition_period() -> int:
+    return MESSAGE_PARTITION_DAYS * 86400
+
+
+def create_partitioned_message_table(conn: Connection) -> bool:
+    """
+    Create message_tracker as a range-partitioned table if it does not exist.
+
+    Must run before ``Base.metadata.create_all`` so the plain table is not
+    created first. An existing unpartitioned table is left as is.
+
+    Args:
+        conn: Sync SQLAlchemy connection
+
+    Returns:
+        Whether message_tracker is partitioned, i.e. partitions can be added
+    """
+    exists = conn.execute(text("SELECT to_regclass(:name)"), {"name": _message_table_name()}).scalar() is not None
+    if exists and not is_message_table_partitioned(conn):
+        print(
+            f"Warning: {_message_table_name()} exists and is not partitioned; "
+            "MESSAGE_TRACKER_PARTITIONED only applies to a new table"
+        )
+        return False
+    ddl = str(CreateTable(MessageTracker.__table__, if_not_exists=True).compile(dialect=conn.dialect))
+    conn.execute(text(f"{ddl.rstrip()} PARTITION BY RANGE (slack_message_ts)"))
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {_message_table_name()}_default "
+        f"PARTITION OF {_message_table_name()} DEFAULT"
+    ))
+    return True
+
+
+def is_message_table_partitioned(conn: Connection) -> bool:
+    """Check whether message_tracker is a partitioned table."""
+    relkind = conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": _message_table_name()}
+    ).scalar()
+    return relkind == "p"
+
+
+def ensure_message_partitions(conn: Connection, now: Optional[float] = None) -> List[str]:
+    """
+    Create the current and upcoming message_tracker partitions.
+
+    Args:
+        conn: Sync SQLAlchemy connection
+        now: Epoch seconds to plan from (defaults to the current time)
+
+    Returns:
+        List of partition names that exist after the call
+    """
+    period = _partition_period()
+    start = int((now or time.time()) // period * period)
+    names = []
+    for i in range(MESSAGE_PARTITIONS_AHEAD + 1):
+        low = start + i * period
+        name = f"{MessageTracker.__tablename__}_p{low}"
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {SCHEMA_NAME}.{name} "
+            f"PARTITION OF {_message_table_name()} "
+            f"FOR VALUES FROM ('{low}') TO ('{low + period}')"
+        ))
+        names.append(name)
+    return names
+
+
+def drop_expired_message_partitions(conn: Connection, ttl_days: float, now: Optional[float] = None) -> List[str]:
+    """
+    Drop message_tracker partitions whose whole range is older than the TTL.
+
+    Args:
+        conn: Sync SQLAlchemy connection
+        ttl_days: Retention in days
+        now: Epoch seconds to compute the cutoff from (defaults to the current time)
+
+    Returns:
+        List of dropped partition names
+    """
+    cutoff = (now or time.time()) - ttl_days * 86400
+    rows = conn.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:name)"
+    ), {"name": _message_table_name()}).all()
+    dropped = []
+    for relname, bound in rows:
+        match = _PARTITION_BOUND.search(bound or "")
+        if match and int(match.group(2)) <= cutoff:
+            conn.execute(text(f"DROP TABLE IF EXISTS {SCHEMA_NAME}.{relname}"))
+            dropped.append(relname)
+    return dropped
+
+
+# ==================== Purging ====================
+
+
+async def purge_table(model, column, ttl_days: float, chunk_size: int = RETENTION_PURGE_CHUNK_SIZE) -> int:
+    """
+    Delete rows older than the TTL in chunks of at most ``chunk_size`` rows.
+
+    Each chunk is its own short transaction, so the purge never holds long
+    locks or blocks concurrent writes for long.
+
+    Args:
+        model: ORM model of the table
+        column: Timestamp column compared against the TTL
+        ttl_days: Retention in days
+        chunk_size: Maximum rows deleted per transaction
+
+    Returns:
+        int: Number of rows deleted
+    """
+    pk = list(model.__table__.primary_key.columns)
+    cutoff = func.current_timestamp() - timedelta(days=ttl_days)
+    expired = select(*pk).where(column < cutoff).limit(chunk_size)
+    stmt = delete(model).where(tuple_(*pk).in_(expired))
+
+    engine = get_async_engine()
+    deleted = 0
+    while True:
+        async with engine.begin() as conn:
+            result = await conn.execute(stmt)
+        deleted += result.rowcount
+        if result.rowcount < chunk_size:
+            return deleted
+        await asyncio.sleep(0)  # let other work run between chunks
+
+
+async def run_purge() -> Dict[str, Dict]:
+    """
+    Apply every retention policy once and record throughput stats.
+
+    Returns:
+        Dict of table name -> deleted rows/partitions, seconds and rows per second
+    """
+    engine = get_async_engine()
+    for model, column, ttl_days in RETENTION_POLICIES:
+        if ttl_days <= 0:
+            continue
+        table = model.__tablename__
+        started = time.monotonic()
+        dropped = []
+        try:
+            if model is MessageTracker and MESSAGE_TRACKER_PARTITIONED:
+                async with engine.begin() as conn:
+                    if await conn.run_sync(is_message_table_partitioned):
+                        await conn.run_sync(ensure_message_partitions)
+                        dropped = await conn.run_sync(drop_expired_message_partitions, ttl_days)
+            deleted = await purge_table(model, column, ttl_days)
+        except Exception as e:
+            # Also driver and token errors (OSError, ConnectionError); the
+            # other tables are still purged
+            print(f"Error purging {table}: {e}")
+            continue
+        elapsed = time.monotonic() - started
+        purge_stats[table] = {
+            "deleted_rows": deleted,
+            "dropped_partitions": dropped,
+            "seconds": elapsed,
+            "rows_per_second": deleted / elapsed if elapsed > 0 else 0.0
+        }
+        print(f"Purged {deleted} rows and {len(dropped)} partitions from {table} in {elapsed:.2f}s")
+    return purge_stats
+
+
+async def run_retention_job(interval: float = RETENTION_PURGE_INTERVAL):
+    """Background task that runs the purge every ``interval`` seconds."""
+    if all(ttl_days <= 0 for _, _, ttl_days in RETENTION_POLICIES):
+        return
+    while True:
+        try:
+            await run_purge()
+        except Exception as e:
+            # Keep the job alive; the next run may succeed
+            print(f"Error running retention purge: {e}")
+        await asyncio.sleep(interval)
+
+
+# ==================== Reporting ====================
+
+
+def _table_size_report(conn: Connection) -> List[Dict]:
+    report = []
+    for model, _, ttl_days in RETENTION_POLICIES:
+        name = f"{SCHEMA_NAME}.{model.__tablename__}"
+        # A plain table, or every leaf partition of a partitioned one
+        row = conn.execute(text(
+            "SELECT coalesce(sum(pg_total_relation_size(c.oid)), 0), "
+            "coalesce(sum(greatest(c.reltuples, 0)), 0) "
+            "FROM pg_class c "
+            "WHERE (c.oid = to_regclass(:name) AND c.relkind = 'r') "
+            "OR c.oid IN (SELECT relid FROM pg_partition_tree(to_regclass(:name)) WHERE isleaf)"
+        ), {"name": name}).one()
+        report.append({
+            "table": model.__tablename__,
+            "total_bytes": int(row[0]),
+            "estimated_rows": int(row[1]),
+            "retention_days": ttl_days,
+            "last_purge": purge_stats.get(model.__tablename__)
+        })
+    return report
+
+
+async def table_size_report() -> List[Dict]:
+    """
+    Report on-disk size, estimated row count and last purge stats per table.
+
+    Returns:
+        List of dicts, one per tracker table
+    """
+    async with get_async_engine().connect() as conn:
+        return await conn.run_sync(_table_size_report)
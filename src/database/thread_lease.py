@@ -0,0 +1,70 @@
+"""Lakebase leases giving one replica at a time ownership of a Slack thread."""
+from datetime import timedelta
+
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from database.connection import get_async_session
+from database.models import ThreadLease
+
+
+async def async_claim_thread(thread_ts: str, owner_id: str, lease_seconds: float) -> bool:
+    """
+    Take or renew the lease on a thread.
+
+    The lease is granted when the thread is free, its lease has expired
+    (e.g. the owning replica died), or ``owner_id`` already holds it.
+
+    Args:
+        thread_ts: Slack thread timestamp
+        owner_id: ID of the claiming replica
+        lease_seconds: Lease duration
+
+    Returns:
+        bool: Whether ``owner_id`` now holds the lease
+
+    Raises:
+        SQLAlchemyError: If the database is unavailable
+    """
+    expires_at = func.current_timestamp() + timedelta(seconds=lease_seconds)
+    stmt = pg_insert(ThreadLease).values(thread_ts=thread_ts, owner_id=owner_id, expires_at=expires_at)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ThreadLease.thread_ts],
+        set_={"owner_id": stmt.excluded.owner_id, "expires_at": stmt.excluded.expires_at},
+        where=(ThreadLease.expires_at < func.current_timestamp()) | (ThreadLease.owner_id == stmt.excluded.owner_id)
+    ).returning(ThreadLease.owner_id)
+    session = get_async_session()
+    try:
+        result = await session.execute(stmt)
+        claimed = result.first() is not None
+        await session.commit()
+        return claimed
+    except SQLAlchemyError:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+async def async_release_threads(owner_id: str, thread_ts: str = None):
+    """
+    Give up leases so another replica can take over immediately.
+
+    Args:
+        owner_id: ID of the releasing replica
+        thread_ts: Thread to release; all of the owner's leases if omitted
+    """
+    stmt = delete(ThreadLease).where(ThreadLease.owner_id == owner_id)
+    if thread_ts is not None:
+        stmt = stmt.where(ThreadLease.thread_ts == thread_ts)
+    session = get_async_session()
+    try:
+        await session.execute(stmt)
+        await session.commit()
+    except SQLAlchemyError as e:
+        # Unreleased leases simply expire
+        print(f"Error releasing thread leases: {e}")
+        await session.rollback()
+    finally:
+        await session.close()
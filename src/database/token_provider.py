@@ -0,0 +1,117 @@
+"""Cached, proactively refreshed OAuth token for Lakebase connections."""
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+# Lakebase OAuth tokens are valid for one hour; assume that when the SDK does
+# not report an expiry.
+DEFAULT_TOKEN_LIFETIME = timedelta(hours=1)
+
+
+class OAuthTokenCache:
+    """
+    Holds the current Lakebase OAuth token and refreshes it in the background.
+
+    New pooled connections read the cached token through ``get_token``, so
+    opening a connection never waits on the token endpoint unless the cache
+    is empty or the background refresh has fallen behind. Connections that are
+    already open are unaffected by a refresh.
+
+    Attributes:
+        fetch_token: Callable returning a databricks.sdk.oauth.Token
+        refresh_margin: Refresh this long before the token expires
+        retry_interval: Seconds to wait before retrying a failed refresh
+    """
+
+    def __init__(
+        self,
+        fetch_token: Callable,
+        refresh_margin: timedelta = timedelta(minutes=10),
+        retry_interval: float = 30.0
+    ):
+        self.fetch_token = fetch_token
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._access_token = None
+        self._expiry = None
+        self._refresher = None
+        self._stopped = threading.Event()
+
+    def _now(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+    def _is_expired(self) -> bool:
+        return self._expiry is None or self._now() >= self._expiry - timedelta(seconds=40)
+
+    def refresh(self) -> str:
+        """
+        Fetch a new token from the SDK and cache it.
+
+        Returns:
+            str: The new access token
+        """
+        token = self.fetch_token()
+        expiry = token.expiry
+        if expiry is None:
+            expiry = self._now() + DEFAULT_TOKEN_LIFETIME
+        elif expiry.tzinfo is None:
+            expiry = expiry.astimezone(timezone.utc)
+        with self._lock:
+            self._access_token = token.access_token
+            self._expiry = expiry
+        return token.access_token
+
+    def get_token(self) -> str:
+        """
+        Get a valid access token, fetching one only if the cache has none.
+
+        Returns:
+            str: OAuth access token to use as the Postgres password
+        """
+        with self._lock:
+            if self._access_token is not None and not self._is_expired():
+                return self._access_token
+        return self.refresh()
+
+    def start_background_refresh(self):
+        """Start the daemon thread that refreshes the token ahead of expiry."""
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        self._stopped.clear()
+        self._refresher = threading.Thread(
+            target=self._refresh_loop,
+            name="lakebase-token-refresh",
+            daemon=True
+        )
+        self._refresher.start()
+
+    def stop(self):
+        """Stop the background refresh thread."""
+        self._stopped.set()
+
+    def _refresh_loop(self):
+        refreshed = False
+        while not self._stopped.is_set():
+            with self._lock:
+                expiry = self._expiry
+            if expiry is None:
+                wait = 0
+            else:
+                wait = (expiry - self.refresh_margin - self._now()).total_seconds()
+                if refreshed:
+                    # Tokens shorter-lived than the margin: avoid a hot loop
+                    wait = max(wait, self.retry_interval)
+
+            if wait > 0:
+                self._stopped.wait(wait)
+                refreshed = False
+                continue
+
+            try:
+                self.refresh()
+                refreshed = True
+                print(f"Refreshed Lakebase OAuth token, valid until {self._expiry.isoformat()}")
+            except Exception as e:
+                print(f"Error refreshing Lakebase OAuth token: {e}")
+                self._stopped.wait(self.retry_interval)
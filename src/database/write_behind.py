@@ -0,0 +1,180 @@
+"""Write-behind buffer for batching message tracker inserts."""
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+MessageKey = Tuple[str, str]  # (channel_id, message_ts)
+# Rows that fail one by one, with none written, before a per-row pass gives
+# up and treats the database as unavailable
+ROW_FAILURES_BEFORE_GIVING_UP = 3
+
+
+class WriteBehindBuffer:
+    """
+    Collects rows in memory and flushes them to the database in batches.
+
+    A flush runs when ``batch_size`` rows are pending or ``flush_interval``
+    seconds after the first pending row, whichever comes first. Rows stay
+    readable through ``get`` until their batch has been committed, and rows
+    from a failed flush are put back for the next attempt.
+
+    Failed flushes are retried with exponential backoff. After
+    ``max_attempts`` failures in a row the batch is written one row at a
+    time: rows that fail while others succeed are dropped and logged, so
+    one bad row cannot hold up the rest. If no row can be written (the
+    database is unavailable) the rows are kept and retried later.
+
+    Attributes:
+        flush_rows: Coroutine function writing a list of rows in one statement
+        batch_size: Number of pending rows that triggers an immediate flush
+        flush_interval: Maximum seconds a row waits before being flushed
+        max_attempts: Failed batch flushes before writing rows one at a time
+        max_backoff: Longest wait between retries, in seconds
+    """
+
+    def __init__(
+        self,
+        flush_rows: Callable[[List[Dict]], Awaitable[None]],
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_attempts: int = 5,
+        max_backoff: float = 60.0
+    ):
+        self.flush_rows = flush_rows
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max(max_attempts, 1)
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.dropped = 0
+        self._pending: Dict[MessageKey, Dict] = {}
+        self._flushing: Dict[MessageKey, Dict] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._tasks = set()
+
+    def __len__(self):
+        return len(self._pending) + len(self._flushing)
+
+    def add(self, key: MessageKey, row: Dict):
+        """
+        Queue a row for the next flush, replacing any pending row for the key.
+
+        Args:
+            key: Primary key of the row
+            row: Column values to insert
+        """
+        self._pending[key] = row
+        loop = asyncio.get_running_loop()
+        # While backing off, a full batch waits for the retry like the rest
+        if len(self._pending) >= self.batch_size and self.failures == 0:
+            self._spawn_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_interval, self._spawn_flush)
+
+    def max_delay(self) -> float:
+        """
+        Longest a row can wait before it is committed or dropped, when the
+        database comes back in time: the flush interval plus the backoff
+        of ``max_attempts`` failed flushes.
+        """
+        backoff = sum(min(self.flush_interval * 2 ** i, self.max_backoff) for i in range(self.max_attempts))
+        return self.flush_interval + backoff
+
+    def get(self, key: MessageKey) -> Optional[Dict]:
+        """
+        Get a row that has not been committed yet.
+
+        Args:
+            key: Primary key of the row
+
+        Returns:
+            The pending row or None
+        """
+        row = self._pending.get(key)
+        if row is None:
+            row = self._flushing.get(key)
+        return row
+
+    def discard(self, key: MessageKey):
+        """
+        Drop a row that has not been committed, e.g. when the row is deleted.
+
+        A row in a batch that is being written is not put back if that write
+        fails; if it succeeds the row may still be committed.
+        """
+        self._pending.pop(key, None)
+        self._flushing.pop(key, None)
+
+    def _spawn_flush(self):
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        """Write all pending rows to the database in one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            self._flushing, self._pending = self._pending, {}
+            batch = self._flushing
+            try:
+                try:
+                    await self.flush_rows(list(batch.values()))
+                    self.failures = 0
+                    return
+                except Exception as e:
+                    self.failures += 1
+                    print(f"Error flushing {len(batch)} buffered rows (attempt {self.failures}): {e}")
+                if self.failures >= self.max_attempts and await self._flush_each(batch):
+                    self.failures = 0
+                    return
+                # Newer rows queued during the flush win over the failed ones
+                for key, row in batch.items():
+                    self._pending.setdefault(key, row)
+                self._schedule_retry()
+            finally:
+                self._flushing = {}
+
+    async def _flush_each(self, batch: Dict[MessageKey, Dict]) -> bool:
+        """
+        Write a batch one row at a time, dropping rows that cannot be written.
+
+        Args:
+            batch: Rows by key; written rows are removed from it
+
+        Returns:
+            bool: False if no row could be written (the rows are kept)
+        """
+        written = False
+        failed = {}
+        for key, row in list(batch.items()):
+            if key not in batch:
+                continue  # discarded meanwhile
+            try:
+                await self.flush_rows([row])
+                written = True
+                del batch[key]
+            except Exception as e:
+                failed[key] = e
+                if not written and len(failed) >= ROW_FAILURES_BEFORE_GIVING_UP:
+                    return False
+        if not written and failed:
+            return False
+        for key, e in failed.items():
+            self.dropped += 1
+            print(f"Dropping buffered row {key} that could not be written: {e}")
+            batch.pop(key, None)
+        return True
+
+    def _schedule_retry(self):
+        """Retry the flush after a delay that doubles with each failure."""
+        delay = min(self.flush_interval * 2 ** (self.failures - 1), self.max_backoff)
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._spawn_flush)
@@ -0,0 +1,313 @@
+"""Admission control and fair queueing for questions sent to Genie."""
+import asyncio
+import bisect
+import itertools
+import os
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional
+
+from cachetools import LRUCache
+
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get("ADMISSION_MAX_IN_FLIGHT", "16"))
+ADMISSION_SPACE_MAX_IN_FLIGHT = int(os.environ.get("ADMISSION_SPACE_MAX_IN_FLIGHT", "4"))
+# Token buckets: questions per minute and burst size
+ADMISSION_USER_RATE = float(os.environ.get("ADMISSION_USER_RATE", "6"))
+ADMISSION_USER_BURST = float(os.environ.get("ADMISSION_USER_BURST", "3"))
+ADMISSION_SPACE_RATE = float(os.environ.get("ADMISSION_SPACE_RATE", "30"))
+ADMISSION_SPACE_BURST = float(os.environ.get("ADMISSION_SPACE_BURST", "10"))
+# Shedding: total and per-user queue limits, and the longest a question may wait
+ADMISSION_MAX_BACKLOG = int(os.environ.get("ADMISSION_MAX_BACKLOG", "100"))
+ADMISSION_MAX_QUEUED_PER_USER = int(os.environ.get("ADMISSION_MAX_QUEUED_PER_USER", "5"))
+ADMISSION_MAX_WAIT = float(os.environ.get("ADMISSION_MAX_WAIT", "120"))
+
+
+class AdmissionRejected(Exception):
+    """Raised when a question is shed instead of being sent to Genie."""
+
+
+class TokenBucket:
+    """
+    Classic token bucket.
+
+    Attributes:
+        rate: Tokens added per second
+        burst: Maximum tokens held
+    """
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def ready(self, now: float) -> bool:
+        if self.rate <= 0:
+            return True  # unlimited
+        self._refill(now)
+        return self.tokens >= 1
+
+    def take(self, now: float):
+        if self.rate > 0:
+            self._refill(now)
+            self.tokens -= 1
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until the next token is available."""
+        if self.ready(now):
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class _Waiter:
+    """A queued question."""
+
+    def __init__(self, user_id: str, space_id: str, tag: float, seq: int, future: asyncio.Future, on_position):
+        self.user_id = user_id
+        self.space_id = space_id
+        self.tag = tag  # virtual finish time for fair ordering
+        self.seq = seq
+        self.future = future
+        self.on_position = on_position
+        self.position = None
+
+    def __lt__(self, other):
+        return (self.tag, self.seq) < (other.tag, other.seq)
+
+
+class AdmissionController:
+    """
+    Gate between Slack handlers and the Genie client.
+
+    A question is admitted when global and per-space in-flight limits allow
+    it and both the asking user's and the space's token buckets have a
+    token. Otherwise it waits in a weighted fair queue: each user's questions
+    get increasing virtual finish tags (spaced by ``1 / weight``), so a user
+    who pastes ten questions is interleaved with everyone else instead of
+    going first. The backlog is bounded; questions over the total or
+    per-user limit, or waiting longer than ``max_wait``, are shed with
+    ``AdmissionRejected``.
+
+    Attributes:
+        max_in_flight: Questions in progress at once across all spaces
+        space_max_in_flight: Questions in progress at once per space
+        max_backlog: Questions allowed to wait in total
+        max_queued_per_user: Questions one user may have waiting
+        max_wait: Seconds a question may wait before it is shed
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+        space_max_in_flight: int = ADMISSION_SPACE_MAX_IN_FLIGHT,
+        user_rate: float = ADMISSION_USER_RATE,
+        user_burst: float = ADMISSION_USER_BURST,
+        space_rate: float = ADMISSION_SPACE_RATE,
+        space_burst: float = ADMISSION_SPACE_BURST,
+        max_backlog: int = ADMISSION_MAX_BACKLOG,
+        max_queued_per_user: int = ADMISSION_MAX_QUEUED_PER_USER,
+        max_wait: float = ADMISSION_MAX_WAIT
+    ):
+        self.max_in_flight = max_in_flight
+        self.space_max_in_flight = space_max_in_flight
+        self.user_rate = user_rate / 60
+        self.user_burst = user_burst
+        self.space_rate = space_rate / 60
+        self.space_burst = space_burst
+        self.max_backlog = max_backlog
+        self.max_queued_per_user = max_queued_per_user
+        self.max_wait = max_wait
+
+        self._user_buckets = LRUCache(maxsize=10000)
+        self._space_buckets = LRUCache(maxsize=10000)
+        self._weights: Dict[str, float] = {}
+        self._in_flight = 0
+        self._space_in_flight: Dict[str, int] = {}
+        self._waiting: List[_Waiter] = []  # sorted by (tag, seq)
+        self._queued_per_user: Dict[str, int] = {}
+        self._user_tags = LRUCache(maxsize=10000)  # user_id -> last virtual finish tag
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0}
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def backlog(self) -> int:
+        return len(self._waiting)
+
+    def set_user_weight(self, user_id: str, weight: float):
+        """Give a user a larger (or smaller) share of the queue; default 1."""
+        self._weights[user_id] = weight
+
+    def _bucket(self, buckets: LRUCache, key: str, rate: float, burst: float, now: float) -> TokenBucket:
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate, burst, now)
+            buckets[key] = bucket
+        return bucket
+
+    def _can_admit(self, user_id: str, space_id: str, now: float) -> bool:
+        if self._in_flight >= self.max_in_flight:
+            return False
+        if self._space_in_flight.get(space_id, 0) >= self.space_max_in_flight:
+            return False
+        user_bucket = self._bucket(self._user_buckets, user_id, self.user_rate, self.user_burst, now)
+        space_bucket = self._bucket(self._space_buckets, space_id, self.space_rate, self.space_burst, now)
+        return user_bucket.ready(now) and space_bucket.ready(now)
+
+    def _admit(self, user_id: str, space_id: str, now: float):
+        self._user_buckets[user_id].take(now)
+        self._space_buckets[space_id].take(now)
+        self._in_flight += 1
+        self._space_in_flight[space_id] = self._space_in_flight.get(space_id, 0) + 1
+        self.stats["admitted"] += 1
+
+    def release(self, space_id: str):
+        """Return the slot of a finished question and admit waiting ones."""
+        self._in_flight -= 1
+        remaining = self._space_in_flight.get(space_id, 1) - 1
+        if remaining > 0:
+            self._space_in_flight[space_id] = remaining
+        else:
+            self._space_in_flight.pop(space_id, None)
+        self._dispatch()
+
+    def _remove(self, waiter: _Waiter):
+        index = bisect.bisect_left(self._waiting, waiter)
+        if index < len(self._waiting) and self._waiting[index] is waiter:
+            del self._waiting[index]
+            count = self._queued_per_user.get(waiter.user_id, 1) - 1
+            if count > 0:
+                self._queued_per_user[waiter.user_id] = count
+            else:
+                self._queued_per_user.pop(waiter.user_id, None)
+
+    def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        # Walk the queue in fair order, skipping waiters whose user or space
+        # is currently limited so they do not block everyone behind them
+        index = 0
+        while index < len(self._waiting) and self._in_flight < self.max_in_flight:
+            waiter = self._waiting[index]
+            if waiter.future.done():
+                self._remove(waiter)
+                continue
+            if not self._can_admit(waiter.user_id, waiter.space_id, now):
+                index += 1
+                continue
+            self._remove(waiter)
+            self._admit(waiter.user_id, waiter.space_id, now)
+            self._virtual_time = max(self._virtual_time, waiter.tag)
+            waiter.future.set_result(None)
+        self._report_positions()
+        self._schedule_retry(now)
+
+    def _schedule_retry(self, now: float):
+        # Waiters held back only by empty buckets need a wake-up when tokens refill
+        if self._timer is not None or not self._waiting or self._in_flight >= self.max_in_flight:
+            return
+        delays = []
+        for waiter in self._waiting:
+            if self._space_in_flight.get(waiter.space_id, 0) >= self.space_max_in_flight:
+                continue
+            user_bucket = self._bucket(self._user_buckets, waiter.user_id, self.user_rate, self.user_burst, now)
+            space_bucket = self._bucket(self._space_buckets, waiter.space_id, self.space_rate, self.space_burst, now)
+            delays.append(max(user_bucket.wait_time(now), space_bucket.wait_time(now)))
+        if delays:
+            self._timer = asyncio.get_running_loop().call_later(min(delays), self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def _report_positions(self):
+        for position, waiter in enumerate(self._waiting, start=1):
+            if waiter.position != position and waiter.on_position is not None:
+                waiter.position = position
+                try:
+                    waiter.on_position(position)
+                except Exception as e:
+                    print(f"Error reporting queue position: {e}")
+
+    async def acquire(self, user_id: str, space_id: str, on_position: Optional[Callable[[int], None]] = None):
+        """
+        Wait until a question may be sent to Genie.
+
+        Args:
+            user_id: Slack user asking
+            space_id: Genie space asked
+            on_position: Called with the 1-based queue position whenever it
+                changes while the question waits; must not block
+
+        Raises:
+            AdmissionRejected: If the question is shed
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if not self._waiting and self._can_admit(user_id, space_id, now):
+            self._admit(user_id, space_id, now)
+            return
+
+        if len(self._waiting) >= self.max_backlog:
+            self.stats["rejected"] += 1
+            raise AdmissionRejected("Genie is very busy right now. Please try again in a few minutes.")
+        if self._queued_per_user.get(user_id, 0) >= self.max_queued_per_user:
+            self.stats["rejected"] += 1
+            raise AdmissionRejected("You already have several questions waiting for Genie. Please wait for those to finish.")
+
+        weight = self._weights.get(user_id, 1.0)
+        tag = max(self._virtual_time, self._user_tags.get(user_id, 0.0)) + 1 / weight
+        self._user_tags[user_id] = tag
+        waiter = _Waiter(user_id, space_id, tag, next(self._seq), loop.create_future(), on_position)
+        bisect.insort(self._waiting, waiter)
+        self._queued_per_user[user_id] = self._queued_per_user.get(user_id, 0) + 1
+        self.stats["queued"] += 1
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait)
+        except asyncio.TimeoutError:
+            self._remove(waiter)
+            if waiter.future.done():
+                self.release(space_id)  # admitted just as the wait ran out
+            waiter.future.cancel()
+            self.stats["timed_out"] += 1
+            self._report_positions()
+            raise AdmissionRejected("Genie is busy and your question waited too long. Please try again.")
+        except asyncio.CancelledError:
+            self._remove(waiter)
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(space_id)
+            waiter.future.cancel()
+            self._report_positions()
+            raise
+
+    @asynccontextmanager
+    async def admit(self, user_id: str, space_id: str, on_position: Optional[Callable[[int], None]] = None):
+        """
+        Hold an admission slot for the duration of the block.
+
+        Args:
+            user_id: Slack user asking
+            space_id: Genie space asked
+            on_position: See ``acquire``
+
+        Raises:
+            AdmissionRejected: If the question is shed
+        """
+        await self.acquire(user_id, space_id, on_position)
+        try:
+            yield
+        finally:
+            self.release(space_id)
+
+
+genie_admission = AdmissionController()
@@ -0,0 +1,210 @@
+"""Opt-in cache of Genie answers keyed by space and normalized question."""
+import os
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+from cachetools import LRUCache
+
+ANSWER_CACHE_ENABLED = os.environ.get("ANSWER_CACHE_ENABLED") == "true"
+ANSWER_CACHE_TTL = float(os.environ.get("ANSWER_CACHE_TTL", "900"))
+ANSWER_CACHE_SIZE = int(os.environ.get("ANSWER_CACHE_SIZE", "1000"))
+# Per-space overrides, e.g. "space_a=3600,space_b=0" (0 disables caching)
+ANSWER_CACHE_SPACE_TTLS = os.environ.get("ANSWER_CACHE_SPACE_TTLS", "")
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n?!.,;:"
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalize a question so trivially different phrasings share a cache key.
+
+    Unicode is NFKC-normalized and case-folded, whitespace is collapsed and
+    punctuation at either end is dropped, so "Revenue last week?" and
+    "revenue  last week" match.
+
+    Args:
+        question: Question text as typed in Slack
+
+    Returns:
+        str: The cache key text
+    """
+    text = unicodedata.normalize("NFKC", question).casefold()
+    return _WHITESPACE.sub(" ", text).strip(_EDGE_PUNCTUATION)
+
+
+def _parse_space_ttls(value: str) -> Dict[str, float]:
+    ttls = {}
+    for item in value.split(","):
+        if "=" in item:
+            space_id, ttl = item.split("=", 1)
+            ttls[space_id.strip()] = float(ttl)
+    return ttls
+
+
+@dataclass
+class CachedAnswer:
+    """
+    A cached Genie answer.
+
+    Attributes:
+        text: Formatted answer text
+        sql: Generated SQL, if any
+        space_id: Genie space the answer belongs to
+        conversation_id: Genie conversation the answer came from
+        message_id: Genie message the answer came from (for feedback)
+        cached_at: Epoch seconds when the answer was produced
+    """
+    text: str
+    sql: Optional[str]
+    space_id: str
+    conversation_id: str
+    message_id: str
+    cached_at: float
+
+    def marked_text(self) -> str:
+        """Answer text with a "cached as of" marker in the reader's timezone."""
+        fallback = time.strftime("%Y-%m-%d %H:%M UTC", time.gmtime(self.cached_at))
+        marker = f"<!date^{int(self.cached_at)}^{{date_short_pretty}} at {{time}}|{fallback}>"
+        return f"{self.text}\n_Cached answer as of {marker}_"
+
+
+class AnswerCache:
+    """
+    Answers to first questions in a thread, keyed by (space_id, normalized question).
+
+    Entries live in a size-bounded in-memory LRU and, when a store is
+    configured (Lakebase in production), in a shared table so every app
+    instance benefits. Freshness is decided at read time from each space's
+    TTL, so changing a TTL applies to existing entries too.
+
+    Attributes:
+        enabled: Whether lookups and writes do anything
+        ttl: Default freshness in seconds
+        maxsize: Maximum entries kept in memory
+    """
+
+    def __init__(
+        self,
+        enabled: bool = ANSWER_CACHE_ENABLED,
+        ttl: float = ANSWER_CACHE_TTL,
+        maxsize: int = ANSWER_CACHE_SIZE,
+        space_ttls: Optional[Dict[str, float]] = None
+    ):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._space_ttls = dict(space_ttls or {})
+        self._memory = LRUCache(maxsize=max(maxsize, 1))
+        self._lock = threading.Lock()
+        self._store_get: Optional[Callable[..., Awaitable[Optional[Dict]]]] = None
+        self._store_set: Optional[Callable[..., Awaitable[None]]] = None
+        self.hits = 0
+        self.misses = 0
+
+    def use_store(self, get_answer: Callable, set_answer: Callable):
+        """
+        Back the cache with a shared store.
+
+        Args:
+            get_answer: ``async (space_id, question_key, max_age) -> dict | None``
+            set_answer: ``async (space_id, question_key, record) -> None``
+        """
+        self._store_get = get_answer
+        self._store_set = set_answer
+
+    def set_space_ttl(self, space_id: str, ttl: float):
+        """Override the TTL for one space; 0 disables caching for it."""
+        self._space_ttls[space_id] = ttl
+
+    def get_space_ttl(self, space_id: str) -> float:
+        return self._space_ttls.get(space_id, self.ttl)
+
+    async def get(self, space_id: str, question: str) -> Optional[CachedAnswer]:
+        """
+        Look up a fresh answer.
+
+        Args:
+            space_id: Genie space/room ID
+            question: Question text as typed
+
+        Returns:
+            CachedAnswer or None
+        """
+        ttl = self.get_space_ttl(space_id)
+        if not self.enabled or ttl <= 0:
+            return None
+        key = (space_id, normalize_question(question))
+        with self._lock:
+            answer = self._memory.get(key)
+        if answer is not None and time.time() - answer.cached_at <= ttl:
+            self.hits += 1
+            return answer
+        answer = None
+        if self._store_get is not None:
+            record = await self._store_get(space_id, key[1], ttl)
+            if record is not None:
+                answer = CachedAnswer(space_id=space_id, **record)
+                with self._lock:
+                    self._memory[key] = answer
+        if answer is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return answer
+
+    async def set(
+        self,
+        space_id: str,
+        question: str,
+        text: str,
+        sql: Optional[str],
+        conversation_id: str,
+        message_id: str
+    ):
+        """
+        Cache an answer.
+
+        Args:
+            space_id: Genie space/room ID
+            question: Question text as typed
+            text: Formatted answer text
+            sql: Generated SQL, if any
+            conversation_id: Genie conversation ID of the answer
+            message_id: Genie message ID of the answer
+        """
+        if not self.enabled or self.get_space_ttl(space_id) <= 0:
+            return
+        key = (space_id, normalize_question(question))
+        answer = CachedAnswer(text, sql, space_id, conversation_id, message_id, time.time())
+        with self._lock:
+            self._memory[key] = answer
+        if self._store_set is not None:
+            await self._store_set(space_id, key[1], {
+                "text": text,
+                "sql": sql,
+                "conversation_id": conversation_id,
+                "message_id": message_id
+            })
+
+    def stats(self) -> Dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict with size, hits, misses and hit_rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+answer_cache = AnswerCache(space_ttls=_parse_space_ttls(ANSWER_CACHE_SPACE_TTLS))
@@ -1,6 +1,35 @@
+import asyncio
 import os
-from databricks.sdk import WorkspaceClient
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from config.workspace import LazyService
 
-# Initialize WorkspaceClient and Genie service here
-w = WorkspaceClient()
-genie = w.genie
\ No newline at end of file
+# Genie and SQL statement services of the shared WorkspaceClient, which is
+# created on the first call rather than at import
+genie = LazyService("genie")
+statement_execution = LazyService("statement_execution")
+
+# The Databricks SDK is synchronous, so every Genie call is offloaded to a
+# bounded thread pool. The pool size caps how many Genie requests can be in
+# flight at once across all Slack threads.
+GENIE_MAX_CONCURRENCY = int(os.environ.get("GENIE_MAX_CONCURRENCY", "16"))
+_genie_executor = ThreadPoolExecutor(
+    max_workers=GENIE_MAX_CONCURRENCY,
+    thread_name_prefix="genie"
+)
+
+
+async def run_genie(func, *args, **kwargs):
+    """
+    Run a blocking Genie SDK call without blocking the event loop.
+
+    Args:
+        func: Genie SDK method to call, e.g. ``genie.get_message``
+        *args: Positional arguments for ``func``
+        **kwargs: Keyword arguments for ``func``
+
+    Returns:
+        Whatever ``func`` returns
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_genie_executor, partial(func, *args, **kwargs))
@@ -0,0 +1,81 @@
+"""Single-flight coalescing of identical in-flight Genie questions."""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, Type
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time.
+
+    The first caller for a key (the leader) runs the call; callers arriving
+    while it is in flight wait for the same result instead of starting their
+    own. The key is forgotten as soon as the call finishes, so later callers
+    start a fresh call. Errors are shared like results, except those the
+    leader marks as its own (``unshared``). If the leader is cancelled or
+    fails with such an error, a waiting follower takes over and runs the call
+    itself.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[Any]],
+        unshared: Tuple[Type[BaseException], ...] = ()
+    ) -> Tuple[Any, bool]:
+        """
+        Run ``func`` unless a call for ``key`` is already in flight.
+
+        Args:
+            key: Identity of the call
+            func: Coroutine function to run as the leader
+            unshared: Errors that concern the leader only (e.g. its own rate
+                limit); followers retry instead of receiving them
+
+        Returns:
+            Tuple of (result, shared) where shared is True for followers
+        """
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                break
+            self.followers += 1
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    continue  # the leader was cancelled (or failed on its own), not us: retry
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.leaders += 1
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except unshared:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # followers re-raise it; avoid "never retrieved" warnings
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+
+# First questions in new threads, keyed by (space_id, normalized question)
+genie_singleflight = SingleFlight()
@@ -0,0 +1,213 @@
+"""Shared background poller for all in-flight Genie messages."""
+import asyncio
+import heapq
+import itertools
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+from genie_integration.client import genie, run_genie
+from genie_integration.polling import (
+    COMPLETED_STATUS,
+    FAILED_STATUSES,
+    PollingStrategy,
+    get_polling_strategy,
+    polling_stats
+)
+from monitoring.metrics import GENIE_STATUS, stage
+
+MessageKey = Tuple[str, str, str]  # (space_id, conversation_id, message_id)
+
+
+class _InFlight:
+    """State for one Genie message being polled."""
+
+    def __init__(self, key: MessageKey, future: asyncio.Future, strategy: PollingStrategy, started: float):
+        self.key = key
+        self.future = future
+        self.strategy = strategy
+        self.started = started
+        self.deadline = started + strategy.deadline
+        self.polls = 0
+        self.attempt = 0  # polls made since the status last changed
+        self.last_status = None
+        self.listeners: List[Callable] = []  # called with the message on status changes
+
+
+class GeniePoller:
+    """
+    Single background task that polls every in-flight Genie message.
+
+    Messages are registered with ``wait`` and their status checks are
+    scheduled on one timer heap. Checks are issued under a global rate budget
+    of ``max_qps`` get_message calls per second, so Genie API load stays
+    bounded no matter how many questions are in flight. Each message
+    resolves an asyncio future when it reaches a terminal status.
+    """
+
+    def __init__(self, max_qps: float = 20.0):
+        self.max_qps = max_qps
+        self._entries: Dict[MessageKey, _InFlight] = {}
+        self._timers = []  # heap of (due_time, seq, key)
+        self._seq = itertools.count()
+        self._tokens = max_qps
+        self._tokens_updated = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._checks = set()  # running _check tasks; the loop only keeps weak references
+        self._loop = None
+
+    @property
+    def in_flight(self) -> int:
+        """Number of messages currently being polled."""
+        return len(self._entries)
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._tokens_updated = loop.time()
+            self._task = loop.create_task(self._run())
+
+    def _schedule(self, entry: _InFlight, due: float):
+        heapq.heappush(self._timers, (due, next(self._seq), entry.key))
+        self._wakeup.set()
+
+    async def wait(
+        self,
+        space_id: str,
+        conversation_id: str,
+        message_id: str,
+        started: Optional[float] = None,
+        on_status: Optional[Callable] = None
+    ):
+        """
+        Wait for a Genie message to reach a terminal status.
+
+        Registering a message that is already being polled attaches to the
+        existing poll instead of starting a second one.
+
+        Args:
+            space_id: Genie space/room ID
+            conversation_id: Genie conversation ID
+            message_id: Genie message ID
+            started: Loop time the question was sent, for latency stats
+            on_status: Called with the GenieMessage whenever its status
+                changes while in progress; must not block
+
+        Returns:
+            GenieMessage: The completed message
+
+        Raises:
+            LookupError: If Genie failed to answer
+            TimeoutError: If the strategy deadline passed first
+        """
+        self._ensure_running()
+        key = (space_id, conversation_id, message_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            strategy = get_polling_strategy(space_id)
+            entry = _InFlight(key, loop.create_future(), strategy, started or now)
+            self._entries[key] = entry
+            self._schedule(entry, now + strategy.initial_delay)
+        if on_status is not None:
+            entry.listeners.append(on_status)
+        # Shield so one cancelled waiter does not cancel the shared poll
+        return await asyncio.shield(entry.future)
+
+    def _take_token(self, now: float) -> bool:
+        elapsed = now - self._tokens_updated
+        self._tokens = min(self.max_qps, self._tokens + elapsed * self.max_qps)
+        self._tokens_updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup.clear()
+            if not self._timers:
+                await self._wakeup.wait()
+                continue
+
+            now = loop.time()
+            due = self._timers[0][0]
+            if due > now:
+                await self._sleep(due - now)
+                continue
+
+            if not self._take_token(now):
+                await self._sleep(1 / self.max_qps)
+                continue
+
+            _, _, key = heapq.heappop(self._timers)
+            entry = self._entries.get(key)
+            if entry is not None:
+                check = loop.create_task(self._check(entry))
+                self._checks.add(check)
+                check.add_done_callback(self._checks.discard)
+
+    async def _sleep(self, timeout: float):
+        # Wake early if a new message with an earlier due time is registered
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _finish(self, entry: _InFlight, outcome: str, result=None, error: Exception = None):
+        self._entries.pop(entry.key, None)
+        elapsed = self._loop.time() - entry.started
+        polling_stats.record(outcome, elapsed, entry.polls)
+        if entry.future.done():
+            return
+        if error is not None:
+            entry.future.set_exception(error)
+        else:
+            print(f"Genie message {entry.key[2]} completed in {elapsed:.2f}s after {entry.polls} polls")
+            entry.future.set_result(result)
+
+    def _notify(self, entry: _InFlight, message):
+        for listener in entry.listeners:
+            try:
+                listener(message)
+            except Exception as e:
+                print(f"Error in Genie status listener: {e}")
+
+    async def _check(self, entry: _InFlight):
+        try:
+            with stage("genie_poll"):
+                message = await run_genie(genie.get_message, *entry.key)
+        except Exception as e:
+            GENIE_STATUS.inc(status="ERROR")
+            self._finish(entry, "failed", error=e)
+            return
+
+        entry.polls += 1
+        status = message.status.value
+        GENIE_STATUS.inc(status=status)
+        if status == COMPLETED_STATUS:
+            self._finish(entry, "completed", result=message)
+            return
+        if status in FAILED_STATUSES:
+            self._finish(entry, "failed", error=LookupError("Genie failed to return a response"))
+            return
+
+        if status != entry.last_status:
+            entry.last_status = status
+            entry.attempt = 0
+            self._notify(entry, message)
+        wait = entry.strategy.next_delay(entry.attempt, status)
+        entry.attempt += 1
+
+        due = self._loop.time() + wait
+        if due > entry.deadline:
+            self._finish(entry, "timeout", error=TimeoutError("Genie did not return a response"))
+            return
+        self._schedule(entry, due)
+
+
+genie_poller = GeniePoller(max_qps=float(os.environ.get("GENIE_POLL_MAX_QPS", "20")))
@@ -0,0 +1,174 @@
+"""Polling strategies and latency stats for waiting on Genie messages."""
+import os
+import random
+import threading
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+# Statuses that end polling
+COMPLETED_STATUS = "COMPLETED"
+FAILED_STATUSES = ("FAILED", "CANCELLED", "QUERY_RESULT_EXPIRED")
+
+# Per-status (min, max) delay bounds in seconds. Warehouse start-up can take
+# minutes, so there is no point polling it quickly; once a query is executing
+# the answer is usually close, so the delay is capped low.
+DEFAULT_STATUS_BOUNDS = {
+    "PENDING_WAREHOUSE": (3.0, 10.0),
+    "EXECUTING_QUERY": (0.5, 2.0),
+}
+
+
+class PollingStrategy:
+    """
+    Exponential backoff with jitter for Genie message polling.
+
+    The backoff restarts from ``initial_delay`` whenever the message status
+    changes, since each Genie stage has its own typical duration.
+
+    Attributes:
+        initial_delay: Delay before the second poll of a stage, in seconds
+        multiplier: Growth factor applied per poll within a stage
+        max_delay: Upper bound for any single delay, in seconds
+        jitter: Fraction of the delay randomized (+/-) to spread out polls
+        deadline: Overall time budget for one message, in seconds
+        status_bounds: Dict of status -> (min, max) delay overrides
+    """
+
+    def __init__(
+        self,
+        initial_delay: float = 0.5,
+        multiplier: float = 1.6,
+        max_delay: float = 5.0,
+        jitter: float = 0.2,
+        deadline: float = 120.0,
+        status_bounds: Optional[Dict[str, Tuple[float, float]]] = None
+    ):
+        self.initial_delay = initial_delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.deadline = deadline
+        self.status_bounds = DEFAULT_STATUS_BOUNDS if status_bounds is None else status_bounds
+
+    def next_delay(self, attempt: int, status: str) -> float:
+        """
+        Compute the delay before the next poll.
+
+        Args:
+            attempt: Number of polls already made in the current status
+            status: Latest Genie message status
+
+        Returns:
+            float: Seconds to wait before polling again
+        """
+        delay = min(self.initial_delay * (self.multiplier ** attempt), self.max_delay)
+        low, high = self.status_bounds.get(status, (0.0, self.max_delay))
+        delay = min(max(delay, low), high)
+        if self.jitter:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(delay, 0.0)
+
+
+def strategy_from_env() -> PollingStrategy:
+    """Build the default polling strategy from GENIE_POLL_* environment variables."""
+    return PollingStrategy(
+        initial_delay=float(os.environ.get("GENIE_POLL_INITIAL_DELAY", "0.5")),
+        multiplier=float(os.environ.get("GENIE_POLL_MULTIPLIER", "1.6")),
+        max_delay=float(os.environ.get("GENIE_POLL_MAX_DELAY", "5")),
+        jitter=float(os.environ.get("GENIE_POLL_JITTER", "0.2")),
+        deadline=float(os.environ.get("GENIE_POLL_DEADLINE", "120")),
+    )
+
+
+_default_strategy = strategy_from_env()
+_space_strategies: Dict[str, PollingStrategy] = {}
+
+
+def set_polling_strategy(space_id: str, strategy: Optional[PollingStrategy]):
+    """
+    Register a polling strategy for a Genie space.
+
+    Args:
+        space_id: Genie space/room ID
+        strategy: Strategy to use, or None to fall back to the default
+    """
+    if strategy is None:
+        _space_strategies.pop(space_id, None)
+    else:
+        _space_strategies[space_id] = strategy
+
+
+def get_polling_strategy(space_id: str) -> PollingStrategy:
+    """
+    Get the polling strategy for a Genie space.
+
+    Args:
+        space_id: Genie space/room ID
+
+    Returns:
+        PollingStrategy: The space's strategy, or the default one
+    """
+    return _space_strategies.get(space_id, _default_strategy)
+
+
+def _percentile(values, pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+class PollingStats:
+    """
+    Rolling stats on time-to-result and polls per answer.
+
+    Keeps the most recent ``window`` samples for percentiles plus running
+    totals per outcome.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._durations = deque(maxlen=window)
+        self._polls = deque(maxlen=window)
+        self.outcomes = {"completed": 0, "failed": 0, "timeout": 0}
+        self.total_polls = 0
+
+    def record(self, outcome: str, duration: float, polls: int):
+        """
+        Record one finished wait.
+
+        Args:
+            outcome: "completed", "failed" or "timeout"
+            duration: Seconds from the start request to the final poll
+            polls: Number of get_message calls made
+        """
+        with self._lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            self.total_polls += polls
+            if outcome == "completed":
+                self._durations.append(duration)
+                self._polls.append(polls)
+
+    def summary(self) -> Dict:
+        """
+        Get a snapshot of the collected stats.
+
+        Returns:
+            Dict with outcome counts, total polls and p50/p95 of
+            time-to-result and polls per answer
+        """
+        with self._lock:
+            durations = list(self._durations)
+            polls = list(self._polls)
+            return {
+                "outcomes": dict(self.outcomes),
+                "total_polls": self.total_polls,
+                "time_to_result_p50": _percentile(durations, 50),
+                "time_to_result_p95": _percentile(durations, 95),
+                "polls_per_answer_p50": _percentile(polls, 50),
+                "polls_per_answer_p95": _percentile(polls, 95),
+            }
+
+
+polling_stats = PollingStats()
@@ -0,0 +1,215 @@
+"""Size-bounded, streaming rendering of Genie query results for Slack."""
+import asyncio
+import csv
+import io
+import os
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Iterable, List, Optional
+
+# Budget for the table shown inline in the Slack message
+GENIE_RESULT_MAX_ROWS = int(os.environ.get("GENIE_RESULT_MAX_ROWS", "50"))
+GENIE_RESULT_MAX_CHARS = int(os.environ.get("GENIE_RESULT_MAX_CHARS", "12000"))
+# Column widths are computed from the header and the first rows only
+GENIE_RESULT_WIDTH_SAMPLE = int(os.environ.get("GENIE_RESULT_WIDTH_SAMPLE", "100"))
+GENIE_RESULT_MAX_CELL_WIDTH = int(os.environ.get("GENIE_RESULT_MAX_CELL_WIDTH", "60"))
+# Results that do not fit inline are attached as a CSV file up to this size
+GENIE_RESULT_FILE_MAX_BYTES = int(os.environ.get("GENIE_RESULT_FILE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+
+@dataclass
+class FormattedResponse:
+    """
+    A Genie answer ready to post to Slack.
+
+    Attributes:
+        text: Message text (Genie's text, query description, table, SQL)
+        sql: Generated SQL, if any
+        file_content: Full result as CSV when it did not fit in the message
+        file_name: File name for ``file_content``
+        file_title: Title shown for the uploaded file
+        file_loader: Coroutine function that fills in the file fields once
+            the rest of the result has been fetched (set when the text was
+            built before reading the whole result)
+    """
+    text: str
+    sql: Optional[str] = None
+    file_content: Optional[bytes] = None
+    file_name: Optional[str] = None
+    file_title: Optional[str] = None
+    file_loader: Optional[Callable[["FormattedResponse"], Awaitable[None]]] = None
+    _file_task: Optional[asyncio.Task] = field(default=None, repr=False, compare=False)
+
+    async def load_file(self):
+        """
+        Finish fetching the CSV export if it is still pending.
+
+        Safe to call from several tasks (e.g. coalesced replies sharing one
+        response): the export is fetched once and every caller waits for it.
+        """
+        if self.file_loader is not None and self._file_task is None:
+            self._file_task = asyncio.ensure_future(self.file_loader(self))
+        if self._file_task is not None:
+            await asyncio.shield(self._file_task)
+
+
+def _cell(value) -> str:
+    text = str(value)
+    if len(text) > GENIE_RESULT_MAX_CELL_WIDTH:
+        text = text[:GENIE_RESULT_MAX_CELL_WIDTH - 1] + "…"
+    return text
+
+
+class TableRenderer:
+    """
+    Incrementally renders result rows as a fixed-width text table.
+
+    Rows are fed in chunks with ``feed``. The first ``sample_size`` rows are
+    buffered to size the columns; after that each row is formatted and
+    dropped, so memory stays bounded by the inline budget no matter how large
+    the result is. Rows past the inline budget are only written to a CSV
+    buffer (itself capped), which is attached when the table is truncated.
+
+    Attributes:
+        columns: Column names
+        total_rows: Total row count if known up front (used in the footer)
+    """
+
+    def __init__(
+        self,
+        columns: List[str],
+        total_rows: Optional[int] = None,
+        max_rows: int = GENIE_RESULT_MAX_ROWS,
+        max_chars: int = GENIE_RESULT_MAX_CHARS,
+        sample_size: int = GENIE_RESULT_WIDTH_SAMPLE,
+        file_max_bytes: int = GENIE_RESULT_FILE_MAX_BYTES
+    ):
+        self.columns = columns
+        self.total_rows = total_rows
+        self.max_rows = max_rows
+        self.max_chars = max_chars
+        self.sample_size = max(sample_size, 1)
+        self.file_max_bytes = file_max_bytes
+
+        self.rows_seen = 0
+        self.file_rows = 0
+        self._widths = None
+        self._sample = []
+        self._lines = []
+        self._chars = 0
+        self._table_full = False
+
+        self._csv_buffer = io.StringIO()
+        self._csv = csv.writer(self._csv_buffer)
+        self._csv.writerow(columns)
+        self._file_full = file_max_bytes <= 0
+
+    @property
+    def shown_rows(self) -> int:
+        return len(self._lines)
+
+    @property
+    def table_full(self) -> bool:
+        """Whether the inline table has reached its budget."""
+        return self._table_full
+
+    @property
+    def needs_more(self) -> bool:
+        """Whether feeding more rows can still change the output."""
+        return not self._table_full or not self._file_full
+
+    def feed(self, rows: Iterable[list]) -> bool:
+        """
+        Consume a chunk of rows.
+
+        Args:
+            rows: Result rows (lists of cell values)
+
+        Returns:
+            bool: Whether more rows are still useful (see ``needs_more``)
+        """
+        for row in rows:
+            self.rows_seen += 1
+            if not self._file_full:
+                self._csv.writerow(row)
+                self.file_rows += 1
+                if self._csv_buffer.tell() > self.file_max_bytes:
+                    self._file_full = True
+            if not self._table_full:
+                if self._widths is None:
+                    self._sample.append(row)
+                    if len(self._sample) >= self.sample_size:
+                        self._flush_sample()
+                else:
+                    self._add_line(row)
+            if not self.needs_more:
+                break
+        return self.needs_more
+
+    def _flush_sample(self):
+        widths = [len(col) for col in self.columns]
+        for row in self._sample:
+            for i, cell in enumerate(row):
+                widths[i] = max(widths[i], len(_cell(cell)))
+        self._widths = widths
+        sample, self._sample = self._sample, []
+        for row in sample:
+            if self._table_full:
+                break
+            self._add_line(row)
+
+    def _add_line(self, row: list):
+        line = " | ".join(_cell(cell).ljust(self._widths[i]) for i, cell in enumerate(row))
+        if len(self._lines) >= self.max_rows or self._chars + len(line) + 1 > self.max_chars:
+            self._table_full = True
+            return
+        self._lines.append(line)
+        self._chars += len(line) + 1
+
+    @property
+    def truncated(self) -> bool:
+        total = self.total_rows if self.total_rows is not None else self.rows_seen
+        return self._table_full or self.shown_rows < total
+
+    def render(self) -> str:
+        """
+        Build the table text, with a footer when not all rows are shown.
+
+        Returns:
+            str: The table wrapped in a code block
+        """
+        if self._widths is None:
+            self._flush_sample()
+        # Create the header row
+        header = " | ".join(col.ljust(self._widths[i]) for i, col in enumerate(self.columns))
+        # Create a separator row
+        separator = "-|-".join("-" * self._widths[i] for i in range(len(self.columns)))
+        # Wrap the table in triple backticks to format as a code block
+        table_text = "```\n" + "\n".join([header, separator] + self._lines) + "\n```"
+        if self.truncated:
+            if self.total_rows is not None:
+                table_text += f"\n_Showing {self.shown_rows} of {self.total_rows} rows_"
+            else:
+                table_text += f"\n_Showing the first {self.shown_rows} rows_"
+        return table_text
+
+    @property
+    def file_content_available(self) -> bool:
+        return self.truncated and self.file_max_bytes > 0
+
+    def file_content(self) -> Optional[bytes]:
+        """
+        Get the CSV export when the inline table is truncated.
+
+        Returns:
+            CSV bytes, or None if the whole result fits in the message
+        """
+        if not self.file_content_available:
+            return None
+        return self._csv_buffer.getvalue().encode("utf-8")
+
+    def file_title(self) -> str:
+        """Title for the CSV export, noting when it was cut off at the size cap."""
+        total = self.total_rows if self.total_rows is not None else self.rows_seen
+        if self.file_rows < total:
+            return f"Query result (first {self.file_rows} of {total} rows)"
+        return f"Query result ({self.file_rows} rows)"
@@ -0,0 +1,113 @@
+"""Lazy, chunk-by-chunk fetching of Genie query attachment results."""
+import asyncio
+from typing import AsyncIterator, List, Optional
+
+import aiohttp
+from databricks.sdk.service.sql import ExternalLink, ResultData, StatementResponse
+from genie_integration.client import run_genie, statement_execution
+from monitoring.metrics import stage
+
+# Seconds allowed for downloading one external link chunk
+EXTERNAL_LINK_TIMEOUT = 60
+
+
+class QueryResultFetcher:
+    """
+    Walks the chunks of a statement result as an async generator.
+
+    The first chunk comes inline with the Genie query result. Later chunks
+    are fetched by index from the statement execution API (inline
+    ``data_array``) or downloaded from their pre-signed external links. While
+    the caller processes one chunk, the next one is already being fetched,
+    and nothing past the chunk the caller stops at is requested.
+
+    Attributes:
+        statement: Statement response of the Genie query attachment
+        prefetch: Whether to fetch the next chunk while the current one is consumed
+    """
+
+    def __init__(self, statement: StatementResponse, prefetch: bool = True):
+        self.statement = statement
+        self.prefetch = prefetch
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def columns(self) -> List[str]:
+        return [col.name for col in self.statement.manifest.schema.columns]
+
+    @property
+    def total_rows(self) -> Optional[int]:
+        return self.statement.manifest.total_row_count
+
+    async def _download_link(self, link: ExternalLink) -> List[list]:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=EXTERNAL_LINK_TIMEOUT)
+            )
+        # Pre-signed URLs must not get the workspace auth header
+        with stage("result_download"):
+            async with self._session.get(link.external_link, headers=link.http_headers) as response:
+                response.raise_for_status()
+                return await response.json(content_type=None)
+
+    async def _fetch_rows(self, data: ResultData) -> List[list]:
+        if data.external_links:
+            rows = []
+            for link in data.external_links:
+                rows.extend(await self._download_link(link))
+            return rows
+        return data.data_array or []
+
+    async def _fetch_chunk(self, chunk_index: int) -> ResultData:
+        with stage("result_chunk"):
+            return await run_genie(
+                statement_execution.get_statement_result_chunk_n,
+                self.statement.statement_id,
+                chunk_index
+            )
+
+    async def _load(self, data: ResultData):
+        """Fetch a chunk's rows; returns (rows, next chunk index)."""
+        rows = await self._fetch_rows(data)
+        next_index = data.next_chunk_index
+        if data.external_links:
+            next_index = data.external_links[-1].next_chunk_index
+        return rows, next_index
+
+    async def _load_index(self, chunk_index: int):
+        return await self._load(await self._fetch_chunk(chunk_index))
+
+    async def chunks(self) -> AsyncIterator[List[list]]:
+        """
+        Yield result rows one chunk at a time.
+
+        Callers that stop early should ``aclose`` the generator, which cancels
+        any prefetch in flight.
+
+        Yields:
+            List of rows, each a list of cell values
+        """
+        pending: Optional[asyncio.Task] = None
+        try:
+            if self.statement.result is None:
+                return
+            rows, next_index = await self._load(self.statement.result)
+            while True:
+                if next_index is not None and self.prefetch:
+                    pending = asyncio.create_task(self._load_index(next_index))
+                yield rows
+                if next_index is None:
+                    return
+                if pending is not None:
+                    rows, next_index = await pending
+                    pending = None
+                else:
+                    rows, next_index = await self._load_index(next_index)
+        finally:
+            if pending is not None:
+                pending.cancel()
+                if pending.done() and not pending.cancelled():
+                    pending.exception()  # the caller stopped; the error is moot
+            if self._session is not None:
+                await self._session.close()
+                self._session = None
@@ -0,0 +1,100 @@
+"""Cached catalog of the Genie spaces visible to the app."""
+import asyncio
+import os
+import time
+from typing import List, Optional
+
+from databricks.sdk.service.dashboards import GenieSpace
+from genie_integration.client import genie, run_genie
+
+SPACE_CATALOG_TTL = float(os.environ.get("SPACE_CATALOG_TTL", "300"))
+SPACE_CATALOG_PAGE_SIZE = int(os.environ.get("SPACE_CATALOG_PAGE_SIZE", "100"))
+
+
+class SpaceCatalog:
+    """
+    All Genie spaces, fetched across every page and cached with a TTL.
+
+    Readers always get the cached list immediately; once the TTL has passed
+    a refresh is started in the background. If a refresh fails the previous
+    (stale) data keeps being served. Only the very first load waits on the
+    Genie API.
+
+    Attributes:
+        ttl: Seconds after which the cached list is refreshed
+        page_size: Spaces requested per list_spaces page
+    """
+
+    def __init__(self, ttl: float = SPACE_CATALOG_TTL, page_size: int = SPACE_CATALOG_PAGE_SIZE):
+        self.ttl = ttl
+        self.page_size = page_size
+        self.version = 0  # incremented on every successful refresh
+        self._spaces: Optional[List[GenieSpace]] = None
+        self._fetched_at = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_stale(self) -> bool:
+        return self._fetched_at is None or time.monotonic() - self._fetched_at > self.ttl
+
+    async def _fetch_all(self) -> List[GenieSpace]:
+        spaces = []
+        page_token = None
+        while True:
+            response = await run_genie(
+                genie.list_spaces,
+                page_size=self.page_size,
+                page_token=page_token
+            )
+            spaces.extend(response.spaces or [])
+            page_token = response.next_page_token
+            if not page_token:
+                return spaces
+
+    async def _refresh(self):
+        spaces = await self._fetch_all()
+        self._spaces = spaces
+        self._fetched_at = time.monotonic()
+        self.version += 1
+
+    def refresh(self) -> asyncio.Task:
+        """
+        Start a refresh unless one is already running.
+
+        Returns:
+            asyncio.Task: The running refresh
+        """
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh())
+            self._refresh_task.add_done_callback(self._log_refresh_error)
+        return self._refresh_task
+
+    def _log_refresh_error(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error refreshing Genie space catalog, serving cached data: {task.exception()}")
+
+    async def get_spaces(self) -> List[GenieSpace]:
+        """
+        Get all Genie spaces.
+
+        Returns:
+            List of GenieSpace
+        """
+        if self._spaces is None:
+            # Nothing to serve yet: wait for the first load (errors propagate)
+            await asyncio.shield(self.refresh())
+        elif self.is_stale:
+            self.refresh()
+        return self._spaces
+
+    async def run_refresh_loop(self):
+        """Background task that keeps the catalog warm, starting with a load now."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                pass  # already logged; keep serving the previous data
+            await asyncio.sleep(self.ttl)
+
+
+space_catalog = SpaceCatalog()
@@ -0,0 +1,155 @@
+"""In-memory search index over the Genie space catalog for the room picker."""
+import heapq
+import re
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import List, Optional
+
+from cachetools import LRUCache
+from databricks.sdk.service.dashboards import GenieSpace
+from genie_integration.space_catalog import space_catalog
+
+_TOKEN = re.compile(r"\w+")
+
+# Recently used spaces remembered per user
+RECENT_SPACES_PER_USER = 20
+
+
+def _tokenize(value: Optional[str]) -> List[str]:
+    return _TOKEN.findall(value.lower()) if value else []
+
+
+class SpaceIndex:
+    """
+    Prefix/token search over Genie space titles, descriptions and IDs.
+
+    Every token of every space is kept in one sorted list, so each query token
+    is answered with a binary search for its prefix range. A space matches
+    when every query token prefixes one of its tokens. Results list the
+    user's recently used spaces first, then title matches before
+    description-only matches, then alphabetically.
+    """
+
+    def __init__(self):
+        self.version = None  # catalog version the index was built from
+        self._spaces: List[GenieSpace] = []
+        self._titles: List[str] = []
+        self._title_tokens: List[set] = []
+        self._tokens: List[tuple] = []  # sorted (token, space index)
+        self._recent = LRUCache(maxsize=10000)  # user_id -> OrderedDict of space_id
+        self._lock = threading.Lock()
+
+    def build(self, spaces: List[GenieSpace], version=None):
+        """
+        Rebuild the index.
+
+        Args:
+            spaces: All Genie spaces
+            version: Catalog version the spaces come from
+        """
+        titles = []
+        title_tokens = []
+        tokens = set()
+        for i, space in enumerate(spaces):
+            title = space.title or space.space_id
+            titles.append(title.lower())
+            own = set(_tokenize(title))
+            title_tokens.append(own)
+            for token in own | set(_tokenize(space.description)) | set(_tokenize(space.space_id)):
+                tokens.add((token, i))
+        self._spaces = list(spaces)
+        self._titles = titles
+        self._title_tokens = title_tokens
+        self._tokens = sorted(tokens)
+        self.version = version
+
+    def _prefix_matches(self, prefix: str) -> set:
+        matches = set()
+        i = bisect_left(self._tokens, (prefix, -1))
+        while i < len(self._tokens) and self._tokens[i][0].startswith(prefix):
+            matches.add(self._tokens[i][1])
+            i += 1
+        return matches
+
+    def mark_used(self, user_id: str, space_id: str):
+        """
+        Record that a user picked a space, so it ranks first for them.
+
+        Args:
+            user_id: Slack user ID
+            space_id: Genie space ID
+        """
+        with self._lock:
+            recent = self._recent.get(user_id)
+            if recent is None:
+                recent = OrderedDict()
+                self._recent[user_id] = recent
+            recent.pop(space_id, None)
+            recent[space_id] = True
+            while len(recent) > RECENT_SPACES_PER_USER:
+                recent.popitem(last=False)
+
+    def search(self, query: str, user_id: Optional[str] = None, limit: int = 100) -> List[GenieSpace]:
+        """
+        Find spaces matching a query.
+
+        Args:
+            query: Free text typed by the user; empty matches everything
+            user_id: Slack user ID, to rank their recent spaces first
+            limit: Maximum number of results
+
+        Returns:
+            List of matching GenieSpace, best first
+        """
+        query_tokens = _tokenize(query)
+        if query_tokens:
+            candidates = None
+            for token in query_tokens:
+                matches = self._prefix_matches(token)
+                candidates = matches if candidates is None else candidates & matches
+                if not candidates:
+                    return []
+        else:
+            candidates = range(len(self._spaces))
+
+        with self._lock:
+            recent = list(self._recent.get(user_id) or ()) if user_id else []
+        recent_rank = {space_id: rank for rank, space_id in enumerate(reversed(recent))}
+        query_text = query.strip().lower()
+
+        def rank(i):
+            space = self._spaces[i]
+            title_hit = all(
+                any(own.startswith(token) for own in self._title_tokens[i])
+                for token in query_tokens
+            )
+            return (
+                recent_rank.get(space.space_id, len(recent_rank)),
+                not (query_text and self._titles[i].startswith(query_text)),
+                not title_hit,
+                self._titles[i]
+            )
+
+        return [self._spaces[i] for i in heapq.nsmallest(limit, candidates, key=rank)]
+
+
+space_index = SpaceIndex()
+
+
+async def search_spaces(query: str, user_id: Optional[str] = None, limit: int = 100) -> List[GenieSpace]:
+    """
+    Search the cached Genie space catalog, rebuilding the index if it changed.
+
+    Args:
+        query: Free text typed by the user
+        user_id: Slack user ID, to rank their recent spaces first
+        limit: Maximum number of results
+
+    Returns:
+        List of matching GenieSpace, best first
+    """
+    spaces = await space_catalog.get_spaces()
+    if space_index.version != space_catalog.version:
+        space_index.build(spaces, space_catalog.version)
+    return space_index.search(query, user_id=user_id, limit=limit)
@@ -1,31 +1,42 @@
 import asyncio
-from functools import wraps
+from functools import partial, wraps
 from databricks.sdk.service.dashboards import GenieMessage
-from genie_integration.client import genie # Import genie client
+from genie_integration.client import genie, run_genie # Import genie client
+from genie_integration.poller import genie_poller
+from genie_integration.rendering import FormattedResponse, TableRenderer
+from genie_integration.result_fetcher import QueryResultFetcher
+from monitoring.metrics import stage
+
+# Progress text shown while a Genie message is in flight, by status
+GENIE_STATUS_TEXT = {
+    "SUBMITTED": "Genie is thinking...",
+    "FILTERING_CONTEXT": "Genie is reading the room's context...",
+    "FETCHING_METADATA": "Genie is looking up table metadata...",
+    "ASKING_AI": "Genie is writing a query...",
+    "PENDING_WAREHOUSE": "Genie is waiting for the SQL warehouse to start...",
+    "EXECUTING_QUERY": "Genie is running the query...",
+}
+
+# action_id of the room picker; messages posted before it became an
+# external_select still use "static_select-action"
+GENIE_ROOM_SELECT_ACTION = "genie_room_select"
 
 def message_poll(func):
     @wraps(func)
-    async def wrapper(*args, **kwargs):
-        result_waiter = func(*args, **kwargs)
-        poll_count = 0
-        wait = 5
-
-        while poll_count < 20:
-            message = genie.get_message(
+    async def wrapper(*args, on_status=None, **kwargs):
+        started = asyncio.get_running_loop().time()
+        with stage("genie_send"):
+            result_waiter = await run_genie(func, *args, **kwargs)
+        # Status checks are scheduled by the shared poller, which keeps the
+        # total get_message rate bounded across all in-flight questions.
+        with stage("genie_wait"):
+            return await genie_poller.wait(
                 result_waiter.space_id,
                 result_waiter.conversation_id,
-                result_waiter.message_id
+                result_waiter.message_id,
+                started=started,
+                on_status=on_status
             )
-            print(message)
-            if message.status.value == "COMPLETED":
-                return result_waiter.result()
-
-            elif message.status.value == "FAILED":
-                raise LookupError("Genie failed to return a response")
-
-            poll_count += 1
-            await asyncio.sleep(wait)
-        raise TimeoutError("Genie did not return a response")
     return wrapper
 
 @message_poll
@@ -36,8 +47,39 @@ def async_genie_start_conv(*args, **kwargs):
 def async_genie_create_message(*args, **kwargs):
     return genie.create_message(*args, **kwargs)
 
-def format_genie_response(genie_message: GenieMessage) -> str:
+def format_genie_progress(genie_message: GenieMessage) -> str:
+    """
+    Build the interim text for an in-progress Genie message: its status and,
+    once Genie has written it, the generated SQL.
+
+    Args:
+        genie_message: The message as returned by get_message
+
+    Returns:
+        str: Text for the placeholder message
+    """
+    status = genie_message.status.value if genie_message.status else None
+    parts = [GENIE_STATUS_TEXT.get(status, "Genie is thinking...")]
+    for attachment in genie_message.attachments or []:
+        if attachment.query and attachment.query.query:
+            parts.append(f"```\n{attachment.query.query}\n```")
+            break
+    return "\n".join(parts)
+
+async def _finish_result_file(renderer: TableRenderer, chunks, formatted: FormattedResponse):
+    try:
+        async for rows in chunks:
+            if not renderer.feed(rows):
+                break
+    finally:
+        await chunks.aclose()
+    formatted.file_content = renderer.file_content()
+    formatted.file_title = renderer.file_title()
+
+
+async def format_genie_response(genie_message: GenieMessage) -> FormattedResponse:
     query_desc = query_code = table_text = None
+    file_content = file_name = file_loader = None
 
     query = genie_message.attachments[0].query
     text = genie_message.attachments[0].text
@@ -47,61 +89,54 @@ def format_genie_response(genie_message: GenieMessage) -> str:
         query_desc = query.description if query else None
         query_code = query.query if query else None
 
-        query_result = genie.get_message_attachment_query_result(
-            genie_message.space_id,
-            genie_message.conversation_id,
-            genie_message.message_id,
-            genie_message.attachments[0].attachment_id
-        )
-        columns = [col.name for col in query_result.statement_response.manifest.schema.columns]
-        data_array = query_result.statement_response.result.data_array
-        # Determine maximum width for each column (consider header and row values)
-        widths = [len(col) for col in columns]
-        for row in data_array:
-            for i, cell in enumerate(row):
-                widths[i] = max(widths[i], len(str(cell)))
-
-        # Create the header row
-        header = " | ".join(col.ljust(widths[i]) for i, col in enumerate(columns))
-        # Create a separator row
-        separator = "-|-".join("-" * widths[i] for i in range(len(columns)))
-
-        # Build the rows of the table
-        rows = [header, separator]
-        for row in data_array:
-            row_str = " | ".join(str(cell).ljust(widths[i]) for i, cell in enumerate(row))
-            rows.append(row_str)
-
-        # Wrap the table in triple backticks to format as a code block
-        table_text =  "```\n" + "\n".join(rows) + "\n```"
+        with stage("genie_query_result"):
+            query_result = await run_genie(
+                genie.get_message_attachment_query_result,
+                genie_message.space_id,
+                genie_message.conversation_id,
+                genie_message.message_id,
+                genie_message.attachments[0].attachment_id
+            )
+        fetcher = QueryResultFetcher(query_result.statement_response)
+        renderer = TableRenderer(fetcher.columns, total_rows=fetcher.total_rows)
+        chunks = fetcher.chunks()
+        # Fetch only what the inline table needs; the rest of the CSV export
+        # is fetched after the answer has been posted (see load_file).
+        exhausted = True
+        async for rows in chunks:
+            renderer.feed(rows)
+            if renderer.table_full:
+                exhausted = False
+                break
+        table_text = renderer.render()
+        file_name = f"genie_result_{genie_message.message_id}.csv"
+        if not exhausted and renderer.needs_more:
+            file_loader = partial(_finish_result_file, renderer, chunks)
+        else:
+            await chunks.aclose()
+            file_content = renderer.file_content()
+
     text_result = "\n".join([s for s in [text_content, query_desc, table_text, query_code] if s])
-    return text_result
+    return FormattedResponse(
+        text=text_result,
+        sql=query_code,
+        file_content=file_content,
+        file_name=file_name,
+        file_title=renderer.file_title() if file_content else None,
+        file_loader=file_loader
+    )
 
 
 def format_genie_selection():
     """
-    Generates a Slack block for selecting a Genie Room, by fetching all
-    genie spaces using a Databricks Python SDK call and then
-    creating options with room names as text and room IDs as values.
+    Generates a Slack block for selecting a Genie Room. The dropdown is an
+    external_select whose options are served by the options handler from the
+    in-memory space index, so it is not limited to Slack's 100 static options
+    and the space list is not sent with every message.
 
     Returns:
         list: A list of dictionaries representing the Slack block.
     """
-
-    genie_rooms = genie.list_spaces() # Fetch genie rooms using the placeholder
-
-    options = []
-    # Iterate through the fetched genie room data
-    for space in genie_rooms.spaces:
-        options.append({
-            "text": {
-                "type": "plain_text",
-                "text": space.title,  # Use genie room name for display text
-                "emoji": True
-            },
-            "value": space.space_id  # Use genie room ID as the value
-        })
-
     # Construct the complete Slack block as a list of dictionaries
     slack_block = [
         {
@@ -111,14 +146,14 @@ def format_genie_selection():
                 "text": "Select Genie Room"
             },
             "accessory": {
-                "type": "static_select",
+                "type": "external_select",
                 "placeholder": {
                     "type": "plain_text",
-                    "text": "Genie room name",
+                    "text": "Search Genie rooms",
                     "emoji": True
                 },
-                "options": options,  # Insert the dynamically generated options here
-                "action_id": "static_select-action"
+                "min_query_length": 0,  # Show recent/all rooms before typing
+                "action_id": GENIE_ROOM_SELECT_ACTION
             }
         },
         {
@@ -140,3 +175,26 @@ def format_genie_selection():
         }
     ]
     return slack_block
+
+
+def format_genie_room_options(spaces) -> list:
+    """
+    Convert Genie spaces into Slack select options.
+
+    Args:
+        spaces: Genie spaces to offer
+
+    Returns:
+        list: Slack option objects with room names as text and room IDs as values
+    """
+    return [
+        {
+            "text": {
+                "type": "plain_text",
+                "text": (space.title or space.space_id)[:75],  # Slack caps option text at 75 chars
+                "emoji": True
+            },
+            "value": space.space_id
+        }
+        for space in spaces
+    ]
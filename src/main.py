@@ -1,12 +1,140 @@
 import asyncio
-from slack_bolt.adapter.socket_mode.aiohttp import AsyncSocketModeHandler
+import multiprocessing
+import os
+import signal
+import time
 
-from slack_app.app_setup import app, token_app
-import slack_app.handlers
+# Number of app processes to run; each opens its own Socket Mode connection
+# (Slack allows up to 10 per app) and they coordinate through Lakebase
+APP_REPLICAS = int(os.environ.get("APP_REPLICAS", "1"))
+
+# App modules are imported inside main(): spawned replica and worker
+# processes re-import this file, and workers must not load the Slack app.
 
 async def main():
+    from monitoring.startup import record_first_event, startup_report
+    with startup_report.phase("imports"):
+        from slack_bolt.adapter.socket_mode.aiohttp import AsyncSocketModeHandler
+        from slack_app.app_setup import app, load_slack_auth
+        from database.conv_tracker import ensure_schema, flush_pending_messages, is_local_mode
+        from database.retention import run_retention_job
+        from genie_integration.space_catalog import space_catalog
+        from slack_app.ownership import thread_ownership
+        from slack_app.feedback import feedback_pipeline
+        from slack_app.workers import worker_pool
+        from monitoring.diagnostics import start_diagnostics
+        from monitoring.loop_lag import monitor_loop_lag
+        from monitoring.server import register_app_collectors, start_metrics_server
+        import slack_app.handlers
+
+    # DIAGNOSTICS_MODE: report what blocks the event loop
+    diagnostics = start_diagnostics()
+
+    # Treat SIGTERM (app stop/redeploy) like Ctrl-C so shutdown cleanup runs
+    main_task = asyncio.current_task()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, main_task.cancel)
+
+    # Prometheus-style /metrics on a local port (METRICS_PORT, 0 disables)
+    register_app_collectors(worker_pool)
+    metrics_runner = await start_metrics_server()
+    lag_task = asyncio.create_task(monitor_loop_lag())
+
+    # Load the Genie space catalog now and keep it warm in the background
+    catalog_task = asyncio.create_task(space_catalog.run_refresh_loop())
+
+    async def prepare_database():
+        # A single query when the schema version matches; the DDL only runs after a model change
+        try:
+            result = await startup_report.timed("schema", asyncio.to_thread(ensure_schema))
+            startup_report.note("schema", result)
+        except Exception as e:
+            print(f"Warning: Failed to initialize database: {e}")
+            print("The app will continue but database operations may fail.")
+        # Deliver reaction feedback in the background (and replay undelivered ratings)
+        await startup_report.timed("feedback_outbox", feedback_pipeline.start())
+
+    # The Slack tokens (and auth.test) and the database do not depend on each
+    # other, so they are prepared concurrently
+    token_app, _ = await asyncio.gather(
+        startup_report.timed("slack_auth", load_slack_auth()),
+        prepare_database()
+    )
+
+    if not is_local_mode():
+        retention_task = asyncio.create_task(run_retention_job())
+        # Answer questions in worker processes (WORKER_PROCESSES > 0)
+        with startup_report.phase("worker_pool"):
+            worker_pool.start(slack_app.handlers.slack_sink)
+    elif worker_pool.processes > 0:
+        print("WORKER_PROCESSES needs Lakebase (IS_LOCAL is set); answering in-process")
+
+    app.middleware(record_first_event)
     handler = AsyncSocketModeHandler(app, token_app)
-    await handler.start_async()
+    try:
+        await startup_report.timed("socket_connect", handler.connect_async())
+        startup_report.ready()
+        await asyncio.sleep(float("inf"))
+    finally:
+        await worker_pool.stop()
+        await feedback_pipeline.stop()
+        await flush_pending_messages()
+        # Hand this replica's threads to the others right away
+        await thread_ownership.release_all()
+        lag_task.cancel()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        if diagnostics is not None:
+            diagnostics.stop()
+        await handler.close_async()
+
+def run_replica():
+    try:
+        asyncio.run(main())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+def run_replicas(count: int):
+    """Run ``count`` replicas as child processes, restarting any that die."""
+    ctx = multiprocessing.get_context("spawn")
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    # Each replica serves /metrics on its own port
+    metrics_port = int(os.environ.get("METRICS_PORT", "9464"))
+
+    replicas = [None] * count
+    while not stopping:
+        for i, process in enumerate(replicas):
+            if process is None or not process.is_alive():
+                if process is not None:
+                    print(f"Replica {i} exited with code {process.exitcode}, restarting")
+                if metrics_port > 0:
+                    os.environ["METRICS_PORT"] = str(metrics_port + i)  # spawned children copy the environment
+                replicas[i] = ctx.Process(target=run_replica, name=f"replica-{i}")
+                replicas[i].start()
+        time.sleep(1)
+
+    for process in replicas:
+        if process.is_alive():
+            process.terminate()  # SIGTERM: the replica flushes and releases its leases
+    for process in replicas:
+        process.join()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    is_local = os.environ.get("IS_LOCAL") == "true"
+    if APP_REPLICAS > 1 and is_local:
+        print("APP_REPLICAS needs Lakebase (IS_LOCAL is set); running a single replica")
+    if APP_REPLICAS > 1 and not is_local:
+        # Children inherit these, so they coordinate thread ownership and
+        # drop events redelivered to a sibling's connection
+        os.environ["MULTI_REPLICA"] = "true"
+        os.environ.setdefault("EVENT_DEDUP_SHARED", "true")
+        run_replicas(APP_REPLICAS)
+    else:
+        run_replica()
@@ -0,0 +1 @@
+"""Metrics, tracing and diagnostics for the Genie Slack App."""
@@ -0,0 +1,255 @@
+"""Diagnostics mode: find what blocks the event loop and where it is called from."""
+import asyncio
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter as _Tally
+from typing import Dict, List, Optional, Tuple
+
+from monitoring.metrics import Counter, registry
+
+# Run the loop in asyncio debug mode with a stack-sampling watchdog. Costs
+# some CPU; meant for load tests and chasing stalls, not for normal running.
+DIAGNOSTICS_MODE = os.environ.get("DIAGNOSTICS_MODE") == "true"
+# Seconds the loop may be stuck before it counts as blocked (also the slow
+# callback threshold)
+DIAGNOSTICS_BLOCK_THRESHOLD = float(os.environ.get("DIAGNOSTICS_BLOCK_THRESHOLD", "0.1"))
+# Seconds between stack samples while the loop is blocked
+DIAGNOSTICS_SAMPLE_INTERVAL = float(os.environ.get("DIAGNOSTICS_SAMPLE_INTERVAL", "0.01"))
+DIAGNOSTICS_REPORT_INTERVAL = float(os.environ.get("DIAGNOSTICS_REPORT_INTERVAL", "60"))
+DIAGNOSTICS_TOP_N = int(os.environ.get("DIAGNOSTICS_TOP_N", "10"))
+# Folded stacks ("frame;frame;frame milliseconds") for flamegraph.pl or
+# speedscope; "{pid}" in the path is replaced so processes do not collide
+DIAGNOSTICS_STACKS_FILE = os.environ.get("DIAGNOSTICS_STACKS_FILE")
+
+# App code lives next to this package; everything else is a library
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+_SLOW_CALLBACK = re.compile(r"Executing (.+) took ([\d.]+) seconds")
+# App frames that only pass a call through: this package and the lazy
+# WorkspaceClient services (``genie.get_message`` etc.)
+_PASSTHROUGH_PATHS = (os.path.dirname(os.path.abspath(__file__)), os.path.join(_APP_ROOT, "config", "workspace.py"))
+
+LOOP_BLOCKED_SECONDS = registry.register(Counter(
+    "genie_slack_loop_blocked_seconds", "Sampled time the event loop was blocked (diagnostics mode)"
+))
+SLOW_CALLBACKS = registry.register(Counter(
+    "genie_slack_slow_callbacks", "Event loop callbacks slower than the threshold (diagnostics mode)"
+))
+
+
+def _frame_name(frame) -> str:
+    path = frame.f_code.co_filename
+    if path.startswith(_APP_ROOT):
+        path = path[len(_APP_ROOT):]
+    else:
+        # Keep library frames short: the module path after site-packages/lib
+        path = re.sub(r"^.*(site-packages|dist-packages|lib/python[\d.]+)/", "", path)
+    return f"{path}:{frame.f_code.co_name}"
+
+
+def _is_app_frame(frame) -> bool:
+    path = frame.f_code.co_filename
+    return path.startswith(_APP_ROOT) and "/site-packages/" not in path
+
+
+def _call_site(frames: List) -> str:
+    """
+    Name what the loop was stuck in: the innermost app frame and the library
+    call it made, e.g. ``slack_app/questions.py:88 -> databricks/sdk/service/dashboards.py:get_message``.
+    """
+    frames = [f for f in frames if not f.f_code.co_filename.startswith(_PASSTHROUGH_PATHS)] or frames
+    for i in range(len(frames) - 1, -1, -1):
+        frame = frames[i]
+        if _is_app_frame(frame):
+            site = f"{_frame_name(frame).rsplit(':', 1)[0]}:{frame.f_lineno} {frame.f_code.co_name}"
+            if i + 1 < len(frames):
+                site += f" -> {_frame_name(frames[i + 1])}"
+            return site
+    return _frame_name(frames[-1]) if frames else "?"
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """Collects asyncio debug mode's "Executing <handle> took N seconds" warnings."""
+
+    def __init__(self, diagnostics: "LoopDiagnostics"):
+        super().__init__(logging.WARNING)
+        self.diagnostics = diagnostics
+
+    def emit(self, record: logging.LogRecord):
+        match = _SLOW_CALLBACK.search(record.getMessage())
+        if match:
+            self.diagnostics.record_slow_callback(match.group(1), float(match.group(2)))
+
+
+class LoopDiagnostics:
+    """
+    Detects and attributes event loop blocking.
+
+    A heartbeat task stamps the time every few milliseconds. A watchdog
+    thread checks the stamp; when it is older than ``threshold`` the loop is
+    stuck in some synchronous call, and the watchdog samples the loop
+    thread's stack every ``sample_interval`` seconds until it moves again.
+    Samples are aggregated by call site (innermost app frame plus the
+    library function it called, e.g. ``genie.get_message`` or
+    ``session.query``) and by full stack. In addition the loop runs in
+    asyncio debug mode so callbacks slower than ``threshold`` are counted
+    per handle. A periodic report prints the top ``top_n`` of each and, if
+    ``stacks_file`` is set, rewrites it with folded stacks.
+
+    Attributes:
+        threshold: Seconds of staleness that count as blocked
+        sample_interval: Seconds between stack samples while blocked
+        report_interval: Seconds between reports
+        top_n: Entries per report section
+        stacks_file: Where to write folded stacks, if anywhere
+    """
+
+    def __init__(
+        self,
+        threshold: float = DIAGNOSTICS_BLOCK_THRESHOLD,
+        sample_interval: float = DIAGNOSTICS_SAMPLE_INTERVAL,
+        report_interval: float = DIAGNOSTICS_REPORT_INTERVAL,
+        top_n: int = DIAGNOSTICS_TOP_N,
+        stacks_file: Optional[str] = DIAGNOSTICS_STACKS_FILE
+    ):
+        self.threshold = threshold
+        self.sample_interval = sample_interval
+        self.report_interval = report_interval
+        self.top_n = top_n
+        self.stacks_file = stacks_file
+        self._lock = threading.Lock()
+        self._sites: _Tally = _Tally()  # call site -> blocked seconds
+        self._stacks: _Tally = _Tally()  # folded stack -> blocked seconds
+        self._slow_callbacks: Dict[str, List[float]] = {}  # handle -> [count, total seconds, max]
+        self._stalls: List[float] = []  # length of each blocked episode
+        self._beat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._stop = threading.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._log_handler: Optional[_SlowCallbackHandler] = None
+
+    def start(self):
+        """Start watching the running loop; call from the loop's thread."""
+        loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        loop.set_debug(True)
+        loop.slow_callback_duration = self.threshold
+        self._log_handler = _SlowCallbackHandler(self)
+        logging.getLogger("asyncio").addHandler(self._log_handler)
+        self._beat = time.monotonic()
+        self._tasks = [loop.create_task(self._heartbeat()), loop.create_task(self._report_loop())]
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+        print(f"Diagnostics mode: reporting event loop blocks over {self.threshold * 1000:.0f}ms")
+
+    def stop(self):
+        self._stop.set()
+        for task in self._tasks:
+            task.cancel()
+        if self._log_handler is not None:
+            logging.getLogger("asyncio").removeHandler(self._log_handler)
+        self.report()
+
+    async def _heartbeat(self):
+        interval = min(self.threshold / 4, 0.05)
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(interval)
+
+    async def _report_loop(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self.report()
+
+    def _watch(self):
+        stalled_since = None
+        while not self._stop.wait(self.sample_interval):
+            now = time.monotonic()
+            beat = self._beat
+            if now - beat <= self.threshold:
+                if stalled_since is not None:
+                    with self._lock:
+                        self._stalls.append(now - stalled_since)
+                    stalled_since = None
+                continue
+            if stalled_since is None:
+                stalled_since = beat
+            self._sample()
+
+    def _sample(self):
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()  # outermost first
+        if frames[-1].f_code.co_filename.endswith("selectors.py"):
+            return  # waiting for I/O: the loop is idle, just woke up late
+        site = _call_site(frames)
+        folded = ";".join(_frame_name(f) for f in frames)
+        with self._lock:
+            self._sites[site] += self.sample_interval
+            self._stacks[folded] += self.sample_interval
+        LOOP_BLOCKED_SECONDS.inc(self.sample_interval)
+
+    def record_slow_callback(self, handle: str, seconds: float):
+        # Strip addresses so the same coroutine aggregates across tasks
+        handle = re.sub(r" at 0x[0-9a-f]+", "", handle)
+        handle = re.sub(r"<Task[^>]*coro=<([^>]*)>.*", r"task \1", handle)
+        with self._lock:
+            entry = self._slow_callbacks.setdefault(handle, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+        SLOW_CALLBACKS.inc()
+
+    def top_sites(self, n: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Call sites by sampled blocked seconds, largest first."""
+        with self._lock:
+            return self._sites.most_common(n or self.top_n)
+
+    def folded_stacks(self) -> List[str]:
+        """Blocked stacks as "frame;frame;frame milliseconds" lines."""
+        with self._lock:
+            return [f"{stack} {round(seconds * 1000)}" for stack, seconds in self._stacks.most_common()]
+
+    def report(self):
+        """Print the top blocking call sites and slow callbacks so far."""
+        with self._lock:
+            sites = self._sites.most_common(self.top_n)
+            callbacks = sorted(self._slow_callbacks.items(), key=lambda item: item[1][1], reverse=True)[:self.top_n]
+            stalls = list(self._stalls)
+        if not sites and not callbacks:
+            return
+        lines = [f"Event loop diagnostics: {len(stalls)} stalls over {self.threshold * 1000:.0f}ms, "
+                 f"{sum(stalls):.2f}s blocked in total"]
+        if sites:
+            lines.append("  Top blocking call sites (sampled seconds):")
+            lines.extend(f"    {seconds:8.2f}s  {site}" for site, seconds in sites)
+        if callbacks:
+            lines.append("  Slowest callbacks (count, total, max):")
+            lines.extend(
+                f"    {count:5d} {total:8.2f}s {longest:6.2f}s  {handle[:200]}"
+                for handle, (count, total, longest) in callbacks
+            )
+        print("\n".join(lines))
+        if self.stacks_file:
+            path = self.stacks_file.replace("{pid}", str(os.getpid()))
+            try:
+                with open(path, "w") as f:
+                    f.write("\n".join(self.folded_stacks()) + "\n")
+            except OSError as e:
+                print(f"Error writing folded stacks to {path}: {e}")
+
+
+def start_diagnostics() -> Optional[LoopDiagnostics]:
+    """Start diagnostics on the running loop if DIAGNOSTICS_MODE is set."""
+    if not DIAGNOSTICS_MODE:
+        return None
+    diagnostics = LoopDiagnostics()
+    diagnostics.start()
+    return diagnostics
@@ -0,0 +1,26 @@
+"""Measures how late the event loop runs, i.e. how long it was blocked."""
+import asyncio
+import os
+
+from monitoring.metrics import LOOP_LAG_SECONDS, Gauge, registry
+
+LOOP_LAG_INTERVAL = float(os.environ.get("LOOP_LAG_INTERVAL", "0.5"))
+
+LOOP_LAG_CURRENT = registry.register(Gauge(
+    "genie_slack_event_loop_lag_current_seconds", "Lag of the most recent event loop measurement"
+))
+
+
+async def monitor_loop_lag(interval: float = LOOP_LAG_INTERVAL):
+    """
+    Background task that sleeps ``interval`` seconds and records how much
+    later than that it woke up. Anything blocking the loop (a sync SDK or
+    database call, heavy formatting) shows up as lag.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - started - interval)
+        LOOP_LAG_SECONDS.observe(lag)
+        LOOP_LAG_CURRENT.set(lag)
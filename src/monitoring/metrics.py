@@ -0,0 +1,264 @@
+"""Prometheus-style counters, gauges and histograms for the hot path."""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from monitoring.tracing import span
+
+# Seconds; covers a fast cache hit up to a Genie answer near its deadline
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# A metric family as collected for exposition and sent between processes:
+# (name, type, help, [(sample name, labels, value)])
+Sample = Tuple[str, Dict[str, str], float]
+Family = Tuple[str, str, str, List[Sample]]
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def collect(self) -> Family:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """A value that only goes up, e.g. Genie statuses seen."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> Family:
+        with self._lock:
+            samples = [(f"{self.name}_total", self._labels(k), v) for k, v in self._values.items()]
+        return self.name, self.kind, self.help, samples
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, e.g. questions in flight."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def collect(self) -> Family:
+        with self._lock:
+            samples = [(self.name, self._labels(k), v) for k, v in self._values.items()]
+        return self.name, self.kind, self.help, samples
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observed durations."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][bisect.bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+
+    def collect(self) -> Family:
+        samples = []
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                labels = self._labels(key)
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    samples.append((f"{self.name}_bucket", {**labels, "le": le}, cumulative))
+                samples.append((f"{self.name}_sum", labels, total))
+                samples.append((f"{self.name}_count", labels, cumulative))
+        return self.name, self.kind, self.help, samples
+
+
+class Registry:
+    """
+    All metrics of this process, plus collectors that read existing stats
+    (pools, caches, queues) only when scraped.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[Family]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], List[Family]]):
+        """
+        Add a function called on every scrape.
+
+        Args:
+            collector: Returns a list of ``(name, type, help, samples)`` families
+        """
+        self._collectors.append(collector)
+
+    def collect(self, include_collectors: bool = True) -> List[Family]:
+        families = [metric.collect() for metric in self._metrics]
+        if include_collectors:
+            for collector in self._collectors:
+                try:
+                    families.extend(collector())
+                except Exception as e:
+                    print(f"Error collecting metrics: {e}")
+        return families
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "genie_slack_stage_seconds", "Time spent in each stage of answering a question", ("stage",)
+))
+GENIE_STATUS = registry.register(Counter(
+    "genie_slack_genie_status", "Genie message statuses seen while polling", ("status",)
+))
+QUESTIONS_IN_FLIGHT = registry.register(Gauge(
+    "genie_slack_questions_in_flight", "Questions currently being answered"
+))
+QUESTIONS = registry.register(Counter(
+    "genie_slack_questions", "Questions answered, by outcome", ("outcome",)
+))
+LOOP_LAG_SECONDS = registry.register(Histogram(
+    "genie_slack_event_loop_lag_seconds", "How late the event loop ran a timer",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+))
+
+
+@contextmanager
+def stage(name: str, **attributes):
+    """
+    Time a stage of the question flow into ``genie_slack_stage_seconds``
+    and, with tracing enabled, an OpenTelemetry span.
+
+    Works around ``await`` expressions as well as plain code.
+
+    Args:
+        name: Stage label, e.g. "genie_poll"
+        **attributes: Span attributes
+    """
+    started = time.perf_counter()
+    try:
+        with span(name, **attributes):
+            yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=name)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render(families: List[Family], extra_labels: Optional[Dict[str, str]] = None) -> str:
+    """
+    Format metric families in the Prometheus text exposition format.
+
+    Families with the same name (e.g. from several worker processes) are
+    written under a single HELP/TYPE header.
+
+    Args:
+        families: Collected families
+        extra_labels: Labels added to every sample
+
+    Returns:
+        str: The exposition text
+    """
+    merged: Dict[str, Tuple[str, str, List[Sample]]] = {}
+    for name, kind, help, samples in families:
+        if name not in merged:
+            merged[name] = (kind, help, [])
+        merged[name][2].extend(samples)
+
+    lines = []
+    for name, (kind, help, samples) in merged.items():
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for sample_name, labels, value in samples:
+            labels = {**(extra_labels or {}), **labels}
+            if labels:
+                label_text = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+                lines.append(f"{sample_name}{{{label_text}}} {_format_value(value)}")
+            else:
+                lines.append(f"{sample_name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def with_labels(families: List[Family], **labels) -> List[Family]:
+    """Add labels to every sample, e.g. the worker a snapshot came from."""
+    return [
+        (name, kind, help, [(sample_name, {**labels, **sample_labels}, value) for sample_name, sample_labels, value in samples])
+        for name, kind, help, samples in families
+    ]
+
+
+def stats_family(name: str, help: str, stats: Dict, **labels) -> Family:
+    """
+    Expose a component's stats dict (numbers only, nested dicts flattened)
+    as one untyped family with a ``stat`` label.
+    """
+    samples = []
+
+    def add(prefix: str, values: Dict):
+        for key, value in values.items():
+            stat = f"{prefix}{key}"
+            if isinstance(value, dict):
+                add(f"{stat}_", value)
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                samples.append((name, {**labels, "stat": stat}, value))
+
+    add("", stats)
+    return name, "untyped", help, samples
@@ -0,0 +1,117 @@
+"""Local HTTP endpoint serving /metrics for Prometheus-style scrapers."""
+import os
+from typing import List, Optional
+
+from aiohttp import web
+
+from monitoring.metrics import Family, registry, render, stats_family, with_labels
+
+# 0 disables the endpoint. With APP_REPLICAS, replica i listens on port + i.
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9464"))
+# Loopback by default: the endpoint is for a local agent or sidecar to scrape
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+
+
+COMPONENT_STAT = "genie_slack_component_stat"
+COMPONENT_STAT_HELP = "Counters and sizes kept by app components"
+
+
+def _db_pools() -> List[Family]:
+    from database.connection import get_pool_stats
+    samples = []
+    for engine, stats in get_pool_stats().items():
+        for state, value in stats.items():
+            samples.append(("genie_slack_db_pool_connections", {"engine": engine, "state": state}, value))
+    return [("genie_slack_db_pool_connections", "gauge", "Lakebase connection pool usage", samples)]
+
+
+def _process_components(answers_questions: bool = True) -> List[Family]:
+    """Stats of the components every process has, and of those answering questions."""
+    from database.conv_tracker import get_cache_stats
+    families = [stats_family(COMPONENT_STAT, COMPONENT_STAT_HELP, get_cache_stats(), component="tracker_cache")]
+    if not answers_questions:
+        return families
+    from genie_integration.admission import genie_admission
+    from genie_integration.answer_cache import answer_cache
+    from genie_integration.poller import genie_poller
+    from genie_integration.polling import polling_stats
+    return families + [
+        stats_family(COMPONENT_STAT, COMPONENT_STAT_HELP, answer_cache.stats(), component="answer_cache"),
+        stats_family(COMPONENT_STAT, COMPONENT_STAT_HELP, genie_admission.stats, component="admission"),
+        stats_family(COMPONENT_STAT, COMPONENT_STAT_HELP, polling_stats.summary(), component="genie_polling"),
+        stats_family(COMPONENT_STAT, COMPONENT_STAT_HELP, {"in_flight": genie_poller.in_flight}, component="genie_poller"),
+    ]
+
+
+def register_worker_collectors():
+    """
+    Expose a worker process's DB pools and question-path components. They
+    go out with its metric snapshots and appear on the front end with a
+    ``worker`` label.
+    """
+    registry.add_collector(_db_pools)
+    registry.add_collector(_process_components)
+
+
+def register_app_collectors(worker_pool=None):
+    """
+    Expose the stats the app already keeps (DB pools, caches, queues and
+    the Genie poller) on every scrape, plus metrics pushed by worker
+    processes.
+
+    While worker processes answer the questions, the front end leaves out
+    its own (idle) question-path components; the workers report theirs.
+
+    Args:
+        worker_pool: ``slack_app.workers.WorkerPool`` whose workers' metrics to include
+    """
+    # Imported here so worker processes, which never load the Slack app, do not import them
+    from slack_app.dedup import event_dedup
+    from slack_app.feedback import feedback_pipeline
+
+    def components() -> List[Family]:
+        delegated = worker_pool is not None and worker_pool.running
+        return _process_components(answers_questions=not delegated) + [
+            stats_family(COMPONENT_STAT, COMPONENT_STAT_HELP, event_dedup.stats, component="event_dedup"),
+            stats_family(COMPONENT_STAT, COMPONENT_STAT_HELP, feedback_pipeline.stats, component="feedback"),
+        ]
+
+    def workers() -> List[Family]:
+        if worker_pool is None:
+            return []
+        families = []
+        for worker_id, snapshot in worker_pool.worker_metrics.items():
+            families.extend(with_labels(snapshot, worker=str(worker_id)))
+        return families
+
+    registry.add_collector(_db_pools)
+    registry.add_collector(components)
+    registry.add_collector(workers)
+
+
+async def _handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=render(registry.collect()), content_type="text/plain", charset="utf-8")
+
+
+async def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST) -> Optional[web.AppRunner]:
+    """
+    Serve ``GET /metrics`` on ``host:port``.
+
+    Returns:
+        The runner (call ``cleanup()`` to stop), or None if disabled or the
+        port is taken
+    """
+    if port <= 0:
+        return None
+    app = web.Application()
+    app.router.add_get("/metrics", _handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        print(f"Metrics endpoint disabled, cannot listen on {host}:{port}: {e}")
+        await runner.cleanup()
+        return None
+    print(f"Serving metrics on http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,83 @@
+"""Timing of the app's startup phases, from launch to the first Slack event."""
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Dict, List, Optional, Tuple
+
+from monitoring.metrics import Gauge, registry
+
+STARTUP_SECONDS = registry.register(Gauge(
+    "genie_slack_startup_seconds",
+    "Seconds each startup phase took; phase=ready and first_event are seconds since launch",
+    ("phase",)
+))
+
+
+class StartupReport:
+    """
+    Records how long each startup phase takes and prints a summary once the
+    Socket Mode connection is up, plus a line when the first event arrives.
+
+    Phases may overlap (concurrent startup work); each is listed with its
+    start offset so the critical path is visible.
+
+    Attributes:
+        started: Monotonic time the report was created (app launch)
+        phases: Phase name -> (start offset, seconds), in order of starting
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.phases: Dict[str, Tuple[float, float]] = {}
+        self.notes: Dict[str, str] = {}
+        self.ready_at: Optional[float] = None
+        self.first_event_at: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as startup phase ``name``."""
+        offset = time.monotonic() - self.started
+        try:
+            yield
+        finally:
+            seconds = time.monotonic() - self.started - offset
+            self.phases[name] = (offset, seconds)
+            STARTUP_SECONDS.set(seconds, phase=name)
+
+    async def timed(self, name: str, awaitable: Awaitable):
+        """Await ``awaitable`` as startup phase ``name`` and return its result."""
+        with self.phase(name):
+            return await awaitable
+
+    def note(self, name: str, text: str):
+        """Attach a short note to a phase, e.g. whether the schema was up to date."""
+        self.notes[name] = text
+
+    def ready(self):
+        """Mark the app as connected and print the report."""
+        self.ready_at = time.monotonic() - self.started
+        STARTUP_SECONDS.set(self.ready_at, phase="ready")
+        print("\n".join(self.lines()))
+
+    def first_event(self):
+        """Record the first Slack event; later calls do nothing."""
+        if self.first_event_at is not None:
+            return
+        self.first_event_at = time.monotonic() - self.started
+        STARTUP_SECONDS.set(self.first_event_at, phase="first_event")
+        print(f"First Slack event {self.first_event_at:.2f}s after launch")
+
+    def lines(self) -> List[str]:
+        lines = [f"Startup: connected to Slack {self.ready_at:.2f}s after launch"]
+        for name, (offset, seconds) in sorted(self.phases.items(), key=lambda item: item[1][0]):
+            note = f"  ({self.notes[name]})" if name in self.notes else ""
+            lines.append(f"  {name:<18} at {offset:6.2f}s  took {seconds:6.2f}s{note}")
+        return lines
+
+
+startup_report = StartupReport()
+
+
+async def record_first_event(next):
+    """Bolt middleware: note when the first event arrives after startup."""
+    startup_report.first_event()
+    await next()
@@ -0,0 +1,40 @@
+"""Optional OpenTelemetry spans around the stages of answering a question."""
+import os
+from contextlib import contextmanager
+
+# Export spans through the OpenTelemetry API. Needs opentelemetry-api plus an
+# SDK/exporter configured by the environment (e.g. opentelemetry-instrument
+# with OTEL_EXPORTER_OTLP_ENDPOINT); without one the spans are no-ops.
+OTEL_TRACING = os.environ.get("OTEL_TRACING") == "true"
+
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+_tracer = None
+if OTEL_TRACING:
+    if trace is None:
+        print("OTEL_TRACING is set but opentelemetry-api is not installed; spans are disabled")
+    else:
+        _tracer = trace.get_tracer("genie_slack_app")
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Run the block in a span when tracing is enabled.
+
+    Spans nest through context variables, so stages awaited inside a
+    question's span become its children.
+
+    Args:
+        name: Span name
+        **attributes: Span attributes; None values are dropped
+    """
+    if _tracer is None:
+        yield
+        return
+    attributes = {k: v for k, v in attributes.items() if v is not None}
+    with _tracer.start_as_current_span(name, attributes=attributes):
+        yield
@@ -1,15 +1,43 @@
+import os
 import ssl
 from slack_bolt.async_app import AsyncApp
+from slack_bolt.authorization import AuthorizeResult
 from slack_sdk.web.async_client import AsyncWebClient
-from config.slack_auth import get_slack_auth
+from config.slack_auth import async_get_slack_auth
 
-def start_slack_client(token_bot):
+# Set by load_slack_auth() at startup; until then events are not authorized
+_authorize_result = None
+
+async def authorize_bot():
+    """Bolt authorize function: the bot token and identity loaded at startup."""
+    return _authorize_result
+
+def start_slack_client():
     ssl_context = ssl.create_default_context()
     ssl_context.check_hostname = False
     ssl_context.verify_mode = ssl.CERT_NONE
 
-    client = AsyncWebClient(token=token_bot, ssl=ssl_context)
-    return AsyncApp(client=client, process_before_response=False)
+    # SLACK_API_URL points the Web API (and Socket Mode connection opening)
+    # elsewhere, e.g. at the load-test harness's fake Slack
+    base_url = os.environ.get("SLACK_API_URL", AsyncWebClient.BASE_URL)
+    # The tokens are fetched at startup, not at import (see load_slack_auth)
+    client = AsyncWebClient(ssl=ssl_context, base_url=base_url)
+    return AsyncApp(client=client, authorize=authorize_bot, process_before_response=False)
+
+async def load_slack_auth():
+    """
+    Fetch the Slack tokens and authorize the app with the bot token.
+
+    Runs ``auth.test`` once here instead of on the first event.
+
+    Returns:
+        str: The app-level token for the Socket Mode connection
+    """
+    global _authorize_result
+    token_app, token_bot = await async_get_slack_auth()
+    app.client.token = token_bot
+    auth_test = await app.client.auth_test()
+    _authorize_result = AuthorizeResult.from_auth_test_response(bot_token=token_bot, auth_test_response=auth_test)
+    return token_app
 
-token_app, token_bot = get_slack_auth()
-app = start_slack_client(token_bot)
\ No newline at end of file
+app = start_slack_client()
@@ -0,0 +1,102 @@
+"""Deduplication of Slack events redelivered on retries and reconnects."""
+import os
+import threading
+from typing import Awaitable, Callable, List, Optional
+
+from cachetools import TTLCache
+from slack_bolt import BoltResponse
+
+EVENT_DEDUP_SIZE = int(os.environ.get("EVENT_DEDUP_SIZE", "50000"))
+EVENT_DEDUP_TTL = float(os.environ.get("EVENT_DEDUP_TTL", "3600"))
+# Also claim events in Lakebase so replicas do not process each other's retries
+EVENT_DEDUP_SHARED = os.environ.get("EVENT_DEDUP_SHARED") == "true"
+
+
+def event_keys(body: dict) -> List[str]:
+    """
+    Get the keys identifying a Slack event delivery.
+
+    Slack keeps ``event_id`` across retries of an event; ``client_msg_id``
+    identifies the user's message even if it is delivered as separate events.
+
+    Args:
+        body: Request body as passed to Bolt middleware
+
+    Returns:
+        List of keys (empty for requests that are not events)
+    """
+    if body.get("type") != "event_callback":
+        return []
+    keys = []
+    if body.get("event_id"):
+        keys.append(f"event:{body['event_id']}")
+    client_msg_id = (body.get("event") or {}).get("client_msg_id")
+    if client_msg_id:
+        keys.append(f"msg:{client_msg_id}")
+    return keys
+
+
+class EventDeduplicator:
+    """
+    Bounded seen-set of Slack event keys with a TTL.
+
+    The in-memory check is a constant-time dict lookup. A key is marked as
+    seen before anything is awaited, so concurrent redeliveries on the same
+    replica are caught too. With a shared store configured, first sightings
+    are also claimed there to catch deliveries to other replicas.
+
+    Attributes:
+        stats: Counts of events checked and duplicates dropped
+    """
+
+    def __init__(self, maxsize: int = EVENT_DEDUP_SIZE, ttl: float = EVENT_DEDUP_TTL):
+        self._seen = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._claim: Optional[Callable[[List[str]], Awaitable[bool]]] = None
+        self.stats = {"events": 0, "duplicates": 0, "shared_duplicates": 0}
+
+    def use_store(self, claim: Callable[[List[str]], Awaitable[bool]]):
+        """
+        Share the seen-set through a store.
+
+        Args:
+            claim: ``async (keys) -> bool`` returning False if already claimed
+        """
+        self._claim = claim
+
+    async def is_duplicate(self, body: dict) -> bool:
+        """
+        Check and record a delivery.
+
+        Args:
+            body: Request body as passed to Bolt middleware
+
+        Returns:
+            bool: True if the event was already seen
+        """
+        keys = event_keys(body)
+        if not keys:
+            return False
+        with self._lock:
+            self.stats["events"] += 1
+            if any(key in self._seen for key in keys):
+                self.stats["duplicates"] += 1
+                return True
+            for key in keys:
+                self._seen[key] = True
+        if self._claim is not None and not await self._claim(keys):
+            self.stats["duplicates"] += 1
+            self.stats["shared_duplicates"] += 1
+            return True
+        return False
+
+
+event_dedup = EventDeduplicator()
+
+
+async def dedup_events(body, next):
+    """Global Bolt middleware: ack and drop events that were already handled."""
+    if await event_dedup.is_duplicate(body):
+        print(f"Dropping duplicate Slack event {body.get('event_id')}")
+        return BoltResponse(status=200, body="")
+    await next()
@@ -0,0 +1,288 @@
+"""Delivery of thumbs up/down reactions to Genie as message feedback."""
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import backoff
+from cachetools import LRUCache
+from databricks.sdk.errors import BadRequest, NotFound, PermissionDenied
+
+from database.conv_tracker import async_get_message, message_write_delay
+from genie_integration.client import genie, run_genie
+
+# Try to import GenieFeedbackRating, fall back to simple string enum if not available
+try:
+    from databricks.sdk.service.dashboards import GenieFeedbackRating
+except ImportError:
+    from enum import Enum
+    class GenieFeedbackRating(Enum):
+        """Fallback enum for Genie feedback ratings."""
+        POSITIVE = "POSITIVE"
+        NEGATIVE = "NEGATIVE"
+        NONE = "NONE"
+
+# Seconds a message's rating must stay unchanged before it is sent, so rapid
+# toggles (👍 -> 👎 -> remove) collapse into one call with the final rating
+FEEDBACK_DEBOUNCE = float(os.environ.get("FEEDBACK_DEBOUNCE", "2.0"))
+FEEDBACK_WORKERS = int(os.environ.get("FEEDBACK_WORKERS", "2"))
+FEEDBACK_MAX_TRIES = int(os.environ.get("FEEDBACK_MAX_TRIES", "5"))
+# Seconds before the first retry; doubles on each further try
+FEEDBACK_RETRY_DELAY = float(os.environ.get("FEEDBACK_RETRY_DELAY", "1.0"))
+# Seconds to keep looking for the Genie message a reaction is on. Its mapping
+# can still be in a write-behind buffer (this process's, a worker's or another
+# replica's), so by default this covers a buffered row's flush and retries.
+FEEDBACK_MAPPING_WAIT = float(os.environ.get("FEEDBACK_MAPPING_WAIT", "0")) or None
+
+_MessageKey = Tuple[str, str]
+
+
+def _is_permanent(e: Exception) -> bool:
+    # Retrying cannot fix a deleted message or a missing permission
+    return isinstance(e, (BadRequest, NotFound, PermissionDenied))
+
+
+class FeedbackPipeline:
+    """
+    Debounces reactions per Slack message and sends the resulting ratings to
+    Genie from a small pool of background workers.
+
+    Only the last rating a message gets within ``debounce`` seconds is sent,
+    and not at all if Genie already has it. Failed calls are retried with
+    exponential backoff. A reaction on a message whose Genie mapping is not
+    found yet is looked up again, with backoff, for ``mapping_wait``
+    seconds before it is dropped. With an outbox (``use_outbox``), each rating is
+    saved when the reaction arrives and removed once delivered; ratings left
+    over from a previous run are re-queued by ``start``. Re-sending a rating
+    Genie already has is harmless, so replicas sharing the outbox may replay
+    each other's rows.
+
+    Attributes:
+        debounce: Seconds a rating must stay unchanged before it is sent
+        workers: Number of concurrent senders
+        max_tries: Attempts per rating before giving up until the next start
+        retry_delay: Seconds before the first retry
+        mapping_wait: Seconds to wait for a message's Genie mapping to appear
+        stats: Counters of received, collapsed, sent, skipped and failed
+            ratings, retries and lookups of mappings not written yet
+    """
+
+    def __init__(
+        self,
+        debounce: float = FEEDBACK_DEBOUNCE,
+        workers: int = FEEDBACK_WORKERS,
+        max_tries: int = FEEDBACK_MAX_TRIES,
+        retry_delay: float = FEEDBACK_RETRY_DELAY,
+        mapping_wait: Optional[float] = FEEDBACK_MAPPING_WAIT
+    ):
+        self.debounce = debounce
+        self.workers = max(1, workers)
+        self.max_tries = max(1, max_tries)
+        self.retry_delay = retry_delay
+        if mapping_wait is None:
+            mapping_wait = message_write_delay() + debounce + retry_delay
+        self.mapping_wait = mapping_wait
+        self.stats = {
+            "received": 0, "collapsed": 0, "sent": 0, "skipped": 0, "failed": 0, "retries": 0, "mapping_retries": 0
+        }
+        self._latest: Dict[_MessageKey, str] = {}
+        self._timers: Dict[_MessageKey, asyncio.TimerHandle] = {}
+        # Last rating Genie accepted per message, to drop toggles that end where they started
+        self._delivered: LRUCache = LRUCache(maxsize=10000)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Messages being sent right now; a newer rating waits for its turn
+        self._sending: Set[_MessageKey] = set()
+        # Messages whose mapping was not found: (first miss, lookups so far)
+        self._unmapped: Dict[_MessageKey, Tuple[float, int]] = {}
+        self._save: Optional[Callable[..., Awaitable[None]]] = None
+        self._delete: Optional[Callable[..., Awaitable[None]]] = None
+        self._load: Optional[Callable[[], Awaitable[List[Tuple[str, str, str]]]]] = None
+
+    def use_outbox(
+        self,
+        save: Callable[..., Awaitable[None]],
+        delete: Callable[..., Awaitable[None]],
+        load: Callable[[], Awaitable[List[Tuple[str, str, str]]]]
+    ):
+        """
+        Persist ratings until they are delivered.
+
+        Args:
+            save: ``async (channel_id, message_ts, rating) -> None``
+            delete: ``async (channel_id, message_ts, rating) -> None``
+            load: ``async () -> [(channel_id, message_ts, rating)]``
+        """
+        self._save = save
+        self._delete = delete
+        self._load = load
+
+    def _ensure_queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    async def start(self):
+        """Start the workers and re-queue ratings left in the outbox."""
+        if self._tasks:
+            return
+        queue = self._ensure_queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self._load is not None:
+            requeued = 0
+            for channel_id, message_ts, rating in await self._load():
+                key = (channel_id, message_ts)
+                if key not in self._latest:
+                    self._latest[key] = rating
+                    queue.put_nowait(key)
+                    requeued += 1
+            if requeued:
+                print(f"Re-queued {requeued} undelivered feedback ratings")
+
+    async def submit(self, channel_id: str, message_ts: str, rating: str):
+        """
+        Record a message's new rating; it is sent once it settles.
+
+        Args:
+            channel_id: Slack channel ID
+            message_ts: Slack message timestamp
+            rating: POSITIVE, NEGATIVE or NONE
+        """
+        key = (channel_id, message_ts)
+        self.stats["received"] += 1
+        if key in self._latest:
+            self.stats["collapsed"] += 1
+        self._latest[key] = rating
+
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        loop = asyncio.get_running_loop()
+        self._timers[key] = loop.call_later(self.debounce, self._release, key)
+
+        if self._save is not None:
+            await self._save(channel_id, message_ts, rating)
+
+    def _release(self, key: _MessageKey):
+        self._timers.pop(key, None)
+        self._ensure_queue().put_nowait(key)
+
+    async def _worker(self):
+        queue = self._ensure_queue()
+        while True:
+            key = await queue.get()
+            # A newer reaction restarted the debounce; that release sends it
+            if key in self._timers or key in self._sending:
+                continue
+            rating = self._latest.pop(key, None)
+            if rating is None:
+                continue
+            self._sending.add(key)
+            try:
+                await self._deliver(key, rating)
+            except Exception as e:
+                print(f"Error delivering feedback for message {key[1]}: {e}")
+            finally:
+                self._sending.discard(key)
+            # Keep per-message order: a rating that settled meanwhile goes next
+            if key in self._latest and key not in self._timers:
+                queue.put_nowait(key)
+
+    async def _deliver(self, key: _MessageKey, rating: str):
+        channel_id, message_ts = key
+        if self._delivered.get(key) == rating:
+            self.stats["skipped"] += 1
+            await self._forget(key, rating)
+            return
+
+        message_data = await async_get_message(channel_id, message_ts)
+        if not message_data:
+            if self._retry_lookup(key, rating):
+                return
+            # Not a Genie answer (or its mapping has expired)
+            self.stats["skipped"] += 1
+            await self._forget(key, rating)
+            return
+        self._unmapped.pop(key, None)
+
+        def on_backoff(details):
+            self.stats["retries"] += 1
+            print(f"Retrying feedback for message {message_data['message_id']} in {details['wait']:.1f}s: {details['exception']}")
+
+        send = backoff.on_exception(
+            backoff.expo,
+            Exception,
+            max_tries=self.max_tries,
+            giveup=_is_permanent,
+            on_backoff=on_backoff,
+            logger=None,
+            factor=self.retry_delay
+        )(run_genie)
+        try:
+            await send(
+                genie.send_message_feedback,
+                space_id=message_data["space_id"],
+                conversation_id=message_data["conversation_id"],
+                message_id=message_data["message_id"],
+                rating=GenieFeedbackRating(rating)
+            )
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"Failed to send {rating} feedback for message {message_data['message_id']}: {e}")
+            if _is_permanent(e):
+                await self._forget(key, rating)
+            # Otherwise it stays in the outbox and is retried on the next start
+            return
+
+        self.stats["sent"] += 1
+        self._delivered[key] = rating
+        print(f"Sent {rating} feedback for message {message_data['message_id']}")
+        await self._forget(key, rating)
+
+    def _retry_lookup(self, key: _MessageKey, rating: str) -> bool:
+        """
+        Look the message up again later, while its mapping may still be
+        waiting to be written; the rating stays in the outbox meanwhile.
+
+        Returns:
+            bool: False once ``mapping_wait`` has passed since the first miss
+        """
+        now = asyncio.get_running_loop().time()
+        first_miss, lookups = self._unmapped.get(key, (now, 0))
+        remaining = first_miss + self.mapping_wait - now
+        if remaining <= 0:
+            self._unmapped.pop(key, None)
+            return False
+        self._unmapped[key] = (first_miss, lookups + 1)
+        self.stats["mapping_retries"] += 1
+        # A newer reaction (with its own debounce) takes precedence
+        self._latest.setdefault(key, rating)
+        if key not in self._timers:
+            delay = min(self.retry_delay * 2 ** lookups, remaining)
+            self._timers[key] = asyncio.get_running_loop().call_later(delay, self._release, key)
+        return True
+
+    async def _forget(self, key: _MessageKey, rating: str):
+        if self._delete is not None:
+            await self._delete(key[0], key[1], rating)
+
+    async def stop(self):
+        """Send ratings still being debounced, then stop the workers."""
+        for key, timer in list(self._timers.items()):
+            timer.cancel()
+            self._release(key)
+        if self._queue is not None and self._tasks:
+            # Give queued ratings a moment; anything left stays in the outbox
+            try:
+                await asyncio.wait_for(self._drain(), timeout=5)
+            except asyncio.TimeoutError:
+                pass
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def _drain(self):
+        while not self._queue.empty() or self._latest or self._sending:
+            await asyncio.sleep(0.05)
+
+
+feedback_pipeline = FeedbackPipeline()
@@ -1,44 +1,44 @@
 import asyncio
 import os
+import re
 from slack_bolt.async_app import AsyncApp
 
 # Import from other modules
-from genie_integration.utils import async_genie_start_conv, async_genie_create_message, format_genie_response, format_genie_selection
-from slack_app.utils import send_thinking_message, extract_text, delete_message
+from genie_integration.utils import (
+    format_genie_selection,
+    format_genie_room_options,
+    GENIE_ROOM_SELECT_ACTION
+)
+from genie_integration.space_index import search_spaces, space_index
 from slack_app.app_setup import app
+from slack_app.questions import handle_message
+from slack_app.sink import SlackSink
+from slack_app.workers import worker_pool
 
 # Import database conversation tracker
 from database.conv_tracker import (
-    init_database, 
-    get_conversation, 
-    set_conversation, 
-    update_conversation_id,
-    is_local_mode,
-    set_message,
-    get_message
+    async_get_conversation, 
+    async_set_conversation, 
+    is_local_mode
 )
 
-# Import genie client for feedback
-from genie_integration.client import genie
-
-# Try to import GenieFeedbackRating, fall back to simple string enum if not available
-try:
-    from databricks.sdk.service.dashboards import GenieFeedbackRating
-except ImportError:
-    from enum import Enum
-    class GenieFeedbackRating(Enum):
-        """Fallback enum for Genie feedback ratings."""
-        POSITIVE = "POSITIVE"
-        NEGATIVE = "NEGATIVE"
-        NONE = "NONE"
-
-# Initialize database tables (only in non-local mode)
+from database.event_store import async_claim_event
+from slack_app.dedup import EVENT_DEDUP_SHARED, dedup_events, event_dedup
+
+from database.feedback_outbox import async_delete_feedback, async_load_feedback, async_save_feedback
+from slack_app.feedback import feedback_pipeline
+
+# Database tables are checked at startup by main.py (ensure_schema)
 if not is_local_mode():
-    try:
-        init_database()
-    except Exception as e:
-        print(f"Warning: Failed to initialize database: {e}")
-        print("The app will continue but database operations may fail.")
+    if EVENT_DEDUP_SHARED:
+        event_dedup.use_store(async_claim_event)
+    # Ratings survive a restart until Genie has them
+    feedback_pipeline.use_outbox(async_save_feedback, async_delete_feedback, async_load_feedback)
+
+slack_sink = SlackSink(app.client)
+
+# Drop Slack retries and reconnect redeliveries before any handler runs
+app.middleware(dedup_events)
 
 @app.event("assistant_thread_started")
 async def publish_home_view(event, say, client, logger):
@@ -54,18 +54,29 @@ async def publish_home_view(event, say, client, logger):
         blocks=blocks
     )
 
+# Serves the room picker's options from the in-memory space index
+@app.options(GENIE_ROOM_SELECT_ACTION)
+async def load_genie_room_options(ack, body):
+    query = body.get("value", "")
+    user_id = body.get("user", {}).get("id")
+    spaces = await search_spaces(query, user_id=user_id)
+    await ack(options=format_genie_room_options(spaces))
+
 # Registers the thread's genie space ID
-@app.action("static_select-action")
+@app.action(re.compile(f"^({GENIE_ROOM_SELECT_ACTION}|static_select-action)$"))
 async def register_genie_id(body, ack,):
     await ack()
     thread_ts = body["message"]["thread_ts"]
     selected_genie_room_id = body['actions'][0]['selected_option']['value']
     selected_genie_room_name = body['actions'][0]['selected_option']['text']['text']
+    space_index.mark_used(body["user"]["id"], selected_genie_room_id)
     room_details = {
         "genie_room_id": selected_genie_room_id,
         "genie_room_name": selected_genie_room_name
     }
-    set_conversation(thread_ts, room_details)
+    await async_set_conversation(thread_ts, room_details)
+    # The worker answering this thread may have the old room cached
+    await worker_pool.conversation_changed(thread_ts)
 
 # Delete the home messages
 @app.action("button-action")
@@ -81,7 +92,7 @@ async def handle_some_action(say, ack, body, logger):
     logger.info(f"Confirm button pressed for message {message_ts} in channel {channel_id}, thread {thread_ts}.")
 
     # Retrieve the stored selection for this specific thread from database/memory
-    stored_selection_data = get_conversation(thread_ts) or {}
+    stored_selection_data = await async_get_conversation(thread_ts) or {}
     selected_room_id = stored_selection_data.get("genie_room_id")
     selected_room_name = stored_selection_data.get("genie_room_name")
 
@@ -117,50 +128,20 @@ async def handle_some_action(say, ack, body, logger):
 @app.event("message")
 async def message_hello(message, say, client):
     print("Received: ", message, type(message))
-    thinking_ts = await send_thinking_message(say)
-    thread_ts = message.get("thread_ts")
-    channel_id = message.get("channel")
-    
-    # Get conversation details from database/memory
-    conv_data = get_conversation(thread_ts)
-    if not conv_data:
-        await delete_message(channel_id, thinking_ts)
-        await say(text="Error: Please select a Genie room first.", thread_ts=thread_ts)
-        return
-    
-    space_id = conv_data.get("genie_room_id")
-    conv_id = conv_data.get("conversation_id")
-    query = extract_text(message)
-    genie_message = None
-    
-    try:
-        if not conv_id:
-            genie_message = await async_genie_start_conv(space_id, query)
-            update_conversation_id(thread_ts, genie_message.conversation_id)
-        else:
-            genie_message = await async_genie_create_message(space_id, conv_id, query)
-
-        text = format_genie_response(genie_message)
-        print("Query output:", genie_message)
-
-    except TimeoutError as e:
-        text=str(e)
-    except LookupError as e:
-        text=str(e)
-    
-    await delete_message(channel_id, thinking_ts)
-    response = await say(text=text, thread_ts=thread_ts)
-    
-    # Store the message mapping for feedback tracking
-    if genie_message and response:
-        slack_message_ts = response.get("ts")
-        set_message(
-            channel_id=channel_id,
-            message_ts=slack_message_ts,
-            space_id=genie_message.space_id,
-            conversation_id=genie_message.conversation_id,
-            message_id=genie_message.message_id
-        )
+    if worker_pool.running:
+        # Genie calls, rendering and DB writes happen in a worker process
+        await worker_pool.submit(message)
+    else:
+        await handle_message(message, slack_sink)
+
+
+# Reactions map to ratings; the pipeline debounces and delivers them
+FEEDBACK_REACTIONS = {
+    "+1": "POSITIVE",
+    "thumbsup": "POSITIVE",
+    "-1": "NEGATIVE",
+    "thumbsdown": "NEGATIVE"
+}
 
 
 # Handle reaction added events for feedback
@@ -170,37 +151,9 @@ async def handle_reaction_added(event, logger):
     reaction = event.get("reaction")
     item = event.get("item", {})
     # Only process thumbsup and thumbsdown reactions on messages
-    if item.get("type") != "message":
-        return
-    
-    if reaction not in ("+1", "-1", "thumbsup", "thumbsdown"):
-        return
-    
-    channel_id = item.get("channel")
-    message_ts = item.get("ts")
-    
-    # Look up the Genie message details
-    message_data = get_message(channel_id, message_ts)
-    if not message_data:
-        logger.debug(f"No Genie message found for Slack message {message_ts} in channel {channel_id}")
+    if item.get("type") != "message" or reaction not in FEEDBACK_REACTIONS:
         return
-    
-    # Determine the rating
-    if reaction in ("+1", "thumbsup"):
-        rating = GenieFeedbackRating.POSITIVE
-    else:  # -1, thumbsdown
-        rating = GenieFeedbackRating.NEGATIVE
-    
-    try:
-        genie.send_message_feedback(
-            space_id=message_data["space_id"],
-            conversation_id=message_data["conversation_id"],
-            message_id=message_data["message_id"],
-            rating=rating
-        )
-        logger.info(f"Sent {rating.value} feedback for message {message_data['message_id']}")
-    except Exception as e:
-        logger.error(f"Failed to send feedback: {e}")
+    await feedback_pipeline.submit(item.get("channel"), item.get("ts"), FEEDBACK_REACTIONS[reaction])
 
 
 # Handle reaction removed events to reset feedback
@@ -209,30 +162,7 @@ async def handle_reaction_removed(event, logger):
     """Handle removal of thumbs up/down reactions to reset feedback."""
     reaction = event.get("reaction")
     item = event.get("item", {})
-    
     # Only process thumbsup and thumbsdown reactions on messages
-    if item.get("type") != "message":
-        return
-    
-    if reaction not in ("+1", "-1", "thumbsup", "thumbsdown"):
+    if item.get("type") != "message" or reaction not in FEEDBACK_REACTIONS:
         return
-    
-    channel_id = item.get("channel")
-    message_ts = item.get("ts")
-    
-    # Look up the Genie message details
-    message_data = get_message(channel_id, message_ts)
-    if not message_data:
-        logger.debug(f"No Genie message found for Slack message {message_ts} in channel {channel_id}")
-        return
-    
-    try:
-        genie.send_message_feedback(
-            space_id=message_data["space_id"],
-            conversation_id=message_data["conversation_id"],
-            message_id=message_data["message_id"],
-            rating=GenieFeedbackRating.NONE
-        )
-        logger.info(f"Reset feedback for message {message_data['message_id']}")
-    except Exception as e:
-        logger.error(f"Failed to reset feedback: {e}")
\ No newline at end of file
+    await feedback_pipeline.submit(item.get("channel"), item.get("ts"), "NONE")
@@ -0,0 +1,191 @@
+"""Per-thread ownership, so one task on one replica handles a thread at a time."""
+import asyncio
+import os
+import socket
+import uuid
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+# Run several app replicas against the same Lakebase; threads are then
+# owned through leases in the thread_lease table
+MULTI_REPLICA = os.environ.get("MULTI_REPLICA") == "true"
+REPLICA_ID = os.environ.get("REPLICA_ID") or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+# A lease is renewed every third of its duration while the thread is handled,
+# so a dead replica's threads are taken over within THREAD_LEASE_SECONDS
+THREAD_LEASE_SECONDS = float(os.environ.get("THREAD_LEASE_SECONDS", "30"))
+THREAD_LEASE_WAIT = float(os.environ.get("THREAD_LEASE_WAIT", "300"))
+THREAD_LEASE_POLL = float(os.environ.get("THREAD_LEASE_POLL", "1.0"))
+
+
+class ThreadBusy(Exception):
+    """Raised when a thread stays owned by another replica for too long."""
+
+
+class LeaseLost(ThreadBusy):
+    """Raised in the holder when its lease lapsed and may belong to another replica."""
+
+
+class _ThreadLock:
+    """Local lock for one thread, dropped once nobody holds or waits for it."""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class ThreadOwnership:
+    """
+    Serializes work per Slack thread.
+
+    Within a replica, messages in the same thread are handled one at a time
+    by a per-thread asyncio lock (so two quick follow-ups cannot both start
+    a conversation). Across replicas, the holder additionally takes a lease
+    in Lakebase, renews it while working and releases it when done. If a
+    replica dies its leases lapse after ``lease_seconds`` and another replica
+    takes over the thread; on clean shutdown ``release_all`` hands threads
+    off immediately. A holder whose lease could not be renewed in time (a
+    stalled loop or database) is cancelled with ``LeaseLost``, so it stops
+    before another replica can be working on the same thread.
+
+    Attributes:
+        owner_id: ID of this replica
+        lease_seconds: Lease duration
+        wait: Seconds to wait for another replica's lease before giving up
+        poll: Seconds between claim attempts while waiting
+    """
+
+    def __init__(
+        self,
+        owner_id: str = REPLICA_ID,
+        lease_seconds: float = THREAD_LEASE_SECONDS,
+        wait: float = THREAD_LEASE_WAIT,
+        poll: float = THREAD_LEASE_POLL
+    ):
+        self.owner_id = owner_id
+        self.lease_seconds = lease_seconds
+        self.wait = wait
+        self.poll = poll
+        self._locks: Dict[str, _ThreadLock] = {}
+        self._held: Set[str] = set()
+        self._claim: Optional[Callable[..., Awaitable[bool]]] = None
+        self._release: Optional[Callable[..., Awaitable[None]]] = None
+        self._on_acquired: Optional[Callable[[str], None]] = None
+
+    @property
+    def shared(self) -> bool:
+        return self._claim is not None
+
+    def use_store(
+        self,
+        claim: Callable[..., Awaitable[bool]],
+        release: Callable[..., Awaitable[None]],
+        on_acquired: Optional[Callable[[str], None]] = None
+    ):
+        """
+        Coordinate with other replicas through a lease store.
+
+        Args:
+            claim: ``async (thread_ts, owner_id, lease_seconds) -> bool``
+            release: ``async (owner_id, thread_ts=None) -> None``
+            on_acquired: Called with the thread after a lease is taken, e.g.
+                to drop local caches another replica may have made stale
+        """
+        self._claim = claim
+        self._release = release
+        self._on_acquired = on_acquired
+
+    async def _acquire_lease(self, thread_ts: str):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait
+        while True:
+            try:
+                if await self._claim(thread_ts, self.owner_id, self.lease_seconds):
+                    break
+            except Exception as e:
+                # Without the database nobody can coordinate; handle it here
+                print(f"Error claiming thread {thread_ts}, handling it locally: {e}")
+                return
+            if loop.time() >= deadline:
+                raise ThreadBusy("Still working on an earlier question in this thread. Please try again shortly.")
+            await asyncio.sleep(self.poll)
+        self._held.add(thread_ts)
+        if self._on_acquired is not None:
+            self._on_acquired(thread_ts)
+
+    async def _renew(self, thread_ts: str, holder: asyncio.Task, lost: asyncio.Event):
+        loop = asyncio.get_running_loop()
+        interval = self.lease_seconds / 3
+        renewed = loop.time()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await self._claim(thread_ts, self.owner_id, self.lease_seconds):
+                    renewed = loop.time()
+                    continue
+                print(f"Lease on thread {thread_ts} was taken over by another replica")
+            except Exception as e:
+                print(f"Error renewing lease on thread {thread_ts}: {e}")
+                # Still ours until it expires; stop before another replica may take it
+                if loop.time() - renewed + interval < self.lease_seconds:
+                    continue
+            self._held.discard(thread_ts)
+            lost.set()
+            holder.cancel()
+            return
+
+    @asynccontextmanager
+    async def hold(self, thread_ts: str):
+        """
+        Own a thread for the duration of the block.
+
+        Args:
+            thread_ts: Slack thread timestamp
+
+        Raises:
+            ThreadBusy: If another replica keeps the thread past ``wait``
+            LeaseLost: If the lease lapsed while the block was running (the
+                block is cancelled)
+        """
+        entry = self._locks.get(thread_ts)
+        if entry is None:
+            entry = self._locks[thread_ts] = _ThreadLock()
+        entry.users += 1
+        try:
+            async with entry.lock:
+                if not self.shared:
+                    yield
+                    return
+                await self._acquire_lease(thread_ts)
+                lost = asyncio.Event()
+                renew = None
+                if thread_ts in self._held:  # not when handling it locally without the database
+                    renew = asyncio.create_task(self._renew(thread_ts, asyncio.current_task(), lost))
+                try:
+                    yield
+                except asyncio.CancelledError:
+                    # Only our own cancellation becomes LeaseLost, not a shutdown
+                    if not lost.is_set() or asyncio.current_task().uncancel() > 0:
+                        raise
+                    raise LeaseLost(
+                        "This thread was handed to another instance while I was still answering. "
+                        "Please ask again."
+                    )
+                finally:
+                    if renew is not None:
+                        renew.cancel()
+                    if thread_ts in self._held:
+                        self._held.discard(thread_ts)
+                        await self._release(self.owner_id, thread_ts)
+        finally:
+            entry.users -= 1
+            if entry.users == 0:
+                del self._locks[thread_ts]
+
+    async def release_all(self):
+        """Release every lease held by this replica, e.g. on shutdown."""
+        if self.shared:
+            self._held.clear()
+            await self._release(self.owner_id)
+
+
+thread_ownership = ThreadOwnership()
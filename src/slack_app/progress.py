@@ -0,0 +1,91 @@
+"""Progressive delivery: a placeholder message edited in place as Genie works."""
+import asyncio
+import os
+from typing import Optional
+
+GENIE_PROGRESSIVE_UPDATES = os.environ.get("GENIE_PROGRESSIVE_UPDATES", "true") == "true"
+# Minimum seconds between two edits of the same message (chat.update is rate limited)
+PROGRESS_UPDATE_INTERVAL = float(os.environ.get("PROGRESS_UPDATE_INTERVAL", "1.0"))
+
+
+class ProgressMessage:
+    """
+    A Slack message that shows progress and is finally replaced by the answer.
+
+    Interim updates are coalesced: at most one chat_update per
+    ``min_interval`` seconds is sent, always with the latest text, and
+    updates never block the caller. ``finish`` drops any pending interim
+    update and writes the final text to the same message.
+
+    Attributes:
+        sink: Where the edits are sent (see ``slack_app.sink``)
+        channel: Slack channel ID
+        ts: Timestamp of the placeholder message
+        min_interval: Minimum seconds between two edits
+    """
+
+    def __init__(self, sink, channel: str, ts: str, min_interval: float = PROGRESS_UPDATE_INTERVAL):
+        self.sink = sink
+        self.channel = channel
+        self.ts = ts
+        self.min_interval = min_interval
+        self._text: Optional[str] = None  # latest text not sent yet
+        self._sent_text: Optional[str] = None
+        self._last_sent = None
+        self._task: Optional[asyncio.Task] = None
+        self._finished = False
+        self._editing = False
+
+    def update(self, text: str):
+        """
+        Show interim text, e.g. from a Genie status listener.
+
+        Args:
+            text: New text for the message
+        """
+        if self._finished or text == self._sent_text:
+            return
+        self._text = text
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._send_pending())
+
+    async def _send_pending(self):
+        loop = asyncio.get_running_loop()
+        while self._text is not None and not self._finished:
+            if self._last_sent is not None:
+                delay = self._last_sent + self.min_interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+            text, self._text = self._text, None
+            self._editing = True
+            try:
+                await self._edit(text)
+            finally:
+                self._editing = False
+
+    async def _edit(self, text: str) -> bool:
+        if not await self.sink.update(self.channel, self.ts, text):
+            return False
+        self._sent_text = text
+        self._last_sent = asyncio.get_running_loop().time()
+        return True
+
+    async def finish(self, text: str) -> bool:
+        """
+        Replace the placeholder with the final text.
+
+        Args:
+            text: Final message text
+
+        Returns:
+            bool: Whether the message was updated
+        """
+        self._finished = True
+        if self._task is not None and not self._task.done():
+            if self._editing:
+                # Let the edit in flight land first so it cannot overwrite the answer
+                await self._task
+            else:
+                self._task.cancel()
+        return await self._edit(text)
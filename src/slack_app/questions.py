@@ -0,0 +1,206 @@
+"""The question flow: from a Slack message to a posted Genie answer."""
+import time
+
+from genie_integration.utils import (
+    async_genie_start_conv,
+    async_genie_create_message,
+    format_genie_response,
+    format_genie_progress
+)
+from genie_integration.admission import AdmissionRejected, genie_admission
+from genie_integration.answer_cache import answer_cache, normalize_question
+from genie_integration.coalescing import genie_singleflight
+from slack_app.utils import send_thinking_message, extract_text, upload_result_file
+from slack_app.progress import GENIE_PROGRESSIVE_UPDATES, ProgressMessage
+from slack_app.ownership import MULTI_REPLICA, ThreadBusy, thread_ownership
+from database.conv_tracker import (
+    async_get_conversation,
+    async_update_conversation_id,
+    async_set_seed_question,
+    async_touch_conversation,
+    async_set_message,
+    is_local_mode,
+    invalidate_cached_conversation
+)
+from database.answer_store import async_get_answer, async_set_answer
+from database.thread_lease import async_claim_thread, async_release_threads
+from monitoring.metrics import QUESTIONS, QUESTIONS_IN_FLIGHT, STAGE_SECONDS, stage
+
+# Cached answers are shared through Lakebase in production
+if not is_local_mode():
+    answer_cache.use_store(async_get_answer, async_set_answer)
+    if MULTI_REPLICA:
+        thread_ownership.use_store(async_claim_thread, async_release_threads, invalidate_cached_conversation)
+
+
+async def handle_message(message: dict, sink):
+    """
+    Answer a Slack message, one message per thread at a time.
+
+    In multi-replica mode the thread is also owned by one replica only, so
+    follow-ups see the conversation the previous message set.
+
+    Args:
+        message: Slack message event
+        sink: Where replies go
+    """
+    thread_ts = message.get("thread_ts")
+    QUESTIONS_IN_FLIGHT.inc()
+    try:
+        with stage("question", thread_ts=thread_ts):
+            async with thread_ownership.hold(thread_ts):
+                await answer_question(message, sink)
+    except ThreadBusy as e:
+        QUESTIONS.inc(outcome="thread_busy")
+        await sink.post(message.get("channel"), str(e), thread_ts=thread_ts)
+    finally:
+        QUESTIONS_IN_FLIGHT.dec()
+
+
+async def answer_question(message: dict, sink):
+    """
+    Answer one Slack message with Genie.
+
+    Args:
+        message: Slack message event
+        sink: Where replies go (``SlackSink`` or a worker's ``QueueSink``)
+    """
+    thread_ts = message.get("thread_ts")
+    channel_id = message.get("channel")
+    user_id = message.get("user")
+    # In progressive mode the placeholder goes in the thread so the answer
+    # can replace it in place
+    with stage("thinking_post"):
+        thinking_ts = await send_thinking_message(sink, channel_id, thread_ts if GENIE_PROGRESSIVE_UPDATES else None)
+    
+    # Get conversation details from database/memory
+    with stage("get_conversation"):
+        conv_data = await async_get_conversation(thread_ts)
+    if not conv_data:
+        QUESTIONS.inc(outcome="no_room")
+        await sink.delete(channel_id, thinking_ts)
+        await sink.post(channel_id, "Error: Please select a Genie room first.", thread_ts=thread_ts)
+        return
+    
+    space_id = conv_data.get("genie_room_id")
+    conv_id = conv_data.get("conversation_id")
+    # Set when the thread's first answer came from another thread's conversation
+    seed_question = conv_data.get("seed_question")
+    first_question = not conv_id and not seed_question
+    query = extract_text(message)
+    formatted = None
+    # Genie message the reply maps to for feedback: (space, conversation, message)
+    feedback_ids = None
+    progress = None
+    on_status = on_position = None
+    if GENIE_PROGRESSIVE_UPDATES:
+        progress = ProgressMessage(sink, channel_id, thinking_ts)
+        on_status = lambda m: progress.update(format_genie_progress(m))
+        on_position = lambda n: progress.update(f"Genie is busy, you're #{n} in line...")
+    
+    async def ask_genie():
+        # Waits for a slot under the per-user/per-space limits; raises
+        # AdmissionRejected when the question is shed
+        waiting = time.perf_counter()
+        async with genie_admission.admit(user_id, space_id, on_position=on_position):
+            STAGE_SECONDS.observe(time.perf_counter() - waiting, stage="admission_wait")
+            with stage("genie_answer", space_id=space_id):
+                if not conv_id:
+                    if seed_question:
+                        # The thread's own conversation starts with the
+                        # question its first (borrowed) answer was for
+                        seeded = await async_genie_start_conv(space_id, seed_question)
+                        genie_message = await async_genie_create_message(
+                            space_id, seeded.conversation_id, query, on_status=on_status
+                        )
+                    else:
+                        genie_message = await async_genie_start_conv(space_id, query, on_status=on_status)
+                    with stage("update_conversation"):
+                        await async_update_conversation_id(thread_ts, genie_message.conversation_id)
+                else:
+                    genie_message = await async_genie_create_message(space_id, conv_id, query, on_status=on_status)
+
+            with stage("format"):
+                formatted = await format_genie_response(genie_message)
+        print("Query output:", genie_message)
+        genie_ids = (genie_message.space_id, genie_message.conversation_id, genie_message.message_id)
+
+        # Answers with a CSV attachment are not cached
+        if first_question and not (formatted.file_content or formatted.file_loader):
+            await answer_cache.set(space_id, query, formatted.text, formatted.sql, *genie_ids[1:])
+        return formatted, genie_ids
+    
+    # Only a thread's first question is cached or coalesced; follow-ups
+    # depend on the conversation so far
+    cached = None
+    if first_question:
+        with stage("answer_cache_get"):
+            cached = await answer_cache.get(space_id, query)
+    
+    outcome = "answered"
+    try:
+        if cached:
+            outcome = "cached"
+            text = cached.marked_text()
+            feedback_ids = (cached.space_id, cached.conversation_id, cached.message_id)
+        else:
+            if first_question:
+                # Identical first questions asked while one is in flight share
+                # its answer instead of starting their own conversation
+                key = (space_id, normalize_question(query))
+                if progress and key in genie_singleflight:
+                    progress.update("Genie is already answering this question, hang tight...")
+                # A rejection under the leader's own user limits is not
+                # passed on; followers then ask under their own limits
+                (formatted, feedback_ids), shared = await genie_singleflight.do(
+                    key, ask_genie, unshared=(AdmissionRejected,)
+                )
+                if shared:
+                    outcome = "shared"
+            else:
+                formatted, feedback_ids = await ask_genie()
+            text = formatted.text
+        if outcome != "answered":
+            # The answer came from another thread's (maybe another user's)
+            # Genie conversation, which this thread must not continue. Its
+            # first follow-up starts a conversation seeded with this question.
+            with stage("update_conversation"):
+                await async_set_seed_question(thread_ts, query)
+
+    except TimeoutError as e:
+        outcome = "timeout"
+        text=str(e)
+    except LookupError as e:
+        outcome = "failed"
+        text=str(e)
+    except AdmissionRejected as e:
+        outcome = "rejected"
+        text=str(e)
+    QUESTIONS.inc(outcome=outcome)
+    
+    with stage("reply"):
+        if progress and await progress.finish(text):
+            slack_message_ts = thinking_ts
+        else:
+            await sink.delete(channel_id, thinking_ts)
+            slack_message_ts = await sink.post(channel_id, text, thread_ts=thread_ts)
+    if formatted and (formatted.file_content or formatted.file_loader):
+        with stage("upload"):
+            await upload_result_file(sink, channel_id, thread_ts, formatted)
+    
+    if not first_question:
+        # Setting the conversation marks a first question; follow-ups only
+        # show up here, and retention purges threads by their last activity
+        with stage("touch_conversation"):
+            await async_touch_conversation(thread_ts)
+
+    # Store the message mapping for feedback tracking
+    if feedback_ids and slack_message_ts:
+        with stage("set_message"):
+            await async_set_message(
+                channel_id=channel_id,
+                message_ts=slack_message_ts,
+                space_id=feedback_ids[0],
+                conversation_id=feedback_ids[1],
+                message_id=feedback_ids[2]
+            )
@@ -0,0 +1,62 @@
+"""Where the Slack side effects of answering a question go."""
+from typing import Optional
+
+
+class SlackSink:
+    """
+    Posts, edits, deletes and uploads Slack messages for the question flow.
+
+    The flow in ``slack_app.questions`` only talks to Slack through a sink,
+    so it can run in the Socket Mode process (this class, calling the Web
+    API directly) or in a worker process (``workers.QueueSink``, which sends
+    the same calls back to the front end as instructions).
+
+    Attributes:
+        client: Slack AsyncWebClient
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    async def post(self, channel: str, text: str, thread_ts: Optional[str] = None) -> Optional[str]:
+        """
+        Post a message.
+
+        Returns:
+            The new message's ts
+        """
+        response = await self.client.chat_postMessage(channel=channel, text=text, thread_ts=thread_ts)
+        return response.get("ts")
+
+    async def update(self, channel: str, ts: str, text: str) -> bool:
+        """Replace a message's text; returns whether it worked."""
+        try:
+            await self.client.chat_update(channel=channel, ts=ts, text=text)
+            return True
+        except Exception as e:
+            print(f"Error updating message: {e}")
+            return False
+
+    async def delete(self, channel: str, ts: str) -> bool:
+        """Delete a message; returns whether it worked."""
+        try:
+            await self.client.chat_delete(channel=channel, ts=ts)
+            return True
+        except Exception as e:
+            print(f"Error deleting message: {e}")
+            return False
+
+    async def upload(self, channel: str, thread_ts: Optional[str], content: bytes, filename: str, title: str) -> bool:
+        """Upload a file into a thread; returns whether it worked."""
+        try:
+            await self.client.files_upload_v2(
+                channel=channel,
+                thread_ts=thread_ts,
+                content=content,
+                filename=filename,
+                title=title
+            )
+            return True
+        except Exception as e:
+            print(f"Error uploading result file: {e}")
+            return False
@@ -1,5 +1,3 @@
-from slack_app.app_setup import app
-
 def extract_text(message):
     query = ""
     for block in message["blocks"]:
@@ -8,12 +6,14 @@ def extract_text(message):
             query = "".join([text.get("text", "") for text in element["elements"] if text.get("type") == "text"])
     return query
 
-async def send_thinking_message(say) -> str:
-    response = await say(text="Genie is thinking...")
-    return response.get("ts")
+async def send_thinking_message(sink, channel: str, thread_ts: str = None) -> str:
+    return await sink.post(channel, "Genie is thinking...", thread_ts=thread_ts)
 
-async def delete_message(channel: str, ts: str) -> None:
+async def upload_result_file(sink, channel: str, thread_ts: str, formatted) -> None:
     try:
-        await app.client.chat_delete(channel=channel, ts=ts)
+        await formatted.load_file()
     except Exception as e:
-        print(f"Error deleting message: {e}")
\ No newline at end of file
+        print(f"Error fetching result file: {e}")
+        return
+    if formatted.file_content:
+        await sink.upload(channel, thread_ts, formatted.file_content, formatted.file_name, formatted.file_title)
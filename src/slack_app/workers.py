@@ -0,0 +1,260 @@
+"""Worker processes that answer questions off the Socket Mode event loop."""
+import asyncio
+import itertools
+import multiprocessing
+import os
+import threading
+import zlib
+from typing import Dict, List, Optional
+
+# 0 answers questions in the Socket Mode process itself
+WORKER_PROCESSES = int(os.environ.get("WORKER_PROCESSES", "0"))
+# Seconds between metric snapshots a worker sends to the front end's /metrics
+WORKER_METRICS_INTERVAL = float(os.environ.get("WORKER_METRICS_INTERVAL", "5"))
+# Job telling a worker that the front end changed a thread's conversation row
+CONVERSATION_CHANGED = "conversation_changed"
+
+
+class QueueSink:
+    """
+    Sink used inside a worker: every Slack call is sent to the front end as
+    an instruction and the worker waits for its result.
+
+    Attributes:
+        worker_id: Index of this worker
+    """
+
+    def __init__(self, worker_id: int, instructions, replies):
+        self.worker_id = worker_id
+        self._instructions = instructions
+        self._replies = replies
+        self._ids = itertools.count()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._loop = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        threading.Thread(target=self._read_replies, name="worker-replies", daemon=True).start()
+
+    def _read_replies(self):
+        while True:
+            call_id, ok, value = self._replies.get()
+            self._loop.call_soon_threadsafe(self._resolve, call_id, ok, value)
+
+    def _resolve(self, call_id: int, ok: bool, value):
+        future = self._pending.pop(call_id, None)
+        if future is None or future.done():
+            return
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(RuntimeError(value))
+
+    async def _call(self, method: str, *args, **kwargs):
+        call_id = next(self._ids)
+        future = self._loop.create_future()
+        self._pending[call_id] = future
+        self._instructions.put((self.worker_id, call_id, method, args, kwargs))
+        return await future
+
+    async def post(self, channel: str, text: str, thread_ts: Optional[str] = None) -> Optional[str]:
+        return await self._call("post", channel, text, thread_ts=thread_ts)
+
+    async def update(self, channel: str, ts: str, text: str) -> bool:
+        return await self._call("update", channel, ts, text)
+
+    async def delete(self, channel: str, ts: str) -> bool:
+        return await self._call("delete", channel, ts)
+
+    async def upload(self, channel: str, thread_ts: Optional[str], content: bytes, filename: str, title: str) -> bool:
+        return await self._call("upload", channel, thread_ts, content, filename, title)
+
+    def publish_metrics(self, families):
+        """Send this worker's metrics to the front end; no reply is expected."""
+        self._instructions.put((self.worker_id, None, "metrics", (families,), {}))
+
+
+async def _publish_metrics(sink: QueueSink):
+    from monitoring.metrics import registry
+    while True:
+        await asyncio.sleep(WORKER_METRICS_INTERVAL)
+        sink.publish_metrics(registry.collect())
+
+
+async def _run_worker(worker_id: int, jobs, instructions, replies):
+    # Imported here so the front end does not pay for it twice and the worker
+    # never needs the Slack app or its tokens
+    from database.conv_tracker import flush_pending_messages, invalidate_cached_conversation
+    from monitoring.diagnostics import start_diagnostics
+    from monitoring.loop_lag import monitor_loop_lag
+    from monitoring.server import register_worker_collectors
+    from slack_app.questions import handle_message
+
+    diagnostics = start_diagnostics()
+    register_worker_collectors()
+    sink = QueueSink(worker_id, instructions, replies)
+    sink.start()
+    loop = asyncio.get_running_loop()
+    background = [loop.create_task(monitor_loop_lag()), loop.create_task(_publish_metrics(sink))]
+    tasks = set()
+
+    async def handle(message):
+        try:
+            await handle_message(message, sink)
+        except Exception as e:
+            print(f"Worker {worker_id} failed to handle message: {e}")
+
+    while True:
+        message = await loop.run_in_executor(None, jobs.get)
+        if message is None:
+            break
+        if message.get("type") == CONVERSATION_CHANGED:
+            # Messages of the thread queued after this one read the new row
+            invalidate_cached_conversation(message["thread_ts"])
+            continue
+        task = loop.create_task(handle(message))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.wait(tasks)
+    for task in background:
+        task.cancel()
+    if diagnostics is not None:
+        diagnostics.stop()
+    await flush_pending_messages()
+
+
+def _worker_main(worker_id: int, jobs, instructions, replies):
+    try:
+        asyncio.run(_run_worker(worker_id, jobs, instructions, replies))
+    except KeyboardInterrupt:
+        pass
+
+
+class WorkerPool:
+    """
+    Pool of worker processes answering questions for the Socket Mode front end.
+
+    The front end only acks events and forwards message events to a worker.
+    Workers make the Genie calls, render results and write to Lakebase, and
+    send their Slack calls back as instructions that the front end executes
+    with its ``SlackSink``. Messages are routed by a hash of their thread, so
+    a thread always goes to the same worker and its messages stay in order.
+    When the front end changes a thread's room, ``conversation_changed``
+    tells that worker to drop the thread from its conversation cache.
+    Each worker runs its own admission controller, poller and caches; the
+    limits configured for those apply per worker.
+
+    Attributes:
+        processes: Number of worker processes
+        worker_metrics: Latest metric snapshot sent by each worker
+    """
+
+    def __init__(self, processes: int = WORKER_PROCESSES):
+        self.processes = processes
+        self._ctx = multiprocessing.get_context("spawn")
+        self._jobs: List = []
+        self._replies: List = []
+        self._workers: List = []
+        self.worker_metrics: Dict[int, list] = {}
+        self._instructions = None
+        self._sink = None
+        self._loop = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def _spawn(self, worker_id: int):
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self._jobs[worker_id], self._instructions, self._replies[worker_id]),
+            name=f"genie-worker-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        return process
+
+    def start(self, sink):
+        """
+        Start the workers.
+
+        Args:
+            sink: Sink executing the workers' Slack instructions
+        """
+        if self.processes <= 0 or self.running:
+            return
+        self._sink = sink
+        self._loop = asyncio.get_running_loop()
+        self._instructions = self._ctx.Queue()
+        self._jobs = [self._ctx.Queue() for _ in range(self.processes)]
+        self._replies = [self._ctx.Queue() for _ in range(self.processes)]
+        self._workers = [self._spawn(i) for i in range(self.processes)]
+        threading.Thread(target=self._read_instructions, name="worker-instructions", daemon=True).start()
+        print(f"Started {self.processes} worker processes")
+
+    def _read_instructions(self):
+        while True:
+            instruction = self._instructions.get()
+            if instruction is None:
+                return
+            worker_id, call_id, method, args, kwargs = instruction
+            if method == "metrics":
+                self.worker_metrics[worker_id] = args[0]
+                continue
+            asyncio.run_coroutine_threadsafe(self._execute(*instruction), self._loop)
+
+    async def _execute(self, worker_id: int, call_id: int, method: str, args, kwargs):
+        try:
+            result = await getattr(self._sink, method)(*args, **kwargs)
+            self._replies[worker_id].put((call_id, True, result))
+        except Exception as e:
+            self._replies[worker_id].put((call_id, False, f"{type(e).__name__}: {e}"))
+
+    async def submit(self, message: dict):
+        """
+        Hand a Slack message to the worker owning its thread.
+
+        Args:
+            message: Slack message event
+        """
+        thread = message.get("thread_ts") or message.get("ts") or ""
+        self._worker_for(thread).put(message)
+
+    async def conversation_changed(self, thread_ts: str):
+        """
+        Tell the worker owning a thread that its conversation row changed,
+        e.g. after a new room was picked, so it does not answer from a stale
+        cached copy.
+
+        Args:
+            thread_ts: Slack thread timestamp
+        """
+        if self.running:
+            self._worker_for(thread_ts).put({"type": CONVERSATION_CHANGED, "thread_ts": thread_ts})
+
+    def _worker_for(self, thread: str):
+        """Job queue of the worker owning ``thread``, restarting it if it died."""
+        worker_id = zlib.crc32(thread.encode()) % self.processes
+        if not self._workers[worker_id].is_alive():
+            print(f"Worker {worker_id} exited with code {self._workers[worker_id].exitcode}, restarting")
+            self._workers[worker_id] = self._spawn(worker_id)
+        return self._jobs[worker_id]
+
+    async def stop(self, timeout: float = 30):
+        """Let workers finish their current messages, then stop them."""
+        if not self.running:
+            return
+        for jobs in self._jobs:
+            jobs.put(None)
+        loop = asyncio.get_running_loop()
+        for process in self._workers:
+            await loop.run_in_executor(None, process.join, timeout)
+            if process.is_alive():
+                process.terminate()
+        self._instructions.put(None)
+        self._workers = []
+
+
+worker_pool = WorkerPool()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Conversation tracking in memory unless a test connects to PostgreSQL itself
+os.environ.setdefault("IS_LOCAL", "true")
+
+# The app's packages live in src/ and import each other top-level
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from genie_integration.admission import AdmissionRejected
+from genie_integration.coalescing import SingleFlight
+
+
+def test_followers_share_the_leaders_result():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def ask():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        return await asyncio.gather(*(flight.do("q", ask) for _ in range(3))), calls
+
+    results, calls = asyncio.run(scenario())
+    assert results == [("answer", False), ("answer", True), ("answer", True)]
+    assert len(calls) == 1
+
+
+def test_followers_share_errors():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise LookupError("no answer")
+
+        return await asyncio.gather(*(flight.do("q", fail) for _ in range(2)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, LookupError) for r in results)
+
+
+def test_unshared_rejection_makes_a_follower_ask_itself():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def leader():
+            await asyncio.sleep(0.01)
+            raise AdmissionRejected("You already have several questions waiting")
+
+        async def follower():
+            return "answer"
+
+        first = asyncio.create_task(flight.do("q", leader, unshared=(AdmissionRejected,)))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(flight.do("q", follower, unshared=(AdmissionRejected,)))
+        with pytest.raises(AdmissionRejected):
+            await first
+        return await second
+
+    # The follower did not hit the limit, so it runs its own call as the new leader
+    assert asyncio.run(scenario()) == ("answer", False)
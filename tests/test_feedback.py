@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from slack_app import feedback
+from slack_app.feedback import FeedbackPipeline
+
+MAPPING = {"space_id": "space-1", "conversation_id": "conv-1", "message_id": "msg-1"}
+
+
+class Outbox:
+    def __init__(self):
+        self.rows = {}
+
+    async def save(self, channel_id, message_ts, rating):
+        self.rows[(channel_id, message_ts)] = rating
+
+    async def delete(self, channel_id, message_ts, rating):
+        if self.rows.get((channel_id, message_ts)) == rating:
+            del self.rows[(channel_id, message_ts)]
+
+    async def load(self):
+        return [(*key, rating) for key, rating in self.rows.items()]
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    calls = []
+
+    async def run_genie(func, **kwargs):
+        calls.append((kwargs["message_id"], kwargs["rating"].value))
+
+    monkeypatch.setattr(feedback, "run_genie", run_genie)
+    return calls
+
+
+def _pipeline(outbox, mapping_wait):
+    pipeline = FeedbackPipeline(debounce=0.01, retry_delay=0.02, mapping_wait=mapping_wait)
+    pipeline.use_outbox(outbox.save, outbox.delete, outbox.load)
+    return pipeline
+
+
+def test_rating_waits_for_a_mapping_still_being_written(sent, monkeypatch):
+    lookups = []
+
+    async def get_message(channel_id, message_ts):
+        lookups.append(message_ts)
+        # Still in a write-behind buffer on the first lookups
+        return MAPPING if len(lookups) >= 3 else None
+
+    monkeypatch.setattr(feedback, "async_get_message", get_message)
+    outbox = Outbox()
+    pipeline = _pipeline(outbox, mapping_wait=5)
+
+    async def scenario():
+        await pipeline.start()
+        await pipeline.submit("D1", "100.1", "POSITIVE")
+        await asyncio.sleep(0.05)
+        # Not found yet: the rating is kept
+        assert outbox.rows == {("D1", "100.1"): "POSITIVE"}
+        await asyncio.sleep(0.3)
+        await pipeline.stop()
+
+    asyncio.run(scenario())
+    assert sent == [("msg-1", "POSITIVE")]
+    assert outbox.rows == {}
+    assert pipeline.stats["mapping_retries"] == 2
+    assert pipeline.stats["skipped"] == 0
+
+
+def test_rating_is_dropped_once_the_mapping_wait_is_over(sent, monkeypatch):
+    async def get_message(channel_id, message_ts):
+        return None  # not a Genie answer
+
+    monkeypatch.setattr(feedback, "async_get_message", get_message)
+    outbox = Outbox()
+    pipeline = _pipeline(outbox, mapping_wait=0.1)
+
+    async def scenario():
+        await pipeline.start()
+        await pipeline.submit("D1", "100.1", "NEGATIVE")
+        await asyncio.sleep(0.3)
+        await pipeline.stop()
+
+    asyncio.run(scenario())
+    assert sent == []
+    assert outbox.rows == {}
+    assert pipeline.stats["skipped"] == 1
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from slack_app.ownership import LeaseLost, ThreadOwnership
+
+
+class LeaseStore:
+    """In-memory thread_lease table with the semantics of async_claim_thread."""
+
+    def __init__(self):
+        self.leases = {}  # thread_ts -> (owner_id, expires_at)
+        self.refuse = set()  # owners whose renewals fail, e.g. a stalled replica
+
+    async def claim(self, thread_ts, owner_id, lease_seconds):
+        now = asyncio.get_running_loop().time()
+        if owner_id in self.refuse:
+            raise ConnectionError("database unavailable")
+        lease = self.leases.get(thread_ts)
+        if lease is None or lease[1] < now or lease[0] == owner_id:
+            self.leases[thread_ts] = (owner_id, now + lease_seconds)
+            return True
+        return False
+
+    async def release(self, owner_id, thread_ts=None):
+        for ts, (owner, _) in list(self.leases.items()):
+            if owner == owner_id and thread_ts in (None, ts):
+                del self.leases[ts]
+
+
+def _replicas(store, count=2, lease_seconds=0.3):
+    replicas = []
+    for i in range(count):
+        ownership = ThreadOwnership(owner_id=f"replica-{i}", lease_seconds=lease_seconds, wait=5, poll=0.01)
+        ownership.use_store(store.claim, store.release)
+        replicas.append(ownership)
+    return replicas
+
+
+def test_one_replica_at_a_time_handles_a_thread():
+    store = LeaseStore()
+    replicas = _replicas(store, count=3)
+    active = []
+    overlaps = []
+
+    async def handle(ownership, seconds):
+        async with ownership.hold("thread-1"):
+            active.append(ownership.owner_id)
+            if len(active) > 1:
+                overlaps.append(list(active))
+            await asyncio.sleep(seconds)
+            active.remove(ownership.owner_id)
+
+    async def scenario():
+        # Messages of one thread spread over replicas, some longer than a lease
+        await asyncio.gather(*(handle(replicas[i % 3], 0.05 if i % 2 else 0.4) for i in range(9)))
+
+    asyncio.run(scenario())
+    assert overlaps == []
+    assert store.leases == {}
+
+
+def test_holder_stops_when_its_lease_lapses():
+    store = LeaseStore()
+    first, second = _replicas(store)
+    events = []
+
+    async def stalled():
+        try:
+            async with first.hold("thread-1"):
+                store.refuse.add(first.owner_id)  # renewals stop working
+                await asyncio.sleep(5)
+                events.append("first finished")  # must not happen
+        except LeaseLost:
+            events.append("first stopped")
+            raise
+
+    async def takeover():
+        await asyncio.sleep(0.05)
+        async with second.hold("thread-1"):
+            events.append("second took over")
+
+    async def scenario():
+        results = await asyncio.gather(stalled(), takeover(), return_exceptions=True)
+        return results
+
+    results = asyncio.run(scenario())
+    assert isinstance(results[0], LeaseLost)
+    # The stalled holder was stopped before the other replica could claim the thread
+    assert events == ["first stopped", "second took over"]
+
+
+def test_shutdown_is_not_reported_as_a_lost_lease():
+    store = LeaseStore()
+    (ownership,) = _replicas(store, count=1)
+
+    async def handle():
+        async with ownership.hold("thread-1"):
+            await asyncio.sleep(5)
+
+    async def scenario():
+        task = asyncio.create_task(handle())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert store.leases == {}
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from database.conv_tracker import async_get_conversation, async_set_conversation
+from genie_integration.answer_cache import CachedAnswer
+from genie_integration.rendering import FormattedResponse
+from slack_app import questions
+
+
+class RecordingSink:
+    def __init__(self):
+        self.posts = []
+        self._ts = 0
+
+    def _next_ts(self):
+        self._ts += 1
+        return f"1700000000.{self._ts:06d}"
+
+    async def post(self, channel, text, thread_ts=None):
+        self.posts.append((thread_ts, text))
+        return self._next_ts()
+
+    async def update(self, channel, ts, text):
+        return True
+
+    async def delete(self, channel, ts):
+        return True
+
+    async def upload(self, channel, thread_ts, content, filename, title):
+        return True
+
+
+class FakeGenie:
+    """Stands in for the Genie calls; each new conversation gets a new ID."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.started = []
+        self.followups = []
+
+    def _message(self, space_id, conversation_id, content):
+        return SimpleNamespace(
+            space_id=space_id,
+            conversation_id=conversation_id,
+            message_id=f"msg-{len(self.started) + len(self.followups)}",
+            content=content
+        )
+
+    async def start_conv(self, space_id, query, on_status=None):
+        await asyncio.sleep(self.delay)
+        self.started.append(query)
+        return self._message(space_id, f"conv-{len(self.started)}", query)
+
+    async def create_message(self, space_id, conversation_id, query, on_status=None):
+        self.followups.append((conversation_id, query))
+        return self._message(space_id, conversation_id, query)
+
+
+@pytest.fixture
+def genie(monkeypatch):
+    fake = FakeGenie()
+    monkeypatch.setattr(questions, "async_genie_start_conv", fake.start_conv)
+    monkeypatch.setattr(questions, "async_genie_create_message", fake.create_message)
+
+    async def format_response(message):
+        return FormattedResponse(text=f"answer to {message.content}")
+
+    monkeypatch.setattr(questions, "format_genie_response", format_response)
+    return fake
+
+
+def _message(thread_ts, user, text):
+    return {
+        "channel": "D1",
+        "thread_ts": thread_ts,
+        "user": user,
+        "text": text,
+        "ts": thread_ts,
+        "blocks": [{"type": "rich_text", "elements": [
+            {"type": "rich_text_section", "elements": [{"type": "text", "text": text}]}
+        ]}]
+    }
+
+
+async def _new_thread(thread_ts):
+    await async_set_conversation(thread_ts, {"genie_room_id": "space-1", "genie_room_name": "Sales"})
+
+
+def test_follow_up_after_a_shared_answer_starts_its_own_seeded_conversation(genie):
+    async def scenario():
+        sink = RecordingSink()
+        await _new_thread("100.1")
+        await _new_thread("100.2")
+        # The same first question in two threads at once: one Genie call, shared
+        await asyncio.gather(
+            questions.answer_question(_message("100.1", "U1", "total sales?"), sink),
+            questions.answer_question(_message("100.2", "U2", "total sales?"), sink)
+        )
+        follower = dict(await async_get_conversation("100.2"))
+        await questions.answer_question(_message("100.2", "U2", "and by region?"), sink)
+        await questions.answer_question(_message("100.1", "U1", "and by product?"), sink)
+        return follower, await async_get_conversation("100.2")
+
+    follower, after = asyncio.run(scenario())
+    # The follower does not take over the leader's conversation
+    assert follower.get("conversation_id") is None
+    assert follower["seed_question"] == "total sales?"
+    # Its first follow-up goes to a new conversation that starts with the first question
+    assert genie.started == ["total sales?", "total sales?"]
+    assert after["conversation_id"] == "conv-2"
+    assert not after.get("seed_question")
+    assert genie.followups == [("conv-2", "and by region?"), ("conv-1", "and by product?")]
+
+
+def test_follow_up_after_a_cached_answer_starts_its_own_seeded_conversation(genie, monkeypatch):
+    cached = CachedAnswer("cached answer", None, "space-1", "conv-cached", "msg-cached", time.time())
+
+    async def get(space_id, question):
+        return cached
+
+    monkeypatch.setattr(questions.answer_cache, "get", get)
+
+    async def scenario():
+        sink = RecordingSink()
+        await _new_thread("200.1")
+        await questions.answer_question(_message("200.1", "U3", "total sales?"), sink)
+        await questions.answer_question(_message("200.1", "U3", "and by region?"), sink)
+        await questions.answer_question(_message("200.1", "U3", "and last year?"), sink)
+
+    asyncio.run(scenario())
+    # Seeded once; the cached conversation is never written to
+    assert genie.started == ["total sales?"]
+    assert genie.followups == [("conv-1", "and by region?"), ("conv-1", "and last year?")]
@@ -0,0 +1,41 @@
+import asyncio
+
+from database import retention
+
+
+def test_retention_job_survives_a_failed_run(monkeypatch):
+    runs = []
+
+    async def run_purge():
+        runs.append(len(runs))
+        if len(runs) == 1:
+            raise ConnectionError("token endpoint unreachable")
+        return {}
+
+    monkeypatch.setattr(retention, "run_purge", run_purge)
+
+    async def scenario():
+        job = asyncio.create_task(retention.run_retention_job(interval=0.01))
+        await asyncio.sleep(0.1)
+        assert not job.done()
+        job.cancel()
+
+    asyncio.run(scenario())
+    assert len(runs) > 1
+
+
+def test_purge_continues_with_other_tables_after_an_error(monkeypatch):
+    purged = []
+
+    async def purge_table(model, column, ttl_days):
+        if model is retention.ConversationTracker:
+            raise OSError("connection reset")
+        purged.append(model.__tablename__)
+        return 0
+
+    monkeypatch.setattr(retention, "purge_table", purge_table)
+    monkeypatch.setattr(retention, "get_async_engine", lambda: None)
+
+    asyncio.run(retention.run_purge())
+    assert "message_tracker" in purged
+    assert "conversation_tracker" not in purged
@@ -0,0 +1,158 @@
+"""Concurrent conversation and message upserts against a real PostgreSQL."""
+import asyncio
+import os
+import random
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not all(os.environ.get(var) for var in ("PGHOST", "PGUSER", "PGDATABASE", "PGPASSWORD")),
+    reason="needs a PostgreSQL named by PGHOST, PGUSER, PGDATABASE and PGPASSWORD"
+)
+
+from sqlalchemy import create_engine, delete, select, text, update  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from database.connection import get_lakebase_connection_string  # noqa: E402
+from database.conv_tracker import (  # noqa: E402
+    _add_missing_columns,
+    _message_row,
+    _touch_conversation_stmt,
+    _update_conversation_id_stmt,
+    _upsert_conversation_stmt,
+    _upsert_messages_stmt
+)
+from database.models import Base, ConversationTracker, MessageTracker, SCHEMA_NAME  # noqa: E402
+
+WRITERS = 20
+
+
+@pytest.fixture(scope="module")
+def tables():
+    # libpq reads PGPASSWORD itself
+    engine = create_engine(get_lakebase_connection_string("postgresql+psycopg"))
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA_NAME}"))
+    Base.metadata.create_all(bind=engine, tables=[ConversationTracker.__table__, MessageTracker.__table__])
+    _add_missing_columns(engine)  # tables left by an earlier version
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def prefix(tables):
+    # Rows of this test only, removed afterwards
+    prefix = f"test-{uuid.uuid4().hex[:8]}-"
+    yield prefix
+    with tables.begin() as conn:
+        conn.execute(delete(ConversationTracker).where(ConversationTracker.thread_ts.startswith(prefix)))
+        conn.execute(delete(MessageTracker).where(MessageTracker.slack_channel_id.startswith(prefix)))
+
+
+async def _run_concurrently(statements):
+    """Execute each statement in its own session and transaction, all at once."""
+    engine = create_async_engine(get_lakebase_connection_string("postgresql+psycopg"), pool_size=len(statements))
+    sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+    start = asyncio.Event()
+
+    async def execute(stmt):
+        async with sessions() as session:
+            await start.wait()
+            result = await session.execute(stmt)
+            # Statements with RETURNING come back as an ORM result without returns_rows
+            rows = result.all() if getattr(result, "returns_rows", True) else []
+            await session.commit()
+            return rows
+
+    try:
+        tasks = [asyncio.create_task(execute(stmt)) for stmt in statements]
+        await asyncio.sleep(0)
+        start.set()
+        return await asyncio.gather(*tasks)
+    finally:
+        await engine.dispose()
+
+
+def _conversation(engine, thread_ts):
+    with engine.connect() as conn:
+        return conn.execute(select(ConversationTracker).where(ConversationTracker.thread_ts == thread_ts)).all()
+
+
+def test_concurrent_first_upserts_of_a_thread_leave_one_row(tables, prefix):
+    thread_ts = prefix + "1"
+    rooms = [{"genie_room_id": f"space-{i}", "genie_room_name": f"Room {i}"} for i in range(WRITERS)]
+
+    results = asyncio.run(_run_concurrently([_upsert_conversation_stmt(thread_ts, room) for room in rooms]))
+
+    rows = _conversation(tables, thread_ts)
+    assert len(rows) == 1
+    assert rows[0].genie_room_id in {room["genie_room_id"] for room in rooms}
+    assert rows[0].conversation_id is None
+    # Every writer got the stored row back, none failed on the unique key
+    assert all(len(returned) == 1 for returned in results)
+
+
+def test_concurrent_room_upserts_keep_the_conversation(tables, prefix):
+    thread_ts = prefix + "1"
+    asyncio.run(_run_concurrently([_upsert_conversation_stmt(thread_ts, {
+        "genie_room_id": "space-0", "genie_room_name": "Room 0", "conversation_id": "conv-kept"
+    })]))
+
+    statements = [
+        _upsert_conversation_stmt(thread_ts, {"genie_room_id": f"space-{i}", "genie_room_name": f"Room {i}"})
+        for i in range(WRITERS)
+    ]
+    statements.append(_update_conversation_id_stmt(thread_ts, "conv-kept"))
+    random.Random(7).shuffle(statements)
+    asyncio.run(_run_concurrently(statements))
+
+    (row,) = _conversation(tables, thread_ts)
+    assert row.conversation_id == "conv-kept"
+    assert row.genie_room_id.startswith("space-")
+
+
+def test_concurrent_message_batches_leave_one_row_per_message(tables, prefix):
+    channel = prefix + "C1"
+    keys = [f"{1700000000 + i}.000100" for i in range(50)]
+    shuffle = random.Random(11)
+    batches = []
+    for writer in range(WRITERS):
+        # Overlapping batches in different orders, like buffers of several processes
+        batch_keys = shuffle.sample(keys, 30)
+        batches.append([
+            _message_row(channel, ts, {"space_id": "space-0", "conversation_id": "conv-1", "message_id": f"msg-{writer}"})
+            for ts in batch_keys
+        ])
+
+    asyncio.run(_run_concurrently([_upsert_messages_stmt(rows) for rows in batches]))
+
+    with tables.connect() as conn:
+        rows = conn.execute(select(MessageTracker).where(MessageTracker.slack_channel_id == channel)).all()
+    written = {row["slack_message_ts"] for batch in batches for row in batch}
+    assert sorted(row.slack_message_ts for row in rows) == sorted(written)
+    for row in rows:
+        # Each message holds the values of one of the batches that wrote it
+        writers = {batch[0]["message_id"] for batch in batches if any(r["slack_message_ts"] == row.slack_message_ts for r in batch)}
+        assert row.message_id in writers
+
+
+def test_follow_up_touch_moves_only_stale_activity_forward(tables, prefix):
+    stale, recent = prefix + "stale", prefix + "recent"
+    room = {"genie_room_id": "space-0", "genie_room_name": "Room 0", "conversation_id": "conv-1"}
+    asyncio.run(_run_concurrently([_upsert_conversation_stmt(ts, room) for ts in (stale, recent)]))
+    with tables.begin() as conn:
+        conn.execute(update(ConversationTracker).where(ConversationTracker.thread_ts == stale)
+                     .values(updated_at=text("current_timestamp - interval '40 days'")))
+        conn.execute(update(ConversationTracker).where(ConversationTracker.thread_ts == recent)
+                     .values(updated_at=text("current_timestamp - interval '5 minutes'")))
+    before = _conversation(tables, recent)[0].updated_at
+
+    asyncio.run(_run_concurrently([_touch_conversation_stmt(ts) for ts in (stale, recent)]))
+
+    with tables.connect() as conn:
+        age = conn.execute(select(text("current_timestamp - updated_at")).select_from(ConversationTracker)
+                           .where(ConversationTracker.thread_ts == stale)).scalar_one()
+    assert age.total_seconds() < 60
+    # Touched within the interval already: not written again
+    assert _conversation(tables, recent)[0].updated_at == before
@@ -0,0 +1,79 @@
+"""A worker process's conversation cache after the front end re-picks a room."""
+import asyncio
+import os
+import queue
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not all(os.environ.get(var) for var in ("PGHOST", "PGUSER", "PGDATABASE", "PGPASSWORD")),
+    reason="needs a PostgreSQL named by PGHOST, PGUSER, PGDATABASE and PGPASSWORD"
+)
+
+from sqlalchemy import create_engine, delete, text  # noqa: E402
+
+from database import connection  # noqa: E402
+from database.connection import get_lakebase_connection_string  # noqa: E402
+from database.conv_tracker import _add_missing_columns, _upsert_conversation_stmt, async_get_conversation  # noqa: E402
+from database.models import Base, ConversationTracker, SCHEMA_NAME  # noqa: E402
+from slack_app import questions, workers  # noqa: E402
+
+
+class _Alive:
+    def is_alive(self):
+        return True
+
+
+def test_worker_sees_a_room_picked_after_its_first_question(monkeypatch):
+    # Worker mode keeps conversations in Lakebase, cached per process
+    monkeypatch.setenv("IS_LOCAL", "false")
+    thread_ts = f"test-{uuid.uuid4().hex[:8]}"
+    # The front end's writes, on a connection of its own: they do not touch
+    # the conversation cache of the (here in-process) worker
+    front_end = create_engine(get_lakebase_connection_string("postgresql+psycopg"))
+    with front_end.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA_NAME}"))
+    Base.metadata.create_all(bind=front_end, tables=[ConversationTracker.__table__])
+    _add_missing_columns(front_end)
+
+    def pick_room(space_id):
+        with front_end.begin() as conn:
+            conn.execute(_upsert_conversation_stmt(thread_ts, {"genie_room_id": space_id, "genie_room_name": space_id}))
+
+    rooms = []
+    answered = asyncio.Queue()
+
+    async def handle_message(message, sink):
+        rooms.append((await async_get_conversation(thread_ts))["genie_room_id"])
+        answered.put_nowait(None)
+
+    monkeypatch.setattr(questions, "handle_message", handle_message)
+    jobs = queue.Queue()
+    pool = workers.WorkerPool(processes=1)
+    pool._workers = [_Alive()]
+    pool._jobs = [jobs]
+
+    async def scenario():
+        worker = asyncio.create_task(workers._run_worker(0, jobs, queue.Queue(), queue.Queue()))
+        try:
+            pick_room("space-a")
+            await pool.submit({"type": "message", "thread_ts": thread_ts, "text": "total sales?"})
+            await asyncio.wait_for(answered.get(), 10)
+            # Re-picked in the front end, then a follow-up
+            pick_room("space-b")
+            await pool.conversation_changed(thread_ts)
+            await pool.submit({"type": "message", "thread_ts": thread_ts, "text": "and now?"})
+            await asyncio.wait_for(answered.get(), 10)
+        finally:
+            jobs.put(None)
+            await worker
+            await connection.get_async_engine().dispose()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        with front_end.begin() as conn:
+            conn.execute(delete(ConversationTracker).where(ConversationTracker.thread_ts == thread_ts))
+        front_end.dispose()
+    assert rooms == ["space-a", "space-b"]
@@ -0,0 +1,97 @@
+import asyncio
+
+from database.write_behind import WriteBehindBuffer
+
+
+class FlakyStore:
+    """Stands in for the database: rejects poison rows, or everything while down."""
+
+    def __init__(self, poison=()):
+        self.poison = set(poison)
+        self.down = False
+        self.rows = {}
+        self.calls = []
+
+    async def flush_rows(self, rows):
+        self.calls.append(len(rows))
+        await asyncio.sleep(0)
+        if self.down:
+            raise ConnectionError("database unavailable")
+        bad = [row["id"] for row in rows if row["id"] in self.poison]
+        if bad:
+            raise ValueError(f"cannot write {bad}")
+        self.rows.update({row["id"]: row for row in rows})
+
+
+def _add(buffer, *ids):
+    for i in ids:
+        buffer.add(("C1", i), {"id": i})
+
+
+def test_poison_row_is_dropped_after_max_attempts():
+    store = FlakyStore(poison={"2"})
+    buffer = WriteBehindBuffer(store.flush_rows, flush_interval=0.01, max_attempts=3)
+
+    async def scenario():
+        _add(buffer, "1", "2", "3")
+        for _ in range(3):
+            await buffer.flush()
+
+    asyncio.run(scenario())
+    assert sorted(store.rows) == ["1", "3"]
+    assert buffer.dropped == 1
+    assert len(buffer) == 0
+    assert buffer.failures == 0
+
+
+def test_rows_are_kept_while_the_database_is_down():
+    store = FlakyStore()
+    store.down = True
+    buffer = WriteBehindBuffer(store.flush_rows, flush_interval=0.01, max_attempts=2, max_backoff=0.04)
+
+    async def scenario():
+        _add(buffer, *"12345")
+        await asyncio.sleep(0.3)
+        assert buffer.dropped == 0
+        assert len(buffer) == 5
+        # Backing off: a handful of retries, and per-row passes stop early
+        assert len(store.calls) < 40
+        store.down = False
+        await asyncio.sleep(0.1)
+
+    asyncio.run(scenario())
+    assert sorted(store.rows) == list("12345")
+    assert buffer.failures == 0
+
+
+def test_retries_back_off():
+    store = FlakyStore()
+    store.down = True
+    buffer = WriteBehindBuffer(store.flush_rows, flush_interval=0.01, max_attempts=100, max_backoff=10)
+
+    async def scenario():
+        _add(buffer, "1")
+        await asyncio.sleep(0.35)
+
+    asyncio.run(scenario())
+    # 0.01, 0.02, 0.04, 0.08, 0.16 s apart: about five attempts, not 35
+    assert 4 <= len(store.calls) <= 6
+
+
+def test_discarded_row_of_a_failed_batch_is_not_retried():
+    store = FlakyStore()
+    store.down = True
+    buffer = WriteBehindBuffer(store.flush_rows, flush_interval=0.01)
+
+    async def scenario():
+        _add(buffer, "1", "2")
+        flush = asyncio.create_task(buffer.flush())
+        await asyncio.sleep(0)  # the batch is being written
+        buffer.discard(("C1", "1"))
+        assert buffer.get(("C1", "1")) is None
+        await flush
+        store.down = False
+        await buffer.flush()
+
+    asyncio.run(scenario())
+    assert sorted(store.rows) == ["2"]